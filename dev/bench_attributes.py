@@ -0,0 +1,86 @@
+"""Micro-benchmark for converting tool arguments to protobuf resource attributes.
+
+Compares the in-place conversion used by the middleware with the previous approach of
+building a ``Value`` per node and copying it into its parent.
+
+    uv run python dev/bench_attributes.py
+"""
+
+from __future__ import annotations
+
+import timeit
+from typing import Any
+
+from cerbos.engine.v1 import engine_pb2
+from google.protobuf import struct_pb2
+
+from cerbos_fastmcp.middleware import _set_protobuf_value
+
+
+def _copying_value(value: Any) -> struct_pb2.Value:
+    if value is None:
+        return struct_pb2.Value(null_value=struct_pb2.NullValue.NULL_VALUE)
+    elif isinstance(value, str):
+        return struct_pb2.Value(string_value=value)
+    elif isinstance(value, bool):
+        return struct_pb2.Value(bool_value=value)
+    elif isinstance(value, (int, float)):
+        return struct_pb2.Value(number_value=float(value))
+    elif isinstance(value, dict):
+        struct_value = struct_pb2.Struct()
+        for k, v in value.items():
+            struct_value.fields[k].CopyFrom(_copying_value(v))
+        return struct_pb2.Value(struct_value=struct_value)
+    elif isinstance(value, (list, tuple)):
+        list_value = struct_pb2.ListValue()
+        for item in value:
+            list_value.values.append(_copying_value(item))
+        return struct_pb2.Value(list_value=list_value)
+    return struct_pb2.Value(string_value=str(value))
+
+
+def _copying_resource(attr: dict[str, Any]) -> engine_pb2.Resource:
+    return engine_pb2.Resource(
+        id="tool",
+        kind="mcp_server",
+        attr={key: _copying_value(value) for key, value in attr.items()},
+    )
+
+
+def _in_place_resource(attr: dict[str, Any]) -> engine_pb2.Resource:
+    resource_pb = engine_pb2.Resource(id="tool", kind="mcp_server")
+    for key, value in attr.items():
+        _set_protobuf_value(resource_pb.attr[key], value)
+    return resource_pb
+
+
+def _payload(depth: int, width: int) -> Any:
+    if depth == 0:
+        return {"name": "value", "count": 3, "enabled": True, "tags": ["a", "b", "c"]}
+    return {f"node_{index}": _payload(depth - 1, width) for index in range(width)}
+
+
+CASES = {
+    "flat (10 keys)": {"arguments": {f"key_{index}": index for index in range(10)}},
+    "nested (depth 4, width 4)": {"arguments": _payload(4, 4)},
+    "wide list (2,000 records)": {
+        "arguments": {"rows": [{"id": index, "name": f"row {index}"} for index in range(2_000)]}
+    },
+}
+
+
+def main() -> None:
+    print(f"{'payload':<28}{'copying':>12}{'in place':>12}{'speedup':>10}")
+    for label, attr in CASES.items():
+        assert _copying_resource(attr) == _in_place_resource(attr)
+        number, _ = timeit.Timer(lambda: _copying_resource(attr)).autorange()
+        copying = min(timeit.repeat(lambda: _copying_resource(attr), number=number, repeat=5))
+        in_place = min(timeit.repeat(lambda: _in_place_resource(attr), number=number, repeat=5))
+        print(
+            f"{label:<28}{copying / number * 1e6:>10.1f}us{in_place / number * 1e6:>10.1f}us"
+            f"{copying / in_place:>9.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
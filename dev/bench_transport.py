@@ -0,0 +1,116 @@
+"""Benchmark PDP round-trip latency over TCP and a Unix domain socket.
+
+Starts an in-process stand-in PDP that answers ``CheckResources`` with a fixed
+decision, listening on both a loopback TCP port and a Unix socket, then measures
+sequential and concurrent request latency through ``AsyncCerbosClient`` over each
+transport. The stand-in does no policy evaluation, so the numbers isolate transport and
+serialization overhead.
+
+    uv run python dev/bench_transport.py [--requests 5000] [--concurrency 32]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import grpc
+from cerbos.effect.v1 import effect_pb2
+from cerbos.engine.v1 import engine_pb2
+from cerbos.request.v1 import request_pb2
+from cerbos.response.v1 import response_pb2
+from cerbos.sdk.grpc.client import AsyncCerbosClient
+from cerbos.svc.v1 import svc_pb2_grpc
+
+from cerbos_fastmcp import ChannelOptions
+
+
+class StandInPDP(svc_pb2_grpc.CerbosServiceServicer):
+    async def CheckResources(self, request, context):  # type: ignore[no-untyped-def]
+        return response_pb2.CheckResourcesResponse(
+            request_id=request.request_id,
+            results=[
+                response_pb2.CheckResourcesResponse.ResultEntry(
+                    resource=response_pb2.CheckResourcesResponse.ResultEntry.Resource(
+                        id=entry.resource.id, kind=entry.resource.kind
+                    ),
+                    actions={action: effect_pb2.EFFECT_ALLOW for action in entry.actions},
+                )
+                for entry in request.resources
+            ],
+        )
+
+    async def ServerInfo(self, request, context):  # type: ignore[no-untyped-def]
+        return response_pb2.ServerInfoResponse(version="stand-in")
+
+
+PRINCIPAL = engine_pb2.Principal(id="alice", roles=["USER"])
+ENTRIES = [
+    request_pb2.CheckResourcesRequest.ResourceEntry(
+        actions=["tools/call::greet"],
+        resource=engine_pb2.Resource(id="greet", kind="mcp_server"),
+    )
+]
+
+
+async def _measure(client: AsyncCerbosClient, requests: int, concurrency: int) -> list[float]:
+    latencies: list[float] = []
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            await client.check_resources(principal=PRINCIPAL, resources=ENTRIES)
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+def _report(label: str, latencies: list[float], elapsed: float) -> None:
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1e6
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1e6
+    rate = len(latencies) / elapsed
+    print(f"{label:<24}{p50:>10.1f}us{p99:>10.1f}us{rate:>12.0f}/s")
+
+
+async def main(requests: int, concurrency: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path = Path(directory) / "cerbos.sock"
+        server = grpc.aio.server()
+        svc_pb2_grpc.add_CerbosServiceServicer_to_server(StandInPDP(), server)
+        port = server.add_insecure_port("127.0.0.1:0")
+        server.add_insecure_port(f"unix://{socket_path}")
+        await server.start()
+
+        options = ChannelOptions(keepalive_time=30).grpc_options()
+        targets = {"tcp": f"127.0.0.1:{port}", "uds": f"unix://{socket_path}"}
+        print(f"{'transport':<24}{'p50':>12}{'p99':>12}{'throughput':>14}")
+        try:
+            for name, target in targets.items():
+                client = AsyncCerbosClient(target, channel_options=options)
+                await client.server_info()
+                await _measure(client, 200, 1)  # warm up the channel
+                for workers in (1, concurrency):
+                    started = time.perf_counter()
+                    latencies = await _measure(client, requests, workers)
+                    elapsed = time.perf_counter() - started
+                    _report(f"{name} (concurrency {workers})", latencies, elapsed)
+                await client.close()
+        finally:
+            await server.stop(None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
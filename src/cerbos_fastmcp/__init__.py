@@ -2,15 +2,73 @@
 
 from importlib import metadata as _metadata
 
+from .audit import AuditRecord, AuditSink, AuditStats, JsonlAuditWriter
+from .cache import CacheStats
+from .channel import ChannelOptions
+from .enrichment import PrincipalAttributeLoader, PrincipalEnricher
+from .executor import ExecutorSaturatedError, ExecutorStats, PrincipalBuilderExecutor
+from .limits import ArgumentLimitError, ArgumentLimits, ArgumentLimitStats
+from .local_engine import LocalEngineStats, LocalPolicyEngine
+from .metrics import AuthorizationMetrics, OpenTelemetryMetrics, PrometheusMetrics
 from .middleware import (
     CerbosAuthorizationMiddleware,
+    DecisionCache,
     PrincipalBuilder,
+    PrincipalCache,
+    ToolListCache,
+    WarmUpReport,
 )
+from .pool import CerbosClientPool, EndpointStatus, PoolStats
+from .query_plan import PlannedResource, QueryPlan, UnsupportedPlanError, get_query_plan
+from .resilience import (
+    CircuitBreaker,
+    CircuitBreakerStats,
+    CircuitOpenError,
+    ResiliencePolicy,
+    ResilienceStats,
+)
+from .tracing import AuthorizationTracing
 
 __all__ = [
+    "ArgumentLimitError",
+    "ArgumentLimitStats",
+    "ArgumentLimits",
+    "AuditRecord",
+    "AuditSink",
+    "AuditStats",
+    "AuthorizationMetrics",
+    "AuthorizationTracing",
+    "CacheStats",
     "CerbosAuthorizationMiddleware",
+    "CerbosClientPool",
+    "ChannelOptions",
+    "CircuitBreaker",
+    "CircuitBreakerStats",
+    "CircuitOpenError",
+    "DecisionCache",
+    "EndpointStatus",
+    "ExecutorSaturatedError",
+    "ExecutorStats",
+    "JsonlAuditWriter",
+    "LocalEngineStats",
+    "LocalPolicyEngine",
+    "OpenTelemetryMetrics",
+    "PlannedResource",
+    "PoolStats",
+    "PrincipalAttributeLoader",
     "PrincipalBuilder",
+    "PrincipalBuilderExecutor",
+    "PrincipalCache",
+    "PrincipalEnricher",
+    "PrometheusMetrics",
+    "QueryPlan",
+    "ResiliencePolicy",
+    "ResilienceStats",
+    "ToolListCache",
+    "UnsupportedPlanError",
+    "WarmUpReport",
     "__version__",
+    "get_query_plan",
 ]
 
 try:  # pragma: no cover - used for packaging metadata
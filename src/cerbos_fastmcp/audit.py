@@ -0,0 +1,215 @@
+"""Asynchronous, batched audit logging of authorization decisions."""
+
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import inspect
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Literal, Optional, Sequence, Union
+
+from fastmcp.utilities import logging
+
+logger = logging.get_logger("cerbos_middleware.audit")
+
+
+@dataclass(frozen=True)
+class AuditRecord:
+    """One authorization decision.
+
+    ``source`` is ``local``, ``cache``, ``stale``, ``snapshot`` (a ``tools/list`` snapshot),
+    or ``pdp``. ``outputs`` holds the rule outputs returned by the PDP as
+    ``{"src": ..., "val": ...}`` mappings; decisions answered locally or from a cache have
+    none. ``latency_ms`` is measured from the start of the
+    check to the decision.
+    """
+
+    timestamp: float
+    principal_id: str
+    action: str
+    resource_kind: str
+    resource_id: str
+    effect: str
+    source: str
+    latency_ms: float
+    outputs: tuple[dict[str, Any], ...] = ()
+
+    def to_dict(self) -> dict[str, Any]:
+        return dataclasses.asdict(self)
+
+
+AuditWriter = Callable[[Sequence[AuditRecord]], Union[Awaitable[None], None]]
+
+
+@dataclass
+class AuditStats:
+    """Counters describing what happened to submitted audit records."""
+
+    submitted: int = 0
+    written: int = 0
+    dropped: int = 0
+    failed: int = 0
+
+
+class AuditSink:
+    """Queue decision records in memory and write them in batches from a background task.
+
+    ``writer`` receives each batch and may be a plain function or a coroutine function;
+    ``JsonlAuditWriter`` appends to a rotating JSONL file. At most ``max_queue`` records
+    wait in memory. When the queue is full, ``on_full="drop"`` discards the new record
+    and counts it in ``stats.dropped``, while ``on_full="block"`` makes the request wait
+    for space. A batch is written once ``batch_size`` records are waiting or
+    ``flush_interval`` seconds after its first record, whichever comes first.
+
+    The background task starts with the first record. Call ``aclose()`` (or close the
+    middleware) to write what is left in the queue.
+    """
+
+    def __init__(
+        self,
+        writer: AuditWriter,
+        *,
+        max_queue: int = 10_000,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        on_full: Literal["drop", "block"] = "drop",
+    ) -> None:
+        if max_queue < 1:
+            raise ValueError("max_queue must be a positive integer")
+        if batch_size < 1:
+            raise ValueError("batch_size must be a positive integer")
+        if flush_interval < 0:
+            raise ValueError("flush_interval must not be negative")
+        if on_full not in ("drop", "block"):
+            raise ValueError("on_full must be 'drop' or 'block'")
+
+        self._writer = writer
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._block = on_full == "block"
+        self._queue: asyncio.Queue[AuditRecord] = asyncio.Queue(max_queue)
+        self._task: Optional[asyncio.Task[None]] = None
+        # The batch being assembled and the write in progress, finished by aclose()
+        self._pending: list[AuditRecord] = []
+        self._writing: Optional[asyncio.Future[None]] = None
+        self._closed = False
+        self.stats = AuditStats()
+
+    async def submit(self, record: AuditRecord) -> None:
+        """Queue ``record`` for writing, applying the ``on_full`` policy."""
+        if self._closed:
+            self.stats.dropped += 1
+            return
+        self.stats.submitted += 1
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        if self._block:
+            await self._queue.put(record)
+            return
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self.stats.dropped += 1
+
+    async def aclose(self) -> None:
+        """Stop accepting records and write the ones still queued."""
+        self._closed = True
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if self._writing is not None:
+            await self._writing
+        if self._pending:
+            batch, self._pending = self._pending, []
+            await self._write(batch)
+        while not self._queue.empty():
+            batch = [self._queue.get_nowait()]
+            while len(batch) < self._batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            await self._write(batch)
+
+    async def _run(self) -> None:
+        queue = self._queue
+        while True:
+            self._pending = [await queue.get()]
+            if self._flush_interval:
+                # Give concurrent requests until the interval ends to fill the batch
+                try:
+                    async with asyncio.timeout(self._flush_interval):
+                        while len(self._pending) < self._batch_size:
+                            self._pending.append(await queue.get())
+                except TimeoutError:
+                    pass
+            while len(self._pending) < self._batch_size and not queue.empty():
+                self._pending.append(queue.get_nowait())
+            batch, self._pending = self._pending, []
+            self._writing = asyncio.ensure_future(self._write(batch))
+            await asyncio.shield(self._writing)
+
+    async def _write(self, batch: list[AuditRecord]) -> None:
+        try:
+            result = self._writer(batch)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as exc:
+            logger.exception("Audit writer failed", exc_info=exc)
+            self.stats.failed += len(batch)
+        else:
+            self.stats.written += len(batch)
+
+
+class JsonlAuditWriter:
+    """Append audit records to a JSON Lines file, rotating it by size.
+
+    When ``max_bytes`` is set and the next batch would grow the file past it, the file
+    is renamed to ``<path>.1`` (shifting older backups up to ``backup_count``) and a new
+    file is started, like ``logging.handlers.RotatingFileHandler``. Files are written
+    from a worker thread so the event loop never blocks on disk I/O.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        *,
+        max_bytes: int = 0,
+        backup_count: int = 5,
+    ) -> None:
+        if max_bytes < 0:
+            raise ValueError("max_bytes must not be negative")
+        if backup_count < 0:
+            raise ValueError("backup_count must not be negative")
+        self.path = Path(path)
+        self._max_bytes = max_bytes
+        self._backup_count = backup_count
+
+    async def __call__(self, records: Sequence[AuditRecord]) -> None:
+        data = "".join(
+            json.dumps(record.to_dict(), separators=(",", ":"), default=str) + "\n"
+            for record in records
+        ).encode("utf-8")
+        await asyncio.to_thread(self._append, data)
+
+    def _append(self, data: bytes) -> None:
+        if self._max_bytes and self.path.exists():
+            size = self.path.stat().st_size
+            if size and size + len(data) > self._max_bytes:
+                self._rotate()
+        with self.path.open("ab") as handle:
+            handle.write(data)
+
+    def _rotate(self) -> None:
+        if self._backup_count == 0:
+            self.path.unlink()
+            return
+        for index in range(self._backup_count - 1, 0, -1):
+            source = self.path.with_name(f"{self.path.name}.{index}")
+            if source.exists():
+                source.replace(self.path.with_name(f"{self.path.name}.{index + 1}"))
+        self.path.replace(self.path.with_name(f"{self.path.name}.1"))
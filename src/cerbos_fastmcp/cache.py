@@ -0,0 +1,79 @@
+"""Bounded TTL caches shared by the middleware's decision, principal, and attribute caches."""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Generic, Hashable, Optional, TypeVar
+
+_T = TypeVar("_T")
+
+
+@dataclass
+class CacheStats:
+    """Counters describing the effectiveness of a cache."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    stale_hits: int = 0
+
+
+class _TTLCache(Generic[_T]):
+    """Bounded mapping whose entries expire after a TTL, evicting least recently used."""
+
+    def __init__(self, ttl: float, max_entries: int) -> None:
+        if ttl <= 0:
+            raise ValueError("ttl must be greater than zero")
+        if max_entries < 1:
+            raise ValueError("max_entries must be a positive integer")
+
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._entries: OrderedDict[Hashable, tuple[float, _T]] = OrderedDict()
+        # Seconds an expired entry is kept for _lookup_stale()
+        self._grace = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def _lookup(self, key: Hashable) -> Optional[_T]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+
+        expires_at, value = entry
+        now = time.monotonic()
+        if expires_at <= now:
+            if expires_at + self._grace <= now:
+                del self._entries[key]
+            self.stats.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    def _lookup_stale(self, key: Hashable) -> Optional[_T]:
+        """Return an expired entry that is still within the grace period."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if not expires_at <= time.monotonic() < expires_at + self._grace:
+            return None
+        self.stats.stale_hits += 1
+        return value
+
+    def _store(self, key: Hashable, value: _T, ttl: Optional[float] = None) -> None:
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
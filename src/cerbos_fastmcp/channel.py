@@ -0,0 +1,114 @@
+"""gRPC channel settings for connections to the Cerbos PDP."""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from typing import Any, Callable, Literal, Mapping, Optional
+
+import grpc
+
+_COMPRESSION = {
+    "none": grpc.Compression.NoCompression,
+    "deflate": grpc.Compression.Deflate,
+    "gzip": grpc.Compression.Gzip,
+}
+
+
+def _env_bool(value: str) -> bool:
+    if value.lower() in {"1", "true", "yes", "on"}:
+        return True
+    if value.lower() in {"0", "false", "no", "off"}:
+        return False
+    raise ValueError(value)
+
+
+# Environment variable and parser for each field, read by ChannelOptions.from_env()
+_ENV: dict[str, tuple[str, Callable[[str], Any]]] = {
+    "keepalive_time": ("CERBOS_GRPC_KEEPALIVE_TIME", float),
+    "keepalive_timeout": ("CERBOS_GRPC_KEEPALIVE_TIMEOUT", float),
+    "keepalive_without_calls": ("CERBOS_GRPC_KEEPALIVE_WITHOUT_CALLS", _env_bool),
+    "max_message_size": ("CERBOS_GRPC_MAX_MESSAGE_SIZE", int),
+    "compression": ("CERBOS_GRPC_COMPRESSION", str.lower),
+    "initial_window_size": ("CERBOS_GRPC_INITIAL_WINDOW_SIZE", int),
+    "max_frame_size": ("CERBOS_GRPC_MAX_FRAME_SIZE", int),
+}
+
+
+@dataclass(frozen=True)
+class ChannelOptions:
+    """Tuning for the gRPC channels opened to the PDP.
+
+    Options left as ``None`` keep gRPC's defaults:
+
+    - ``keepalive_time`` and ``keepalive_timeout``: seconds between HTTP/2 pings on an
+      idle connection, and how long to wait for the reply before reconnecting;
+      ``keepalive_without_calls`` also pings while no request is in flight;
+    - ``max_message_size``: maximum request and response size in bytes;
+    - ``compression``: ``"gzip"``, ``"deflate"``, or ``"none"``;
+    - ``initial_window_size``: HTTP/2 stream window in bytes. Setting it turns off
+      gRPC's bandwidth-delay probing, which otherwise sizes the window automatically;
+    - ``max_frame_size``: largest HTTP/2 frame in bytes;
+    - ``extra``: any other gRPC channel arguments, which take precedence.
+
+    The PDP's address is not set here: pass ``unix:///path/to/cerbos.sock`` as the host
+    to reach a sidecar over a Unix domain socket.
+    """
+
+    keepalive_time: Optional[float] = None
+    keepalive_timeout: Optional[float] = None
+    keepalive_without_calls: Optional[bool] = None
+    max_message_size: Optional[int] = None
+    compression: Optional[Literal["gzip", "deflate", "none"]] = None
+    initial_window_size: Optional[int] = None
+    max_frame_size: Optional[int] = None
+    extra: Mapping[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        for name in ("keepalive_time", "keepalive_timeout"):
+            value = getattr(self, name)
+            if value is not None and value <= 0:
+                raise ValueError(f"{name} must be greater than zero")
+        for name in ("max_message_size", "initial_window_size", "max_frame_size"):
+            value = getattr(self, name)
+            if value is not None and value < 1:
+                raise ValueError(f"{name} must be a positive integer")
+        if self.compression is not None and self.compression not in _COMPRESSION:
+            raise ValueError("compression must be 'gzip', 'deflate', or 'none'")
+
+    @classmethod
+    def from_env(cls, environ: Optional[Mapping[str, str]] = None) -> ChannelOptions:
+        """Read options from ``CERBOS_GRPC_*`` environment variables."""
+        environ = os.environ if environ is None else environ
+        values: dict[str, Any] = {}
+        for name, (variable, parse) in _ENV.items():
+            raw = environ.get(variable, "").strip()
+            if not raw:
+                continue
+            try:
+                values[name] = parse(raw)
+            except ValueError as exc:
+                raise ValueError(f"Invalid value for {variable}: {raw!r}") from exc
+        return cls(**values)
+
+    def grpc_options(self) -> dict[str, Any]:
+        """Return the options as gRPC channel arguments."""
+        options: dict[str, Any] = {}
+        if self.keepalive_time is not None:
+            options["grpc.keepalive_time_ms"] = int(self.keepalive_time * 1000)
+        if self.keepalive_timeout is not None:
+            options["grpc.keepalive_timeout_ms"] = int(self.keepalive_timeout * 1000)
+        if self.keepalive_without_calls is not None:
+            options["grpc.keepalive_permit_without_calls"] = int(self.keepalive_without_calls)
+        if self.max_message_size is not None:
+            options["grpc.max_send_message_length"] = self.max_message_size
+            options["grpc.max_receive_message_length"] = self.max_message_size
+        if self.compression is not None:
+            options["grpc.default_compression_algorithm"] = int(_COMPRESSION[self.compression])
+        if self.initial_window_size is not None:
+            options["grpc.http2.lookahead_bytes"] = self.initial_window_size
+            options["grpc.http2.bdp_probe"] = 0
+        if self.max_frame_size is not None:
+            options["grpc.http2.max_frame_size"] = self.max_frame_size
+        options.update(self.extra)
+        return options
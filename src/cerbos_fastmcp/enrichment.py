@@ -0,0 +1,156 @@
+"""Principal attributes loaded in batches from an external source, such as a directory."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import replace
+from typing import Any, Awaitable, Callable, Mapping, Optional, Sequence
+
+from cerbos.sdk.model import Principal
+
+from .cache import CacheStats, _TTLCache
+
+# Receives a batch of principals, returns the attributes found for each principal ID
+PrincipalAttributeLoader = Callable[
+    [Sequence[Principal]],
+    Awaitable[Mapping[str, Mapping[str, Any]]],
+]
+
+
+class PrincipalEnricher:
+    """Add attributes looked up in bulk, for example from a directory, to built principals.
+
+    Principals built by concurrent requests are collected for up to ``batch_window``
+    seconds, or until ``max_batch_size`` are waiting, and passed to ``load`` together.
+    ``load`` returns a mapping from principal ID to the attributes to add to that
+    principal's ``attr``; they replace token attributes of the same name. Requests for an
+    ID that is already being loaded wait for that load instead of starting another.
+
+    Results are cached per principal ID for ``ttl`` seconds. IDs missing from the result
+    are cached as having no extra attributes for ``negative_ttl`` seconds, so unknown
+    principals do not trigger a lookup per request. If ``load`` raises or returns
+    something other than a mapping of mappings, every request in the batch fails and
+    nothing is cached; the next request for those IDs calls ``load`` again.
+    """
+
+    def __init__(
+        self,
+        load: PrincipalAttributeLoader,
+        *,
+        batch_window: float = 0.005,
+        max_batch_size: int = 100,
+        ttl: float = 300.0,
+        negative_ttl: float = 30.0,
+        max_entries: int = 10_000,
+    ) -> None:
+        if batch_window < 0:
+            raise ValueError("batch_window must not be negative")
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be a positive integer")
+        if negative_ttl < 0:
+            raise ValueError("negative_ttl must not be negative")
+
+        self.negative_ttl = negative_ttl
+        self._cache: _TTLCache[Mapping[str, Any]] = _TTLCache(ttl, max_entries)
+        self._load = load
+        self._window = batch_window
+        self._max_size = max_batch_size
+        # Principals waiting for the next batch, and every load not yet finished, by ID
+        self._pending: dict[str, Principal] = {}
+        self._inflight: dict[str, asyncio.Future[Mapping[str, Any]]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    @property
+    def stats(self) -> CacheStats:
+        return self._cache.stats
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def get(self, principal_id: str) -> Optional[Mapping[str, Any]]:
+        return self._cache._lookup(principal_id)
+
+    async def fetch(self, principal: Principal) -> Mapping[str, Any]:
+        """Load the attributes for ``principal`` in the next batch."""
+        future = self._inflight.get(principal.id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            # Mark the exception as retrieved when every waiter was cancelled
+            future.add_done_callback(lambda done: done.cancelled() or done.exception())
+            self._inflight[principal.id] = future
+            self._pending[principal.id] = principal
+            if len(self._pending) >= self._max_size:
+                self.flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self._window, self.flush)
+        return await asyncio.shield(future)
+
+    async def enrich(self, principal: Principal) -> Principal:
+        """Return ``principal`` with its cached or loaded attributes added."""
+        attributes = self.get(principal.id)
+        if attributes is None:
+            attributes = await self.fetch(principal)
+        return _with_attributes(principal, attributes)
+
+    def flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        task = asyncio.ensure_future(self._dispatch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def aclose(self) -> None:
+        self.flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _dispatch(self, batch: dict[str, Principal]) -> None:
+        results: dict[str, Mapping[str, Any]] = {}
+        error: Optional[Exception] = None
+        try:
+            found = await self._load(list(batch.values()))
+            if not isinstance(found, Mapping):
+                raise TypeError(f"principal attribute loader returned {type(found).__name__}")
+            for principal_id in batch:
+                attributes = found.get(principal_id)
+                if attributes is not None and not isinstance(attributes, Mapping):
+                    raise TypeError(
+                        f"principal attribute loader returned {type(attributes).__name__} "
+                        f"for {principal_id!r}"
+                    )
+                results[principal_id] = {} if attributes is None else dict(attributes)
+
+            for principal_id, attributes in results.items():
+                if found.get(principal_id) is not None:
+                    self._cache._store(principal_id, attributes)
+                elif self.negative_ttl:
+                    self._cache._store(principal_id, attributes, self.negative_ttl)
+        except Exception as exc:
+            error = exc
+        finally:
+            # Answer every waiter, so no ID is left in flight with nobody to resolve it
+            for principal_id in batch:
+                future = self._inflight.pop(principal_id)
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                elif principal_id in results:
+                    future.set_result(results[principal_id])
+                else:
+                    future.cancel()
+
+
+def _with_attributes(principal: Principal, attributes: Mapping[str, Any]) -> Principal:
+    if not attributes:
+        return principal
+    return replace(principal, attr={**principal.attr, **attributes})
@@ -10,7 +10,15 @@ from fastmcp.server.auth.providers.jwt import StaticTokenVerifier
 from fastmcp.server.dependencies import AccessToken
 from mcp import ErrorData, McpError
 
-from cerbos_fastmcp import CerbosAuthorizationMiddleware
+from cerbos_fastmcp import CerbosAuthorizationMiddleware, PlannedResource, get_query_plan
+
+# Rows returned by get_sales_data, filtered with the caller's Cerbos query plan
+SALES_RECORDS = [
+    {"id": "S-1001", "region": "NA", "amount": 12_500},
+    {"id": "S-1002", "region": "EMEA", "amount": 8_200},
+    {"id": "S-1003", "region": "APAC", "amount": 15_900},
+    {"id": "S-1004", "region": "EMEA", "amount": 4_300},
+]
 
 
 def _build_static_verifier() -> StaticTokenVerifier:
@@ -75,6 +83,8 @@ def create_example_server() -> FastMCP:
             cerbos_host="localhost:3593",
             principal_builder=_principal_builder,
             resource_kind="mcp_server",
+            tool_query_plans={"get_sales_data": PlannedResource("sales_record")},
+            authorize_reads=True,
         )
     )
 
@@ -83,8 +93,9 @@ def create_example_server() -> FastMCP:
         return f"Hello, {name}!"
 
     @mcp.tool(description="Retrieve sales data")
-    def get_sales_data(region: str) -> str:
-        return f"This is the sales data for {region}!"
+    def get_sales_data(region: str) -> list[dict]:
+        records = [record for record in SALES_RECORDS if record["region"] == region]
+        return get_query_plan().filter(records)
 
     @mcp.tool(description="Retrieve engineering data")
     def get_engineering_data(region: str) -> str:
@@ -0,0 +1,118 @@
+"""A bounded thread pool for principal builders that block."""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, TypeVar
+
+_T = TypeVar("_T")
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised instead of queueing a call when ``max_pending`` calls are already waiting."""
+
+
+@dataclass
+class ExecutorStats:
+    """Counters describing calls sent to a ``PrincipalBuilderExecutor``."""
+
+    submitted: int = 0
+    rejected: int = 0
+    timeouts: int = 0
+
+
+class PrincipalBuilderExecutor:
+    """Run synchronous principal builders on a dedicated pool of worker threads.
+
+    At most ``max_workers`` builders run at once; further calls wait in the pool's queue.
+    With ``max_pending`` set, a call arriving while that many are already waiting fails
+    immediately with ``ExecutorSaturatedError`` instead. ``timeout`` bounds the seconds a
+    call may spend queued and running. A timed out call that has not started is dropped
+    from the queue; one that has started keeps its thread until the builder returns,
+    since Python threads cannot be interrupted.
+
+    ``pending`` and ``running`` report the current queue depth and busy threads. The
+    threads start with the first call; call ``close()`` when done.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        *,
+        max_pending: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be a positive integer")
+        if max_pending is not None and max_pending < 0:
+            raise ValueError("max_pending must not be negative")
+        if timeout is not None and timeout <= 0:
+            raise ValueError("timeout must be greater than zero")
+
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.stats = ExecutorStats()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Updated from worker threads as calls start and finish
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+
+    @property
+    def pending(self) -> int:
+        """Calls waiting for a worker thread."""
+        return self._pending
+
+    @property
+    def running(self) -> int:
+        """Calls currently running on a worker thread."""
+        return self._running
+
+    async def run(self, func: Callable[..., _T], *args: Any) -> _T:
+        """Call ``func(*args)`` on a worker thread and wait for its result."""
+        if self.max_pending is not None and self._pending >= self.max_pending:
+            self.stats.rejected += 1
+            raise ExecutorSaturatedError("principal builder queue is full")
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                self.max_workers, thread_name_prefix="cerbos-principal-builder"
+            )
+
+        with self._lock:
+            self._pending += 1
+        self.stats.submitted += 1
+        # Builders see the request's context variables, as they would on the event loop
+        context = contextvars.copy_context()
+        future = self._executor.submit(self._call, context, func, args)
+        try:
+            async with asyncio.timeout(self.timeout):
+                return await asyncio.wrap_future(future)
+        except TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            # cancel() only succeeds for calls that never started, so _call did not count them
+            if future.cancel():
+                with self._lock:
+                    self._pending -= 1
+
+    def close(self) -> None:
+        """Drop queued calls and release the threads once running calls finish."""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _call(self, context: contextvars.Context, func: Callable[..., _T], args: Any) -> _T:
+        with self._lock:
+            self._pending -= 1
+            self._running += 1
+        try:
+            return context.run(func, *args)
+        finally:
+            with self._lock:
+                self._running -= 1
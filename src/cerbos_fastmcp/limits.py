@@ -0,0 +1,134 @@
+"""Size limits for tool arguments sent to the Cerbos PDP."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Any, Literal, Mapping, Optional
+
+
+class ArgumentLimitError(ValueError):
+    """Raised when tool arguments exceed a limit configured with ``on_exceed="reject"``."""
+
+
+@dataclass
+class ArgumentLimitStats:
+    """Counters describing how often argument limits were applied."""
+
+    truncated_calls: int = 0
+    truncated_values: int = 0
+    rejected_calls: int = 0
+
+
+@dataclass
+class ArgumentLimits:
+    """Bounds on the tool arguments included in ``R.attr.arguments``.
+
+    Any limit left as ``None`` is not enforced:
+
+    - ``max_depth``: maximum container nesting, counting the arguments map itself as 1;
+    - ``max_bytes``: maximum UTF-8 size of a single string or bytes value;
+    - ``max_list_length``: maximum number of items in a single list or tuple.
+
+    With the default ``on_exceed="reject"`` a call exceeding any limit is refused. With
+    ``on_exceed="truncate"`` each oversize value is replaced by a summary
+    ``{"truncated": <reason>, "type": ..., "length": ..., "sha256": ...}``, which a
+    condition written for the original value, such as a DENY on
+    ``R.attr.arguments.sql.contains("DROP")``, no longer matches; only truncate
+    arguments no policy inspects. Only the copy sent to the PDP is changed, never the
+    arguments passed to the tool.
+    """
+
+    max_depth: Optional[int] = None
+    max_bytes: Optional[int] = None
+    max_list_length: Optional[int] = None
+    on_exceed: Literal["truncate", "reject"] = "reject"
+    stats: ArgumentLimitStats = field(default_factory=ArgumentLimitStats, compare=False)
+
+    def __post_init__(self) -> None:
+        for name in ("max_depth", "max_bytes", "max_list_length"):
+            limit = getattr(self, name)
+            if limit is not None and limit < 1:
+                raise ValueError(f"{name} must be a positive integer")
+        if self.on_exceed not in ("truncate", "reject"):
+            raise ValueError("on_exceed must be 'truncate' or 'reject'")
+
+    def apply(self, arguments: Mapping[str, Any]) -> Mapping[str, Any]:
+        """Return ``arguments`` with oversize values summarized.
+
+        Raises ``ArgumentLimitError`` when ``on_exceed="reject"`` and a limit is exceeded.
+        The original mapping is returned unchanged when every value is within limits.
+        """
+        truncated = [0]
+        try:
+            limited = self._limit(arguments, 1, truncated)
+        except ArgumentLimitError:
+            self.stats.rejected_calls += 1
+            raise
+
+        if not truncated[0]:
+            return arguments
+        self.stats.truncated_calls += 1
+        self.stats.truncated_values += truncated[0]
+        return limited
+
+    def _limit(self, value: Any, depth: int, truncated: list[int]) -> Any:
+        if isinstance(value, str):
+            if self.max_bytes is not None and len(value) > self.max_bytes // 4:
+                # Only encode strings that could plausibly exceed the limit
+                size = len(value.encode("utf-8"))
+                if size > self.max_bytes:
+                    return self._exceeded(value, "max_bytes", size, truncated)
+            return value
+
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            if self.max_bytes is not None and len(value) > self.max_bytes:
+                return self._exceeded(value, "max_bytes", len(value), truncated)
+            return value
+
+        if isinstance(value, Mapping):
+            if self.max_depth is not None and depth > self.max_depth:
+                return self._exceeded(value, "max_depth", len(value), truncated)
+            items = {key: self._limit(item, depth + 1, truncated) for key, item in value.items()}
+            if all(items[key] is item for key, item in value.items()):
+                return value
+            return items
+
+        if isinstance(value, (list, tuple)):
+            if self.max_depth is not None and depth > self.max_depth:
+                return self._exceeded(value, "max_depth", len(value), truncated)
+            if self.max_list_length is not None and len(value) > self.max_list_length:
+                return self._exceeded(value, "max_list_length", len(value), truncated)
+            items = [self._limit(item, depth + 1, truncated) for item in value]
+            if all(new is old for new, old in zip(items, value)):
+                return value
+            return items
+
+        return value
+
+    def _exceeded(self, value: Any, reason: str, length: int, truncated: list[int]) -> Any:
+        if self.on_exceed == "reject":
+            raise ArgumentLimitError(f"Tool argument exceeds {reason}")
+        truncated[0] += 1
+        return {
+            "truncated": reason,
+            "type": type(value).__name__,
+            "length": length,
+            "sha256": _digest(value),
+        }
+
+
+def _digest(value: Any) -> str:
+    if isinstance(value, str):
+        data = value.encode("utf-8")
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        data = bytes(value)
+    else:
+        try:
+            data = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode(
+                "utf-8"
+            )
+        except TypeError:
+            data = repr(value).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
@@ -0,0 +1,332 @@
+"""In-process evaluation of unconditional Cerbos resource policy rules."""
+
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Mapping, Optional
+
+from cerbos.sdk.model import Principal, Resource
+
+EFFECT_ALLOW = "EFFECT_ALLOW"
+
+_POLICY_SUFFIXES = {".yaml", ".yml", ".json"}
+
+AttributePath = tuple[str, ...]
+
+_RESOURCE_ATTR = re.compile(r"\b(?:R|request\.resource)\.attr\b")
+_FIELD_SELECTOR = re.compile(r"\s*\.\s*([A-Za-z_][A-Za-z0-9_]*)")
+_INDEX_SELECTOR = re.compile(r"""\s*\[\s*(?:"([^"\\]*)"|'([^'\\]*)')\s*\]""")
+
+
+@dataclass(frozen=True)
+class _DerivedRole:
+    name: str
+    parent_roles: frozenset[str]
+    conditional: bool
+
+
+@dataclass(frozen=True)
+class _Rule:
+    actions: frozenset[str]
+    roles: frozenset[str]
+    derived_roles: frozenset[str]
+    allow: bool
+    conditional: bool
+
+
+@dataclass
+class _ResourcePolicy:
+    kind: str
+    version: str
+    rules: list[_Rule]
+    imports: list[str]
+    derived_roles: dict[str, _DerivedRole] = field(default_factory=dict)
+    # ``None`` when an expression uses ``R.attr`` in a way that cannot be narrowed
+    attribute_paths: Optional[frozenset[AttributePath]] = frozenset()
+
+
+@dataclass
+class LocalEngineStats:
+    """Counters describing how often the local engine could answer a check."""
+
+    decided: int = 0
+    fallbacks: int = 0
+
+
+class LocalPolicyEngine:
+    """Answer unconditional role/action rules from Cerbos resource policies in process.
+
+    Only checks whose outcome does not depend on a CEL condition are decided locally:
+
+    - an unconditional ``EFFECT_DENY`` rule matching the action and one of the principal's
+      roles (or an unconditional derived role) denies the request;
+    - otherwise an unconditional ``EFFECT_ALLOW`` rule allows it, provided no conditional
+      rule could also apply;
+    - if no rule matches at all the request is denied, as the PDP would.
+
+    Everything else returns ``None`` so the caller can ask the PDP: conditional rules or
+    derived roles, action globs other than ``*``, scoped requests, resource kinds or
+    policy versions without a local policy, principals that have principal policies, and
+    any role policies in the directory.
+    """
+
+    def __init__(
+        self,
+        resource_policies: Iterable[_ResourcePolicy],
+        *,
+        principal_policy_ids: Iterable[str] = (),
+        has_role_policies: bool = False,
+    ) -> None:
+        self._policies = {(policy.kind, policy.version): policy for policy in resource_policies}
+        self._principal_policy_ids = frozenset(principal_policy_ids)
+        self._has_role_policies = has_role_policies
+        self.stats = LocalEngineStats()
+
+    @classmethod
+    def from_directory(cls, path: str | os.PathLike[str]) -> LocalPolicyEngine:
+        """Load resource policies, derived roles, and principal policy IDs from ``path``.
+
+        The directory layout matches the Cerbos disk storage driver: ``_schemas``,
+        ``testdata`` directories, hidden files, and ``*_test`` suites are skipped.
+        Requires PyYAML (``pip install 'cerbos-fastmcp[local]'``).
+        """
+        try:
+            import yaml
+        except ImportError as exc:  # pragma: no cover - depends on installed extras
+            raise ImportError(
+                "LocalPolicyEngine requires PyYAML. Install with `pip install 'cerbos-fastmcp[local]'`."
+            ) from exc
+
+        root = Path(path)
+        if not root.is_dir():
+            raise ValueError(f"Policy directory does not exist: {root}")
+
+        resource_policies: list[_ResourcePolicy] = []
+        derived_roles: dict[str, dict[str, _DerivedRole]] = {}
+        principal_policy_ids: set[str] = set()
+        has_role_policies = False
+        # Expressions outside resource policies may also read resource attributes
+        shared_paths: Optional[set[AttributePath]] = set()
+
+        for policy_file in _policy_files(root):
+            with policy_file.open("r", encoding="utf-8") as handle:
+                documents = list(yaml.safe_load_all(handle))
+            for document in documents:
+                if not isinstance(document, Mapping) or document.get("disabled"):
+                    continue
+                if "resourcePolicy" in document:
+                    policy = _parse_resource_policy(document["resourcePolicy"])
+                    if policy is not None:
+                        policy.attribute_paths = _attribute_paths(document)
+                        resource_policies.append(policy)
+                    continue
+
+                paths = _attribute_paths(document)
+                if paths is None or shared_paths is None:
+                    shared_paths = None
+                else:
+                    shared_paths |= paths
+
+                if "derivedRoles" in document:
+                    name, definitions = _parse_derived_roles(document["derivedRoles"])
+                    derived_roles[name] = definitions
+                elif "principalPolicy" in document:
+                    principal_policy_ids.add(str(document["principalPolicy"]["principal"]))
+                elif "rolePolicy" in document:
+                    has_role_policies = True
+
+        for policy in resource_policies:
+            for name in policy.imports:
+                if name not in derived_roles:
+                    raise ValueError(
+                        f"Resource policy {policy.kind}:{policy.version} imports unknown "
+                        f"derived roles '{name}'"
+                    )
+                policy.derived_roles.update(derived_roles[name])
+            if policy.attribute_paths is None or shared_paths is None:
+                policy.attribute_paths = None
+            else:
+                policy.attribute_paths = policy.attribute_paths | shared_paths
+
+        return cls(
+            resource_policies,
+            principal_policy_ids=principal_policy_ids,
+            has_role_policies=has_role_policies,
+        )
+
+    def attribute_paths(
+        self, kind: str, policy_version: str = "default"
+    ) -> Optional[frozenset[AttributePath]]:
+        """Return the ``R.attr`` paths the policies for ``kind`` can read.
+
+        Paths are found by statically scanning every expression in the resource policy
+        and in the derived roles, exported variables, and other policies in the directory.
+        A path such as ``("arguments", "region")`` stands for that value and everything
+        below it. Returns ``None`` when there is no local policy for ``kind`` or when an
+        expression uses ``R.attr`` in a way that cannot be narrowed, such as passing the
+        whole map or indexing it with a computed key.
+        """
+        policy = self._policies.get((kind, policy_version or "default"))
+        if policy is None:
+            return None
+        return policy.attribute_paths
+
+    def check(self, principal: Principal, action: str, resource: Resource) -> Optional[bool]:
+        """Return the local decision for ``action``, or ``None`` if the PDP must decide."""
+        decision = self._evaluate(principal, action, resource)
+        if decision is None:
+            self.stats.fallbacks += 1
+        else:
+            self.stats.decided += 1
+        return decision
+
+    def _evaluate(self, principal: Principal, action: str, resource: Resource) -> Optional[bool]:
+        if principal.scope or resource.scope or self._has_role_policies:
+            return None
+        if principal.id in self._principal_policy_ids:
+            return None
+
+        policy = self._policies.get((resource.kind, resource.policy_version or "default"))
+        if policy is None:
+            return None
+
+        roles = frozenset(principal.roles)
+        allowed = False
+        undecided = False
+        for rule in policy.rules:
+            action_match = _match_action(rule.actions, action)
+            if action_match is False:
+                continue
+            role_match = _match_roles(rule, roles, policy.derived_roles)
+            if role_match is False:
+                continue
+
+            certain = action_match is True and role_match is True and not rule.conditional
+            if not rule.allow and certain:
+                return False
+            if certain:
+                allowed = True
+            else:
+                undecided = True
+
+        if undecided:
+            return None
+        return allowed
+
+
+def _policy_files(root: Path) -> Iterator[Path]:
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(
+            name
+            for name in dirnames
+            if not name.startswith(".") and name not in {"_schemas", "testdata"}
+        )
+        for filename in sorted(filenames):
+            file_path = Path(directory, filename)
+            if filename.startswith(".") or file_path.suffix not in _POLICY_SUFFIXES:
+                continue
+            if file_path.stem.endswith("_test"):
+                continue
+            yield file_path
+
+
+def _parse_resource_policy(spec: Mapping[str, Any]) -> Optional[_ResourcePolicy]:
+    # Scoped policies only apply to scoped requests, which are always sent to the PDP
+    if spec.get("scope"):
+        return None
+
+    rules = [
+        _Rule(
+            actions=frozenset(rule.get("actions") or ()),
+            roles=frozenset(rule.get("roles") or ()),
+            derived_roles=frozenset(rule.get("derivedRoles") or ()),
+            allow=rule.get("effect") == EFFECT_ALLOW,
+            conditional="condition" in rule,
+        )
+        for rule in spec.get("rules") or ()
+    ]
+    return _ResourcePolicy(
+        kind=str(spec["resource"]),
+        version=str(spec.get("version") or "default"),
+        rules=rules,
+        imports=list(spec.get("importDerivedRoles") or ()),
+    )
+
+
+def _parse_derived_roles(spec: Mapping[str, Any]) -> tuple[str, dict[str, _DerivedRole]]:
+    definitions = {
+        str(definition["name"]): _DerivedRole(
+            name=str(definition["name"]),
+            parent_roles=frozenset(definition.get("parentRoles") or ()),
+            conditional="condition" in definition,
+        )
+        for definition in spec.get("definitions") or ()
+    }
+    return str(spec["name"]), definitions
+
+
+def _attribute_paths(node: Any) -> Optional[frozenset[AttributePath]]:
+    paths: set[AttributePath] = set()
+    for text in _strings(node):
+        for match in _RESOURCE_ATTR.finditer(text):
+            path, position = [], match.end()
+            while True:
+                selector = _FIELD_SELECTOR.match(text, position) or _INDEX_SELECTOR.match(
+                    text, position
+                )
+                if selector is None:
+                    break
+                path.append(next(group for group in selector.groups() if group is not None))
+                position = selector.end()
+            # A trailing selector followed by "(" is a method call such as ``.size()``
+            if path and text[position:].lstrip().startswith("("):
+                path.pop()
+            if not path:
+                return None
+            paths.add(tuple(path))
+    return frozenset(paths)
+
+
+def _strings(node: Any) -> Iterator[str]:
+    if isinstance(node, str):
+        yield node
+    elif isinstance(node, Mapping):
+        for value in node.values():
+            yield from _strings(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _strings(value)
+
+
+def _match_action(patterns: frozenset[str], action: str) -> Optional[bool]:
+    if action in patterns or "*" in patterns:
+        return True
+    # Cerbos action globs are not evaluated locally, but an action that does not share a
+    # glob's literal prefix can never match it
+    for pattern in patterns:
+        if "*" in pattern and action.startswith(pattern.split("*", 1)[0]):
+            return None
+    return False
+
+
+def _match_roles(
+    rule: _Rule, roles: frozenset[str], derived_roles: Mapping[str, _DerivedRole]
+) -> Optional[bool]:
+    if "*" in rule.roles or rule.roles & roles:
+        return True
+
+    result: Optional[bool] = False
+    for name in rule.derived_roles:
+        definition = derived_roles.get(name)
+        if definition is None:
+            result = None
+            continue
+        if "*" not in definition.parent_roles and not definition.parent_roles & roles:
+            continue
+        if not definition.conditional:
+            return True
+        result = None
+    return result
@@ -0,0 +1,289 @@
+"""Instrumentation hooks for the authorization middleware."""
+
+from __future__ import annotations
+
+from typing import Any, Optional
+
+# Latency buckets in seconds, from in-process cache hits up to slow PDP round trips
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+
+class AuthorizationMetrics:
+    """Receives timings and counts from ``CerbosAuthorizationMiddleware``.
+
+    Every method is a no-op; subclass and override the ones you need, or use
+    ``PrometheusMetrics`` or ``OpenTelemetryMetrics``. ``method`` is the MCP method an
+    action belongs to, such as ``tools/call`` for ``tools/call::greet``.
+    """
+
+    def observe_principal_build(self, seconds: float) -> None:
+        """Time spent in ``principal_builder`` for one access token."""
+
+    def observe_principal_queue(self, depth: int) -> None:
+        """Builder calls already waiting for a worker thread when another is submitted."""
+
+    def observe_serialization(
+        self, target: str, seconds: float, method: str = "", action: str = ""
+    ) -> None:
+        """Time spent converting a ``principal`` or ``resource`` to protobuf."""
+
+    def observe_rpc(self, method: str, action: str, seconds: float) -> None:
+        """Latency of one PDP request."""
+
+    def observe_batch_size(self, size: int) -> None:
+        """Number of resources sent in one ``CheckResources`` request."""
+
+    def record_decision(self, method: str, action: str, allowed: bool, source: str) -> None:
+        """A decision, where ``source`` is ``local``, ``cache``, ``stale``, or ``pdp``."""
+
+    def record_error(self, method: str, action: str, reason: str) -> None:
+        """A failed authorization, where ``reason`` is the ``McpError`` data."""
+
+    def record_cache(self, cache: str, hit: bool) -> None:
+        """A cache lookup; ``cache`` is ``decision``, ``principal``, ``principal_attributes``,
+        or ``tool_list``.
+        """
+
+    def observe_warm_up(self, seconds: float) -> None:
+        """Duration of one ``warm_up`` run."""
+
+
+class PrometheusMetrics(AuthorizationMetrics):
+    """Record authorization metrics with ``prometheus_client``.
+
+    Requires ``prometheus-client`` (``pip install 'cerbos-fastmcp[prometheus]'``).
+    Metrics are registered in ``registry``, or the default registry when omitted. Set
+    ``action_labels=False`` to label by MCP method only, for example when resource URIs
+    would make the ``action`` label unbounded.
+    """
+
+    def __init__(
+        self,
+        registry: Optional[Any] = None,
+        *,
+        namespace: str = "cerbos_fastmcp",
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+        action_labels: bool = True,
+    ) -> None:
+        try:
+            from prometheus_client import REGISTRY, Counter, Histogram
+        except ImportError as exc:  # pragma: no cover - depends on installed extras
+            raise ImportError(
+                "PrometheusMetrics requires prometheus-client. Install with "
+                "`pip install 'cerbos-fastmcp[prometheus]'`."
+            ) from exc
+
+        registry = REGISTRY if registry is None else registry
+        self._action_labels = action_labels
+        common = {"namespace": namespace, "registry": registry}
+        self._principal_build = Histogram(
+            "principal_build_seconds",
+            "Time spent building a Cerbos principal from an access token.",
+            buckets=buckets,
+            **common,
+        )
+        self._principal_queue = Histogram(
+            "principal_build_queue_depth",
+            "Principal builder calls waiting for a worker thread at submission.",
+            buckets=(0, 1, 2, 5, 10, 20, 50, 100),
+            **common,
+        )
+        self._serialization = Histogram(
+            "serialization_seconds",
+            "Time spent converting principals and resources to protobuf.",
+            ["target", "method", "action"],
+            buckets=buckets,
+            **common,
+        )
+        self._rpc = Histogram(
+            "pdp_request_seconds",
+            "Latency of requests to the Cerbos PDP.",
+            ["method", "action"],
+            buckets=buckets,
+            **common,
+        )
+        self._batch_size = Histogram(
+            "pdp_batch_size",
+            "Number of resources sent in one CheckResources request.",
+            buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500),
+            **common,
+        )
+        self._decisions = Counter(
+            "decisions",
+            "Authorization decisions by effect and source.",
+            ["method", "action", "effect", "source"],
+            **common,
+        )
+        self._errors = Counter(
+            "errors",
+            "Failed authorizations by reason.",
+            ["method", "action", "reason"],
+            **common,
+        )
+        self._cache = Counter(
+            "cache_lookups",
+            "Cache lookups by cache and result.",
+            ["cache", "result"],
+            **common,
+        )
+        self._warm_up = Histogram(
+            "warm_up_seconds",
+            "Duration of decision cache warm-up runs.",
+            buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+            **common,
+        )
+
+    def observe_principal_build(self, seconds: float) -> None:
+        self._principal_build.observe(seconds)
+
+    def observe_principal_queue(self, depth: int) -> None:
+        self._principal_queue.observe(depth)
+
+    def observe_serialization(
+        self, target: str, seconds: float, method: str = "", action: str = ""
+    ) -> None:
+        self._serialization.labels(target, method, self._action(method, action)).observe(seconds)
+
+    def observe_rpc(self, method: str, action: str, seconds: float) -> None:
+        self._rpc.labels(method, self._action(method, action)).observe(seconds)
+
+    def observe_batch_size(self, size: int) -> None:
+        self._batch_size.observe(size)
+
+    def record_decision(self, method: str, action: str, allowed: bool, source: str) -> None:
+        effect = "allow" if allowed else "deny"
+        self._decisions.labels(method, self._action(method, action), effect, source).inc()
+
+    def record_error(self, method: str, action: str, reason: str) -> None:
+        self._errors.labels(method, self._action(method, action), reason).inc()
+
+    def record_cache(self, cache: str, hit: bool) -> None:
+        self._cache.labels(cache, "hit" if hit else "miss").inc()
+
+    def observe_warm_up(self, seconds: float) -> None:
+        self._warm_up.observe(seconds)
+
+    def _action(self, method: str, action: str) -> str:
+        return action if self._action_labels else method
+
+
+class OpenTelemetryMetrics(AuthorizationMetrics):
+    """Record authorization metrics with the OpenTelemetry metrics API.
+
+    Requires ``opentelemetry-api`` (``pip install 'cerbos-fastmcp[otel]'``). Instruments
+    are created on ``meter``, or on the global meter provider's ``cerbos_fastmcp`` meter
+    when omitted; configure an SDK ``MeterProvider`` to export them. ``action_labels``
+    behaves as in ``PrometheusMetrics``.
+    """
+
+    def __init__(self, meter: Optional[Any] = None, *, action_labels: bool = True) -> None:
+        if meter is None:
+            try:
+                from opentelemetry import metrics
+            except ImportError as exc:  # pragma: no cover - depends on installed extras
+                raise ImportError(
+                    "OpenTelemetryMetrics requires opentelemetry-api. Install with "
+                    "`pip install 'cerbos-fastmcp[otel]'`."
+                ) from exc
+            meter = metrics.get_meter("cerbos_fastmcp")
+
+        self._action_labels = action_labels
+        self._principal_build = meter.create_histogram(
+            "cerbos_fastmcp.principal_build.duration",
+            unit="s",
+            description="Time spent building a Cerbos principal from an access token.",
+        )
+        self._principal_queue = meter.create_histogram(
+            "cerbos_fastmcp.principal_build.queue_depth",
+            unit="{call}",
+            description="Principal builder calls waiting for a worker thread at submission.",
+        )
+        self._serialization = meter.create_histogram(
+            "cerbos_fastmcp.serialization.duration",
+            unit="s",
+            description="Time spent converting principals and resources to protobuf.",
+        )
+        self._rpc = meter.create_histogram(
+            "cerbos_fastmcp.pdp_request.duration",
+            unit="s",
+            description="Latency of requests to the Cerbos PDP.",
+        )
+        self._batch_size = meter.create_histogram(
+            "cerbos_fastmcp.pdp_batch.size",
+            unit="{resource}",
+            description="Number of resources sent in one CheckResources request.",
+        )
+        self._decisions = meter.create_counter(
+            "cerbos_fastmcp.decisions",
+            unit="{decision}",
+            description="Authorization decisions by effect and source.",
+        )
+        self._errors = meter.create_counter(
+            "cerbos_fastmcp.errors",
+            unit="{error}",
+            description="Failed authorizations by reason.",
+        )
+        self._cache = meter.create_counter(
+            "cerbos_fastmcp.cache_lookups",
+            unit="{lookup}",
+            description="Cache lookups by cache and result.",
+        )
+        self._warm_up = meter.create_histogram(
+            "cerbos_fastmcp.warm_up.duration",
+            unit="s",
+            description="Duration of decision cache warm-up runs.",
+        )
+
+    def observe_principal_build(self, seconds: float) -> None:
+        self._principal_build.record(seconds)
+
+    def observe_principal_queue(self, depth: int) -> None:
+        self._principal_queue.record(depth)
+
+    def observe_serialization(
+        self, target: str, seconds: float, method: str = "", action: str = ""
+    ) -> None:
+        self._serialization.record(seconds, {"target": target, **self._attributes(method, action)})
+
+    def observe_rpc(self, method: str, action: str, seconds: float) -> None:
+        self._rpc.record(seconds, self._attributes(method, action))
+
+    def observe_batch_size(self, size: int) -> None:
+        self._batch_size.record(size)
+
+    def record_decision(self, method: str, action: str, allowed: bool, source: str) -> None:
+        self._decisions.add(
+            1,
+            {
+                **self._attributes(method, action),
+                "effect": "allow" if allowed else "deny",
+                "source": source,
+            },
+        )
+
+    def record_error(self, method: str, action: str, reason: str) -> None:
+        self._errors.add(1, {**self._attributes(method, action), "reason": reason})
+
+    def record_cache(self, cache: str, hit: bool) -> None:
+        self._cache.add(1, {"cache": cache, "result": "hit" if hit else "miss"})
+
+    def observe_warm_up(self, seconds: float) -> None:
+        self._warm_up.record(seconds)
+
+    def _attributes(self, method: str, action: str) -> dict[str, str]:
+        return {"method": method, "action": action if self._action_labels else method}
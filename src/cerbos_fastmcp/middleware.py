@@ -3,44 +3,431 @@
 from __future__ import annotations
 
 import asyncio
+import base64
+import contextlib
+import datetime
+import fnmatch
+import hashlib
 import inspect
 import os
-from typing import Any, Awaitable, Callable, Optional
+import random
+import time
+import uuid
+import weakref
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import cached_property
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    ContextManager,
+    Generic,
+    Hashable,
+    Iterable,
+    Iterator,
+    Literal,
+    Mapping,
+    Optional,
+    Sequence,
+    TypeVar,
+)
 from cerbos.engine.v1 import engine_pb2
+from cerbos.request.v1 import request_pb2
+from cerbos.response.v1 import response_pb2
 from cerbos.sdk.grpc.client import AsyncCerbosClient
+from cerbos.sdk.grpc.utils import is_allowed as _entry_is_allowed
 from cerbos.sdk.model import Principal, Resource
 from fastmcp.server.dependencies import AccessToken, get_access_token
 from fastmcp.server.middleware import CallNext, Middleware, MiddlewareContext
+from fastmcp.prompts.prompt import Prompt
+from fastmcp.resources.resource import Resource as FastMCPResource
+from fastmcp.resources.template import ResourceTemplate
 from fastmcp.tools.tool import Tool
 from fastmcp.utilities import logging
-from google.protobuf import struct_pb2
+from google.protobuf import json_format, struct_pb2
 from mcp import McpError
 from mcp.types import (
     CallToolRequestParams,
     ErrorData,
+    GetPromptRequestParams,
+    GetPromptResult,
+    ListPromptsRequest,
+    ListResourcesRequest,
+    ListResourceTemplatesRequest,
     ListToolsRequest,
+    ReadResourceRequestParams,
+    ReadResourceResult,
 )
 
+from .audit import AuditRecord, AuditSink
+from .cache import _TTLCache
+from .channel import ChannelOptions
+from .enrichment import PrincipalEnricher, _with_attributes
+from .executor import ExecutorSaturatedError, PrincipalBuilderExecutor
+from .limits import ArgumentLimitError, ArgumentLimits
+from .local_engine import AttributePath, LocalPolicyEngine
+from .metrics import AuthorizationMetrics
+from .pool import CerbosClientPool
+from .query_plan import PlannedResource, QueryPlan, _current_plan
+from .resilience import CircuitOpenError, ResiliencePolicy
+from .tracing import AuthorizationTracing
+
 
 logger = logging.get_logger("cerbos_middleware")
 
+# Cerbos PDP default for ``server.requestLimits.maxResourcesPerRequest``
+DEFAULT_MAX_BATCH_SIZE = 50
+
+# Seconds before a failed PDP health check is retried when there is no background interval
+UNHEALTHY_RECHECK_INTERVAL = 5.0
+
+_T = TypeVar("_T")
+# Rule outputs of one PDP decision, as {"src": ..., "val": ...} mappings
+_Outputs = tuple[dict[str, Any], ...]
+_Item = TypeVar("_Item")
+
 PrincipalBuilder = Callable[
     [AccessToken],
     Awaitable[Principal] | Principal,
 ]
 
+class _SingleFlight(Generic[_T]):
+    """Coalesce concurrent calls that share a key into one underlying operation.
+
+    The first caller for a key starts the operation as a task; callers arriving while it
+    is in flight await the same task. Cancelling one waiter does not cancel the shared
+    task for the others.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[Hashable, asyncio.Future[_T]] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[_T]]) -> _T:
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(factory())
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: asyncio.Future[_T]) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if not future.cancelled():
+            # Mark the exception as retrieved when every waiter was cancelled
+            future.exception()
+
+
+class _CheckBatcher:
+    """Collect single checks from concurrent requests and send them as batches.
+
+    Checks are buffered for up to ``window`` seconds, or until ``max_size`` checks are
+    waiting, then grouped by principal and sent as one CheckResources request per group.
+    Each waiting caller receives its own decision, or the error raised for its batch.
+    """
+
+    def __init__(
+        self,
+        window: float,
+        max_size: int,
+        send: Callable[
+            [engine_pb2.Principal, list[tuple[str, engine_pb2.Resource]]],
+            Awaitable[list[bool]],
+        ],
+    ) -> None:
+        self._window = window
+        self._max_size = max_size
+        self._send = send
+        self._pending: list[
+            tuple[_ResolvedPrincipal, str, engine_pb2.Resource, asyncio.Future[bool]]
+        ] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def submit(
+        self, principal: _ResolvedPrincipal, action: str, resource_pb: engine_pb2.Resource
+    ) -> bool:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[bool] = loop.create_future()
+        self._pending.append((principal, action, resource_pb, future))
+        if len(self._pending) >= self._max_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._window, self.flush)
+        return await future
+
+    def flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+
+        groups: dict[bytes, list[tuple[str, engine_pb2.Resource, asyncio.Future[bool]]]] = {}
+        principals: dict[bytes, engine_pb2.Principal] = {}
+        for principal, action, resource_pb, future in pending:
+            principals.setdefault(principal.fingerprint, principal.proto)
+            groups.setdefault(principal.fingerprint, []).append((action, resource_pb, future))
+
+        for fingerprint, items in groups.items():
+            for start in range(0, len(items), self._max_size):
+                task = asyncio.ensure_future(
+                    self._dispatch(principals[fingerprint], items[start : start + self._max_size])
+                )
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(
+        self,
+        principal_pb: engine_pb2.Principal,
+        items: list[tuple[str, engine_pb2.Resource, asyncio.Future[bool]]],
+    ) -> None:
+        try:
+            results = await self._send(
+                principal_pb, [(action, resource_pb) for action, resource_pb, _ in items]
+            )
+        except Exception as exc:
+            for _, _, future in items:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for (_, _, future), granted in zip(items, results):
+            if not future.done():
+                future.set_result(granted)
+
+    async def aclose(self) -> None:
+        self.flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+class DecisionCache(_TTLCache[bool]):
+    """In-process TTL + LRU cache for Cerbos authorization decisions.
+
+    Entries are keyed by a fingerprint of the serialized principal, the action, and the
+    serialized resource (kind, id, attributes, and policy versions), so any change in the
+    inputs sent to the PDP results in a new lookup.
+
+    For actions matching one of the ``stale_actions`` glob patterns, a decision remains
+    usable for ``stale_ttl`` seconds after it expires: the middleware serves it and
+    refreshes it in the background. Other actions are never served stale.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 60.0,
+        max_entries: int = 10_000,
+        *,
+        stale_ttl: float = 0.0,
+        stale_actions: Iterable[str] = (),
+    ) -> None:
+        super().__init__(ttl, max_entries)
+        if stale_ttl < 0:
+            raise ValueError("stale_ttl must not be negative")
+        self.stale_actions = tuple(stale_actions)
+        if stale_ttl and self.stale_actions:
+            self._grace = stale_ttl
+        self._serves_stale: dict[str, bool] = {}
+
+    @property
+    def stale_ttl(self) -> float:
+        return self._grace
+
+    def serves_stale(self, action: str) -> bool:
+        """Whether expired decisions for ``action`` may be served."""
+        if not self._grace:
+            return False
+        matched = self._serves_stale.get(action)
+        if matched is None:
+            matched = any(
+                fnmatch.fnmatchcase(action, pattern) for pattern in self.stale_actions
+            )
+            if len(self._serves_stale) < self.max_entries:
+                self._serves_stale[action] = matched
+        return matched
+
+    def get(self, key: bytes) -> Optional[bool]:
+        return self._lookup(key)
+
+    def get_stale(self, key: bytes) -> Optional[bool]:
+        """Return an expired decision still within ``stale_ttl``, if any."""
+        return self._lookup_stale(key)
+
+    def set(self, key: bytes, granted: bool) -> None:
+        self._store(key, granted)
+
+
+@dataclass(frozen=True)
+class _ResolvedPrincipal:
+    """A built principal together with its protobuf form, serialized once."""
+
+    principal: Principal
+    proto: engine_pb2.Principal
+
+    @property
+    def id(self) -> str:
+        return self.principal.id
+
+    @cached_property
+    def fingerprint(self) -> bytes:
+        return hashlib.blake2b(
+            self.proto.SerializeToString(deterministic=True), digest_size=20
+        ).digest()
+
+    @cached_property
+    def anonymous_fingerprint(self) -> bytes:
+        """Fingerprint of everything except the principal ID."""
+        proto = engine_pb2.Principal()
+        proto.CopyFrom(self.proto)
+        proto.ClearField("id")
+        return hashlib.blake2b(
+            proto.SerializeToString(deterministic=True), digest_size=20
+        ).digest()
+
+
+class PrincipalCache(_TTLCache[_ResolvedPrincipal]):
+    """In-process TTL + LRU cache of principals keyed by access token.
+
+    Tokens are stored as SHA-256 digests, never in the clear. An entry lives for ``ttl``
+    seconds or until the token's ``expires_at``, whichever comes first, so a cached
+    principal is never served for an expired token. The serialized protobuf principal is
+    cached alongside it.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 10_000) -> None:
+        super().__init__(ttl, max_entries)
+
+    def get(self, token: AccessToken) -> Optional[_ResolvedPrincipal]:
+        return self._lookup(_token_key(token))
+
+    def set(self, token: AccessToken, resolved: _ResolvedPrincipal) -> None:
+        ttl = self.ttl
+        if token.expires_at is not None:
+            ttl = min(ttl, token.expires_at - time.time())
+        if ttl > 0:
+            self._store(_token_key(token), resolved, ttl)
+
+
+class ToolListCache(_TTLCache[tuple[bool, frozenset[str]]]):
+    """In-process TTL + LRU cache of filtered ``tools/list`` results.
+
+    A snapshot holds the ``tools/list`` gate decision and the names of the tools a
+    principal may see, so a listing served from it can still be audited. It is keyed by the
+    principal fingerprint (roles, attributes, policy version, scope, and by default the
+    principal ID), the request source, and the set of tool names the server returned, so
+    adding or removing tools invalidates it automatically. Call ``clear()`` after
+    deploying new policies.
+
+    With ``share_between_principals=True`` the principal ID is left out of the key, so
+    principals with identical roles and attributes share snapshots. Only enable it when
+    no policy distinguishes principals by ID.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 60.0,
+        max_entries: int = 1_000,
+        *,
+        share_between_principals: bool = False,
+    ) -> None:
+        super().__init__(ttl, max_entries)
+        self.share_between_principals = share_between_principals
+
+    def key(self, principal: _ResolvedPrincipal, source: Any, tool_names: Iterable[str]) -> bytes:
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(
+            principal.anonymous_fingerprint
+            if self.share_between_principals
+            else principal.fingerprint
+        )
+        digest.update(repr(source).encode())
+        for name in sorted(tool_names):
+            digest.update(len(name).to_bytes(8, "big"))
+            digest.update(name.encode())
+        return digest.digest()
+
+    def get(self, key: bytes) -> Optional[frozenset[str]]:
+        snapshot = self.snapshot(key)
+        return None if snapshot is None else snapshot[1]
+
+    def snapshot(self, key: bytes) -> Optional[tuple[bool, frozenset[str]]]:
+        """Return whether the gate allowed the listing, and the visible tool names."""
+        return self._lookup(key)
+
+    def set(self, key: bytes, tool_names: frozenset[str], *, allowed: bool = True) -> None:
+        self._store(key, (allowed, tool_names))
+
+
+@dataclass(frozen=True)
+class WarmUpReport:
+    """Outcome of ``CerbosAuthorizationMiddleware.warm_up``."""
+
+    duration: float
+    principals: int
+    tools: int
+    checks: int
+    failed: int
+
+
+class _RequestLog:
+    """Decisions made while authorizing one MCP request, logged as a single summary."""
+
+    __slots__ = ("method", "principal", "allowed", "denied", "error", "started")
+
+    def __init__(self, method: str) -> None:
+        self.method = method
+        self.principal: Optional[str] = None
+        self.allowed = 0
+        self.denied = 0
+        self.error: Optional[Any] = None
+        self.started = time.perf_counter()
+
+
+_current_request: ContextVar[Optional[_RequestLog]] = ContextVar(
+    "cerbos_fastmcp_request", default=None
+)
+
 
 class CerbosAuthorizationMiddleware(Middleware):
     """Authorize MCP tool calls using Cerbos policies."""
 
     def __init__(
         self,
-        cerbos_host: Optional[str] = None,
+        cerbos_host: Optional[str | Sequence[str]] = None,
         *,
         principal_builder: PrincipalBuilder,
         cerbos_client: Optional[AsyncCerbosClient] = None,
         resource_kind: Optional[str] = None,
         tls_verify: Optional[bool | str] = None,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        decision_cache: Optional[DecisionCache] = None,
+        principal_cache: Optional[PrincipalCache] = None,
+        tool_list_cache: Optional[ToolListCache] = None,
+        batch_window: Optional[float] = None,
+        local_engine: Optional[LocalPolicyEngine] = None,
+        tool_attribute_paths: Optional[Mapping[str, Iterable[str]]] = None,
+        project_attributes: bool = False,
+        argument_limits: Optional[ArgumentLimits] = None,
+        tool_argument_limits: Optional[Mapping[str, ArgumentLimits]] = None,
+        filter_list_items: bool = False,
+        authorize_reads: bool = False,
+        metrics: Optional[AuthorizationMetrics] = None,
+        tracing: Optional[AuthorizationTracing] = None,
+        log_sample_rate: float = 1.0,
+        audit_sink: Optional[AuditSink] = None,
+        resilience: Optional[ResiliencePolicy] = None,
+        channel_options: Optional[ChannelOptions] = None,
+        health_check_interval: Optional[float] = None,
+        unhealthy_sessions: Literal["reject", "allow"] = "reject",
+        warm_up_principals: Optional[Sequence[Principal]] = None,
+        offload_principal_builder: Optional[bool] = None,
+        principal_builder_executor: Optional[PrincipalBuilderExecutor] = None,
+        principal_enricher: Optional[PrincipalEnricher] = None,
+        tool_query_plans: Optional[Mapping[str, str | PlannedResource]] = None,
     ) -> None:
         super().__init__()
 
@@ -48,7 +435,16 @@ class CerbosAuthorizationMiddleware(Middleware):
             raise ValueError("principal_builder must be provided")
 
         self._principal_builder = principal_builder
-        self._cerbos_host = cerbos_host or os.getenv("CERBOS_HOST")
+        # Synchronous builders run on worker threads so blocking lookups do not stall the loop
+        if offload_principal_builder is None:
+            offload_principal_builder = not _is_async_callable(principal_builder)
+        self._principal_executor: Optional[PrincipalBuilderExecutor] = None
+        self._owns_principal_executor = False
+        if offload_principal_builder:
+            self._owns_principal_executor = principal_builder_executor is None
+            self._principal_executor = principal_builder_executor or PrincipalBuilderExecutor()
+        self._principal_enricher = principal_enricher
+        self._cerbos_host = _parse_hosts(cerbos_host or os.getenv("CERBOS_HOST"))
         if cerbos_client is None and self._cerbos_host is None:
             raise ValueError(
                 "cerbos_host must be provided or CERBOS_HOST environment variable must be set"
@@ -63,6 +459,45 @@ class CerbosAuthorizationMiddleware(Middleware):
             if tls_verify is not None
             else _env_tls("CERBOS_TLS_VERIFY", False)
         )
+        self._channel_options = (
+            channel_options if channel_options is not None else ChannelOptions.from_env()
+        )
+
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be a positive integer")
+        self._max_batch_size = max_batch_size
+        self._decision_cache = decision_cache
+        self._principal_cache = principal_cache
+        self._tool_list_cache = tool_list_cache
+        self._local_engine = local_engine
+
+        # Restrict R.attr to the paths policies read, per tool or derived from the policies
+        if project_attributes and local_engine is None:
+            raise ValueError("project_attributes requires local_engine")
+        self._project_attributes = project_attributes
+        self._tool_attribute_paths = {
+            tool_name: frozenset(tuple(path.split(".")) for path in paths)
+            for tool_name, paths in (tool_attribute_paths or {}).items()
+        }
+
+        # Tools whose calls receive a PlanResources query plan for their records
+        self._tool_query_plans = {
+            tool_name: target if isinstance(target, PlannedResource) else PlannedResource(target)
+            for tool_name, target in (tool_query_plans or {}).items()
+        }
+
+        self._argument_limits = argument_limits
+        self._tool_argument_limits = dict(tool_argument_limits or {})
+        self._filter_list_items = filter_list_items
+        self._authorize_reads = authorize_reads
+        # Instrumentation is skipped entirely, including timers, when metrics is None
+        self._metrics = metrics
+        self._tracing = tracing
+        if not 0.0 <= log_sample_rate <= 1.0:
+            raise ValueError("log_sample_rate must be between 0 and 1")
+        self._log_sample_rate = log_sample_rate
+        self._audit_sink = audit_sink
+        self._resilience = resilience
 
         # Defer client creation until first use so the gRPC channel binds to the running loop
         if cerbos_client is not None:
@@ -75,64 +510,310 @@ class CerbosAuthorizationMiddleware(Middleware):
 
         self._client_lock = asyncio.Lock()
 
+        # PDP health is probed once, or every health_check_interval, not per session
+        if health_check_interval is not None and health_check_interval <= 0:
+            raise ValueError("health_check_interval must be greater than zero")
+        if unhealthy_sessions not in ("reject", "allow"):
+            raise ValueError("unhealthy_sessions must be 'reject' or 'allow'")
+        self._health_check_interval = health_check_interval
+        self._unhealthy_sessions = unhealthy_sessions
+        self._pdp_healthy: Optional[bool] = None
+        self._health_checked_at = 0.0
+        self._inflight_health: _SingleFlight[bool] = _SingleFlight()
+        self._health_task: Optional[asyncio.Task[None]] = None
+
+        # Sessions that passed the start-up checks, so later requests skip them
+        self._started_sessions: weakref.WeakSet[Any] = weakref.WeakSet()
+
+        # Started by the first session when warm_up_principals is set
+        self._warm_up_principals = tuple(warm_up_principals or ())
+        self._warm_up_task: Optional[asyncio.Task[Optional[WarmUpReport]]] = None
+        self.warm_up_report: Optional[WarmUpReport] = None
+        self._inflight_checks: _SingleFlight[tuple[bool, _Outputs]] = _SingleFlight()
+        self._inflight_principals: _SingleFlight[Optional[_ResolvedPrincipal]] = _SingleFlight()
+        # Keys of stale decisions being refreshed in the background
+        self._refreshing: set[bytes] = set()
+        self._background: set[asyncio.Task[None]] = set()
+
+        # Opt-in cross-request batching of individual checks
+        if batch_window is not None and batch_window <= 0:
+            raise ValueError("batch_window must be greater than zero")
+        self._batcher = (
+            _CheckBatcher(batch_window, self._max_batch_size, self._send_batch)
+            if batch_window is not None
+            else None
+        )
+
     async def on_initialize(self, context, call_next):
+        await self._start_session(context)
+        await call_next(context)
+
+    async def on_request(
+        self, context: MiddlewareContext[Any], call_next: CallNext[Any, Any]
+    ) -> Any:
+        # fastmcp 2.12 never dispatches on_initialize to middleware, so a session's first
+        # request runs the start-up checks instead
+        session = _session(context)
+        if session is not None and session not in self._started_sessions:
+            await self._start_session(context)
+        return await call_next(context)
+
+    async def _start_session(self, context: MiddlewareContext[Any]) -> None:
+        """Check PDP health for a new session, and start the warm-up for the first one."""
         if self._owns_client:
-            client = await self._ensure_client()
+            healthy = await self._pdp_health()
+            if not healthy and self._unhealthy_sessions == "reject":
+                raise McpError(
+                    ErrorData(
+                        code=-32010,
+                        message="Unauthorized",
+                        data="cerbos_unavailable",
+                    )
+                )
+        if self._warm_up_principals and self._warm_up_task is None:
+            self._warm_up_task = asyncio.ensure_future(self._warm_up_server(context))
+
+        # A rejected session is checked again by its next request
+        session = _session(context)
+        if session is not None:
+            self._started_sessions.add(session)
+
+    async def warm_up(
+        self,
+        tools: Iterable[Tool | str],
+        principals: Iterable[Principal],
+        *,
+        source: str = "client",
+    ) -> WarmUpReport:
+        """Open the PDP channel and pre-compute ``tools/list`` decisions.
+
+        For each principal, the ``tools/list`` gate and the visibility of every tool are
+        checked with batched CheckResources calls. The results fill the decision cache
+        and the ``tools/list`` snapshot cache, if configured. A principal whose checks
+        fail is counted in ``failed`` and skipped.
+        """
+        started = time.perf_counter()
+        tool_names = [tool if isinstance(tool, str) else tool.name for tool in tools]
+        principals = list(principals)
+        if self._owns_client:
+            await self._check_pdp_health()
+        else:
+            await self._ensure_client()
+
+        results = await asyncio.gather(
+            *(self._warm_up_principal(principal, tool_names, source) for principal in principals)
+        )
+        report = WarmUpReport(
+            duration=time.perf_counter() - started,
+            principals=len(principals),
+            tools=len(tool_names),
+            checks=sum(checks for checks in results if checks is not None),
+            failed=sum(1 for checks in results if checks is None),
+        )
+        logger.info(
+            "Cerbos warm-up finished",
+            extra={
+                "duration_ms": round(report.duration * 1000, 3),
+                "principals": report.principals,
+                "tools": report.tools,
+                "checks": report.checks,
+                "failed": report.failed,
+            },
+        )
+        if self._metrics is not None:
+            self._metrics.observe_warm_up(report.duration)
+        self.warm_up_report = report
+        return report
+
+    async def _warm_up_principal(
+        self, principal: Principal, tool_names: Sequence[str], source: str
+    ) -> Optional[int]:
+        if self._principal_enricher is not None:
+            try:
+                principal = await self._enrich_principal(principal)
+            except McpError:
+                logger.warning("Cerbos warm-up failed", extra={"principal": principal.id})
+                return None
+        resolved = _ResolvedPrincipal(principal, _principal_to_proto(principal))
+        checks = [
+            ("tools/list", Resource(id="tools/list", kind=self._resource_kind)),
+            *(
+                (f"tools/list::{name}", self._tool_resource(name, {}, source))
+                for name in tool_names
+            ),
+        ]
+        try:
+            decisions = await self._check_many(resolved, checks)
+        except McpError:
+            logger.warning("Cerbos warm-up failed", extra={"principal": principal.id})
+            return None
+
+        cache = self._tool_list_cache
+        if cache is not None:
+            visible = (
+                frozenset(name for name, granted in zip(tool_names, decisions[1:]) if granted)
+                if decisions[0]
+                else frozenset()
+            )
+            cache.set(cache.key(resolved, source, tool_names), visible, allowed=decisions[0])
+        return len(checks)
+
+    async def _warm_up_server(self, context: MiddlewareContext[Any]) -> Optional[WarmUpReport]:
+        server = context.fastmcp_context.fastmcp if context.fastmcp_context else None
+        if server is None:
+            logger.warning("Cerbos warm-up skipped: no FastMCP server in the context")
+            return None
+        try:
+            tools = await server.get_tools()
+            return await self.warm_up(
+                [tool for tool in tools.values() if tool.enabled], self._warm_up_principals
+            )
+        except Exception as exc:
+            logger.exception("Cerbos warm-up failed", exc_info=exc)
+            return None
+
+    @property
+    def pdp_healthy(self) -> Optional[bool]:
+        """Result of the last PDP health check, or ``None`` before the first one."""
+        return self._pdp_healthy
+
+    async def _pdp_health(self) -> bool:
+        healthy = self._pdp_healthy
+        if healthy is None or (
+            not healthy
+            and self._health_check_interval is None
+            and time.monotonic() - self._health_checked_at >= UNHEALTHY_RECHECK_INTERVAL
+        ):
+            healthy = await self._inflight_health.run("pdp", self._check_pdp_health)
+        if self._health_check_interval is not None and self._health_task is None:
+            self._health_task = asyncio.ensure_future(
+                self._health_loop(self._health_check_interval)
+            )
+        return healthy
+
+    async def _health_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self._inflight_health.run("pdp", self._check_pdp_health)
+            except Exception as exc:  # pragma: no cover - defensive logging
+                logger.exception("Cerbos PDP health check failed", exc_info=exc)
+
+    async def _check_pdp_health(self) -> bool:
+        # Configuration errors from creating the client still surface to the caller
+        client = await self._ensure_client()
+        try:
             if hasattr(client, "server_info"):
                 await client.server_info()
-
-        await call_next(context)
+        except Exception as exc:
+            if self._pdp_healthy is not False:
+                logger.warning("Cerbos PDP health check failed", extra={"reason": repr(exc)})
+            healthy = False
+        else:
+            if self._pdp_healthy is False:
+                logger.info("Cerbos PDP is healthy again")
+            healthy = True
+        self._pdp_healthy = healthy
+        self._health_checked_at = time.monotonic()
+        return healthy
 
     async def on_call_tool(
         self,
         context: MiddlewareContext[CallToolRequestParams],
         call_next: CallNext[CallToolRequestParams, list[str]],
     ) -> Any:
-        logger.info("Calling tool with Cerbos authorization")
-        principal = await self._resolve_principal()
-        if principal is None:
-            raise McpError(
-                ErrorData(
-                    code=-32010,
-                    message="Unauthorized",
-                    data="missing_principal",
-                )
-            )
-
         message = context.message
         tool_name = message.name
-        arguments = message.arguments or {}
-
         action = f"tools/call::{tool_name}"
-        resource = Resource(
-            id=tool_name,
-            kind=self._resource_kind,
-            attr={
-                "tool_name": tool_name,
-                "arguments": arguments,
-                "source": context.source,
-            },
-        )
+        with self._authorizing("tools/call", action):
+            principal = await self._require_principal()
+            arguments = message.arguments or {}
+            try:
+                resource = self._tool_resource(tool_name, arguments, context.source)
+            except ArgumentLimitError as exc:
+                logger.info(
+                    "Tool arguments rejected",
+                    extra={"principal": principal.id, "action": action, "reason": str(exc)},
+                )
+                raise McpError(
+                    ErrorData(
+                        code=-32010,
+                        message="Unauthorized",
+                        data="arguments_too_large",
+                    )
+                ) from exc
 
-        granted = await self._is_allowed(action, principal, resource)
-        if not granted:
-            logger.info(
-                "Cerbos denied action",
-                extra={
-                    "principal": principal.id,
-                    "action": action,
-                    "resource": resource.id,
-                },
+            await self._require_allowed(action, principal, resource)
+            target = self._tool_query_plans.get(tool_name)
+            plan = None
+            if target is not None:
+                plan = await self._plan_resources(principal, target, action)
+
+        # The tool runs outside the authorization span and summary
+        if plan is None:
+            return await call_next(context)
+        token = _current_plan.set(plan)
+        try:
+            return await call_next(context)
+        finally:
+            _current_plan.reset(token)
+
+    async def on_read_resource(
+        self,
+        context: MiddlewareContext[ReadResourceRequestParams],
+        call_next: CallNext[ReadResourceRequestParams, ReadResourceResult],
+    ) -> ReadResourceResult:
+        if not self._authorize_reads:
+            return await call_next(context)
+
+        uri = str(context.message.uri)
+        action = f"resources/read::{uri}"
+        with self._authorizing("resources/read", action):
+            principal = await self._require_principal()
+            resource = Resource(
+                id=uri,
+                kind=self._resource_kind,
+                attr={"uri": uri, "source": context.source},
             )
-            raise McpError(
-                ErrorData(code=-32010, message="Unauthorized",
-                          data="cerbos_denied")
+
+            await self._require_allowed(action, principal, resource)
+        return await call_next(context)
+
+    async def on_get_prompt(
+        self,
+        context: MiddlewareContext[GetPromptRequestParams],
+        call_next: CallNext[GetPromptRequestParams, GetPromptResult],
+    ) -> GetPromptResult:
+        if not self._authorize_reads:
+            return await call_next(context)
+
+        message = context.message
+        action = f"prompts/get::{message.name}"
+        with self._authorizing("prompts/get", action):
+            principal = await self._require_principal()
+            arguments: Mapping[str, Any] = message.arguments or {}
+            try:
+                if self._argument_limits is not None:
+                    arguments = self._argument_limits.apply(arguments)
+            except ArgumentLimitError as exc:
+                logger.info(
+                    "Prompt arguments rejected",
+                    extra={"principal": principal.id, "action": action, "reason": str(exc)},
+                )
+                raise McpError(
+                    ErrorData(
+                        code=-32010,
+                        message="Unauthorized",
+                        data="arguments_too_large",
+                    )
+                ) from exc
+            resource = Resource(
+                id=message.name,
+                kind=self._resource_kind,
+                attr={"prompt_name": message.name, "arguments": arguments, "source": context.source},
             )
 
-        logger.debug(
-            "Cerbos authorized tool call",
-            extra={"principal": principal.id, "action": action},
-        )
+            await self._require_allowed(action, principal, resource)
         return await call_next(context)
 
     async def on_list_tools(
@@ -140,126 +821,709 @@ class CerbosAuthorizationMiddleware(Middleware):
         context: MiddlewareContext[ListToolsRequest],
         call_next: CallNext[ListToolsRequest, list[Tool]],
     ) -> list[Tool]:
-        logger.info("Listing tools with Cerbos authorization")
+        with self._authorizing("tools/list"):
+            return await self._list_tools(context, call_next)
+
+    async def _list_tools(
+        self,
+        context: MiddlewareContext[ListToolsRequest],
+        call_next: CallNext[ListToolsRequest, list[Tool]],
+    ) -> list[Tool]:
         try:
-            await self._authorize_command("tools/list")
+            principal = await self._require_principal()
         except McpError:
             return []
 
-        original_result = await call_next(context)
-        principal = await self._resolve_principal()
-        if principal is None:
-            raise McpError(
-                ErrorData(
-                    code=-32010,
-                    message="Unauthorized",
-                    data="missing_principal",
-                )
+        snapshot_cache = self._tool_list_cache
+        snapshot_key: Optional[bytes] = None
+        if snapshot_cache is None:
+            try:
+                await self._authorize_command("tools/list", principal)
+            except McpError:
+                return []
+            original_result = await call_next(context)
+        else:
+            # The snapshot key covers the registered tools, so list them before authorizing
+            original_result = await call_next(context)
+            snapshot_key = snapshot_cache.key(
+                principal, context.source, (tool.name for tool in original_result)
             )
+            snapshot = snapshot_cache.snapshot(snapshot_key)
+            if self._metrics is not None:
+                self._metrics.record_cache("tool_list", snapshot is not None)
+            if snapshot is not None:
+                allowed, visible = snapshot
+                await self._replay_snapshot(principal, original_result, allowed, visible)
+                return [tool for tool in original_result if tool.name in visible]
+            try:
+                await self._authorize_command("tools/list", principal)
+            except McpError as exc:
+                if exc.error.data == "cerbos_denied":
+                    snapshot_cache.set(snapshot_key, frozenset(), allowed=False)
+                return []
 
-        authorized_tools = []
-        for tool in original_result:
-            action = f"tools/list::{tool.name}"
-            resource = Resource(
-                id=tool.name,
-                kind=self._resource_kind,
-                attr={
-                    "tool_name": tool.name,
-                    "arguments": {},
-                    "source": context.source,
-                },
-            )
-            if await self._is_allowed(action, principal, resource):
-                authorized_tools.append(tool)
-            else:
-                logger.info(
-                    "Cerbos denied action",
-                    extra={
-                        "principal": principal.id,
-                        "action": action,
-                        "resource": resource.id,
-                    },
-                )
+        checks = [
+            (f"tools/list::{tool.name}", self._tool_resource(tool.name, {}, context.source))
+            for tool in original_result
+        ]
+        authorized_tools = await self._filter_items(principal, original_result, checks)
+        if snapshot_cache is not None and snapshot_key is not None:
+            snapshot_cache.set(snapshot_key, frozenset(tool.name for tool in authorized_tools))
         return authorized_tools
 
-    async def on_list_resources(self, context, call_next):
-        logger.info("Listing resources with Cerbos authorization")
-        try:
-            await self._authorize_command("resources/list")
-        except McpError:
-            return []
+    async def _replay_snapshot(
+        self,
+        principal: _ResolvedPrincipal,
+        tools: Sequence[Tool],
+        allowed: bool,
+        visible: frozenset[str],
+    ) -> None:
+        """Log and audit the decisions a ``tools/list`` snapshot answered."""
+        started = time.perf_counter()
+        decisions = [("tools/list", "tools/list", allowed)]
+        if allowed:
+            decisions.extend(
+                (f"tools/list::{tool.name}", tool.name, tool.name in visible) for tool in tools
+            )
+        for action, resource_id, granted in decisions:
+            # Audit records and logs only carry the resource kind and ID
+            resource = Resource(id=resource_id, kind=self._resource_kind)
+            self._record_decision(principal, action, resource, granted)
+            await self._audit(principal, action, resource, granted, "snapshot", started)
 
-        return await call_next(context)
+    async def on_list_resources(
+        self,
+        context: MiddlewareContext[ListResourcesRequest],
+        call_next: CallNext[ListResourcesRequest, list[FastMCPResource]],
+    ) -> list[FastMCPResource]:
+        return await self._list_items(
+            context,
+            call_next,
+            "resources/list",
+            lambda resource: str(resource.uri),
+            lambda resource: {"uri": str(resource.uri), "name": resource.name},
+        )
+
+    async def on_list_resource_templates(
+        self,
+        context: MiddlewareContext[ListResourceTemplatesRequest],
+        call_next: CallNext[ListResourceTemplatesRequest, list[ResourceTemplate]],
+    ) -> list[ResourceTemplate]:
+        if not self._filter_list_items:
+            return await call_next(context)
+
+        return await self._list_items(
+            context,
+            call_next,
+            "resources/templates/list",
+            lambda template: template.uri_template,
+            lambda template: {"uri_template": template.uri_template, "name": template.name},
+        )
 
-    async def on_list_prompts(self, context, call_next):
-        logger.info("Listing prompts with Cerbos authorization")
+    async def on_list_prompts(
+        self,
+        context: MiddlewareContext[ListPromptsRequest],
+        call_next: CallNext[ListPromptsRequest, list[Prompt]],
+    ) -> list[Prompt]:
+        return await self._list_items(
+            context,
+            call_next,
+            "prompts/list",
+            lambda prompt: prompt.name,
+            lambda prompt: {"prompt_name": prompt.name},
+        )
+
+    async def _list_items(
+        self,
+        context: MiddlewareContext[Any],
+        call_next: CallNext[Any, list[_Item]],
+        command: str,
+        item_id: Callable[[_Item], str],
+        item_attr: Callable[[_Item], dict[str, Any]],
+    ) -> list[_Item]:
+        """Gate a listing on ``command`` and, if enabled, filter it item by item.
+
+        Each item is checked as ``<command>::<id>`` on a resource with that ID, and all
+        items are evaluated with batched CheckResources calls.
+        """
+        with self._authorizing(command):
+            return await self._filter_listing(
+                context, call_next, command, item_id, item_attr
+            )
+
+    async def _filter_listing(
+        self,
+        context: MiddlewareContext[Any],
+        call_next: CallNext[Any, list[_Item]],
+        command: str,
+        item_id: Callable[[_Item], str],
+        item_attr: Callable[[_Item], dict[str, Any]],
+    ) -> list[_Item]:
         try:
-            await self._authorize_command("prompts/list")
+            principal = await self._require_principal()
+            await self._authorize_command(command, principal)
         except McpError:
             return []
 
-        return await call_next(context)
+        items = await call_next(context)
+        if not self._filter_list_items:
+            return items
 
-    async def _authorize_command(self, command_name: str) -> None:
-        logger.info(f"Authorizing command: {command_name}")
-        principal = await self._resolve_principal()
-        if principal is None:
-            raise McpError(
-                ErrorData(
-                    code=-32010,
-                    message="Unauthorized",
-                    data="missing_principal",
+        checks = []
+        for item in items:
+            resource_id = item_id(item)
+            checks.append(
+                (
+                    f"{command}::{resource_id}",
+                    Resource(
+                        id=resource_id,
+                        kind=self._resource_kind,
+                        attr={**item_attr(item), "source": context.source},
+                    ),
                 )
             )
+        return await self._filter_items(principal, items, checks)
+
+    async def _filter_items(
+        self,
+        principal: _ResolvedPrincipal,
+        items: Sequence[_Item],
+        checks: Sequence[tuple[str, Resource]],
+    ) -> list[_Item]:
+        decisions = await self._check_many(principal, checks)
+
+        authorized = []
+        for item, (action, resource), granted in zip(items, checks, decisions):
+            self._record_decision(principal, action, resource, granted)
+            if granted:
+                authorized.append(item)
+        return authorized
 
-        resource = Resource(id=command_name, kind=self._resource_kind)
+    def _tool_resource(
+        self, tool_name: str, arguments: Mapping[str, Any], source: Any
+    ) -> Resource:
+        attr: dict[str, Any] = {
+            "tool_name": tool_name,
+            "arguments": arguments,
+            "source": source,
+        }
+        paths = self._tool_attribute_paths.get(tool_name)
+        if paths is None and self._project_attributes and self._local_engine is not None:
+            paths = self._local_engine.attribute_paths(self._resource_kind)
+        if paths is not None:
+            attr = _project_attributes(attr, paths)
+        limits = self._tool_argument_limits.get(tool_name, self._argument_limits)
+        if limits is not None and isinstance(attr.get("arguments"), Mapping):
+            attr["arguments"] = limits.apply(attr["arguments"])
+        return Resource(id=tool_name, kind=self._resource_kind, attr=attr)
 
-        granted = await self._is_allowed(command_name, principal, resource)
+    async def _require_allowed(
+        self, action: str, principal: _ResolvedPrincipal, resource: Resource
+    ) -> None:
+        granted = await self._is_allowed(action, principal, resource)
+        self._record_decision(principal, action, resource, granted)
         if not granted:
-            logger.info(
-                "Cerbos denied action",
-                extra={
-                    "principal": principal.id,
-                    "action": command_name,
-                    "resource": resource.id,
-                },
-            )
             raise McpError(
                 ErrorData(code=-32010, message="Unauthorized",
                           data="cerbos_denied")
             )
 
-        logger.debug(
-            "Cerbos authorized command call",
-            extra={
-                "principal": principal.id,
-                "resource": resource.id,
-                "action": command_name,
-            },
-        )
+    async def _authorize_command(
+        self, command_name: str, principal: Optional[_ResolvedPrincipal] = None
+    ) -> None:
+        with self._span("cerbos.authorize_command", {"cerbos.action": command_name}):
+            if principal is None:
+                principal = await self._require_principal()
+
+            resource = Resource(id=command_name, kind=self._resource_kind)
+            await self._require_allowed(command_name, principal, resource)
 
     async def _is_allowed(
-        self, action: str, principal: Principal, resource: Resource
+        self, action: str, principal: _ResolvedPrincipal, resource: Resource
     ) -> bool:
-        logger.info(
-            f"Authorizing action '{action}' for principal '{principal.id}' on resource kind:'{resource.kind} id:'{resource.id}'"
+        logger.debug(
+            "Authorizing action '%s' for principal '%s' on resource kind:'%s' id:'%s'",
+            action,
+            principal.id,
+            resource.kind,
+            resource.id,
+        )
+        metrics = self._metrics
+        audit = self._audit_sink
+        started = time.perf_counter() if audit is not None else 0.0
+        method = _method(action)
+        if self._local_engine is not None:
+            decision = self._local_engine.check(principal.principal, action, resource)
+            if decision is not None:
+                if metrics is not None:
+                    metrics.record_decision(method, action, decision, "local")
+                if audit is not None:
+                    await self._audit(principal, action, resource, decision, "local", started)
+                return decision
+
+        try:
+            principal_pb = principal.proto
+            resource_pb = self._serialize_resource(resource, method, action)
+            key = _decision_key(principal_pb, action, resource_pb)
+            cache = self._decision_cache
+            if cache is not None:
+                cached = cache.get(key)
+                if metrics is not None:
+                    metrics.record_cache("decision", cached is not None)
+                    if cached is not None:
+                        metrics.record_decision(method, action, cached, "cache")
+                if cached is not None:
+                    if audit is not None:
+                        await self._audit(principal, action, resource, cached, "cache", started)
+                    return cached
+                if cache.serves_stale(action):
+                    stale = cache.get_stale(key)
+                    if stale is not None:
+                        self._refresh_stale(principal_pb, [(key, action, resource_pb)])
+                        if metrics is not None:
+                            metrics.record_decision(method, action, stale, "stale")
+                        if audit is not None:
+                            await self._audit(principal, action, resource, stale, "stale", started)
+                        return stale
+
+            granted, outputs = await self._inflight_checks.run(
+                key, lambda: self._fetch_decision(key, action, principal, resource_pb)
+            )
+            if metrics is not None:
+                metrics.record_decision(method, action, granted, "pdp")
+            if audit is not None:
+                await self._audit(principal, action, resource, granted, "pdp", started, outputs)
+            return granted
+        except Exception as exc:
+            raise self._cerbos_failure(exc, method, action) from exc
+
+    async def _fetch_decision(
+        self,
+        key: bytes,
+        action: str,
+        principal: _ResolvedPrincipal,
+        resource_pb: engine_pb2.Resource,
+    ) -> tuple[bool, _Outputs]:
+        outputs: _Outputs = ()
+        if self._batcher is not None:
+            granted = await self._batcher.submit(principal, action, resource_pb)
+        elif self._tracing is not None or self._audit_sink is not None:
+            # is_allowed can neither carry trace metadata nor return rule outputs
+            client = await self._ensure_client()
+            [entry] = await self._check_results(client, principal.proto, [(action, resource_pb)])
+            granted = _entry_is_allowed(entry, action)
+            outputs = _rule_outputs(entry)
+        else:
+            client = await self._ensure_client()
+            metrics = self._metrics
+            if metrics is None:
+                granted = await self._call_pdp(
+                    lambda: client.is_allowed(action, principal.proto, resource_pb)
+                )
+            else:
+                started = time.perf_counter()
+                granted = await self._call_pdp(
+                    lambda: client.is_allowed(action, principal.proto, resource_pb)
+                )
+                metrics.observe_rpc(_method(action), action, time.perf_counter() - started)
+                metrics.observe_batch_size(1)
+        if self._decision_cache is not None:
+            self._decision_cache.set(key, granted)
+        return granted, outputs
+
+    async def _check_many(
+        self, principal: _ResolvedPrincipal, checks: Sequence[tuple[str, Resource]]
+    ) -> list[bool]:
+        """Evaluate ``(action, resource)`` pairs with batched CheckResources calls.
+
+        Decisions available from the local engine or the decision cache are answered
+        locally. The remaining checks are split into chunks of ``max_batch_size``
+        resources and the chunks are sent concurrently. Decisions are returned in the same order as ``checks``.
+        """
+        if not checks:
+            return []
+
+        logger.debug(
+            "Authorizing %d actions for principal '%s' in batches of %d",
+            len(checks),
+            principal.id,
+            self._max_batch_size,
         )
+        cache = self._decision_cache
+        metrics = self._metrics
+        audit = self._audit_sink
+        started = time.perf_counter() if audit is not None else 0.0
+        sources: list[str] = []
+        outputs: list[_Outputs] = []
+        if audit is not None:
+            sources = ["local"] * len(checks)
+            outputs = [()] * len(checks)
+        try:
+            principal_pb = principal.proto
+            decisions: list[Optional[bool]] = [None] * len(checks)
+            pending: list[tuple[int, str, engine_pb2.Resource, Optional[bytes]]] = []
+            stale: list[tuple[bytes, str, engine_pb2.Resource]] = []
+            for index, (action, resource) in enumerate(checks):
+                if self._local_engine is not None:
+                    decisions[index] = self._local_engine.check(
+                        principal.principal, action, resource
+                    )
+                    if decisions[index] is not None:
+                        if metrics is not None:
+                            metrics.record_decision(
+                                _method(action), action, bool(decisions[index]), "local"
+                            )
+                        continue
+                resource_pb = self._serialize_resource(resource, _method(action), action)
+                key = None
+                if cache is not None:
+                    key = _decision_key(principal_pb, action, resource_pb)
+                    decisions[index] = cache.get(key)
+                    if metrics is not None:
+                        metrics.record_cache("decision", decisions[index] is not None)
+                        if decisions[index] is not None:
+                            metrics.record_decision(
+                                _method(action), action, bool(decisions[index]), "cache"
+                            )
+                    if audit is not None:
+                        sources[index] = "cache"
+                    if decisions[index] is None and cache.serves_stale(action):
+                        decisions[index] = cache.get_stale(key)
+                        if decisions[index] is not None:
+                            stale.append((key, action, resource_pb))
+                            if metrics is not None:
+                                metrics.record_decision(
+                                    _method(action), action, bool(decisions[index]), "stale"
+                                )
+                            if audit is not None:
+                                sources[index] = "stale"
+                if decisions[index] is None:
+                    pending.append((index, action, resource_pb, key))
+            if stale:
+                self._refresh_stale(principal_pb, stale)
+
+            if pending:
+                client = await self._ensure_client()
+                chunks = [
+                    pending[start : start + self._max_batch_size]
+                    for start in range(0, len(pending), self._max_batch_size)
+                ]
+                results = await asyncio.gather(
+                    *(
+                        self._check_results(
+                            client,
+                            principal_pb,
+                            [(action, resource_pb) for _, action, resource_pb, _ in chunk],
+                        )
+                        for chunk in chunks
+                    )
+                )
+                for chunk, chunk_result in zip(chunks, results):
+                    for (index, action, _, key), entry in zip(chunk, chunk_result):
+                        granted = _entry_is_allowed(entry, action)
+                        decisions[index] = granted
+                        if audit is not None:
+                            sources[index] = "pdp"
+                            outputs[index] = _rule_outputs(entry)
+                        if cache is not None and key is not None:
+                            cache.set(key, granted)
+                        if metrics is not None:
+                            metrics.record_decision(_method(action), action, granted, "pdp")
+        except Exception as exc:
+            method, action = _batch_labels(action for action, _ in checks)
+            raise self._cerbos_failure(exc, method, action) from exc
+
+        if audit is not None:
+            for index, (action, resource) in enumerate(checks):
+                await self._audit(
+                    principal,
+                    action,
+                    resource,
+                    bool(decisions[index]),
+                    sources[index],
+                    started,
+                    outputs[index],
+                )
+        return [bool(granted) for granted in decisions]
+
+    def _refresh_stale(
+        self,
+        principal_pb: engine_pb2.Principal,
+        stale: Sequence[tuple[bytes, str, engine_pb2.Resource]],
+    ) -> None:
+        """Re-check stale decisions in the background, at most once per key at a time."""
+        stale = [item for item in stale if item[0] not in self._refreshing]
+        if not stale:
+            return
+        self._refreshing.update(key for key, _, _ in stale)
+        task = asyncio.ensure_future(self._refresh_decisions(principal_pb, stale))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _refresh_decisions(
+        self,
+        principal_pb: engine_pb2.Principal,
+        stale: Sequence[tuple[bytes, str, engine_pb2.Resource]],
+    ) -> None:
         try:
             client = await self._ensure_client()
-            principal_pb = _principal_to_proto(principal)
-            resource_pb = _resource_to_proto(resource)
-            return await client.is_allowed(action, principal_pb, resource_pb)
-        except Exception as exc:  # pragma: no cover - defensive logging
+            for start in range(0, len(stale), self._max_batch_size):
+                chunk = stale[start : start + self._max_batch_size]
+                results = await self._check_results(
+                    client,
+                    principal_pb,
+                    [(action, resource_pb) for _, action, resource_pb in chunk],
+                )
+                for (key, action, _), entry in zip(chunk, results):
+                    if self._decision_cache is not None:
+                        self._decision_cache.set(key, _entry_is_allowed(entry, action))
+        except Exception as exc:
+            # The stale decisions keep being served until their grace period ends
+            logger.warning(
+                "Refreshing stale Cerbos decisions failed",
+                extra={"count": len(stale), "reason": repr(exc)},
+            )
+        finally:
+            self._refreshing.difference_update(key for key, _, _ in stale)
+
+    async def _send_batch(
+        self,
+        principal_pb: engine_pb2.Principal,
+        chunk: list[tuple[str, engine_pb2.Resource]],
+    ) -> list[bool]:
+        client = await self._ensure_client()
+        return await self._check_chunk(client, principal_pb, chunk)
+
+    async def _check_chunk(
+        self,
+        client: AsyncCerbosClient,
+        principal_pb: engine_pb2.Principal,
+        chunk: Sequence[tuple[str, engine_pb2.Resource]],
+    ) -> list[bool]:
+        results = await self._check_results(client, principal_pb, chunk)
+        return [_entry_is_allowed(entry, action) for entry, (action, _) in zip(results, chunk)]
+
+    async def _check_results(
+        self,
+        client: AsyncCerbosClient,
+        principal_pb: engine_pb2.Principal,
+        chunk: Sequence[tuple[str, engine_pb2.Resource]],
+    ) -> Sequence[response_pb2.CheckResourcesResponse.ResultEntry]:
+        entries = [
+            request_pb2.CheckResourcesRequest.ResourceEntry(actions=[action], resource=resource_pb)
+            for action, resource_pb in chunk
+        ]
+        metrics = self._metrics
+        tracing = self._tracing
+        if metrics is None and tracing is None:
+            response = await self._call_pdp(
+                lambda: client.check_resources(principal=principal_pb, resources=entries)
+            )
+        else:
+            method, action = _batch_labels(action for action, _ in chunk)
+            with self._span(
+                "cerbos.check_resources",
+                {"mcp.method": method, "cerbos.action": action, "cerbos.batch_size": len(entries)},
+                client=True,
+            ):
+                started = time.perf_counter()
+                metadata = tracing.metadata() if tracing is not None else ()
+                response = await self._call_pdp(
+                    lambda: _check_resources(client, principal_pb, entries, metadata)
+                )
+            if metrics is not None:
+                metrics.observe_rpc(method, action, time.perf_counter() - started)
+                metrics.observe_batch_size(len(entries))
+        # The PDP returns results in request order; resource IDs need not be unique.
+        if len(response.results) != len(chunk):
+            raise RuntimeError(
+                f"Cerbos returned {len(response.results)} results for {len(chunk)} resources"
+            )
+        return response.results
+
+    async def _plan_resources(
+        self, principal: _ResolvedPrincipal, target: PlannedResource, action: str
+    ) -> QueryPlan:
+        """Ask the PDP which ``target`` records the principal may access with its action."""
+        resource_pb = engine_pb2.PlanResourcesInput.Resource(
+            kind=target.kind, policy_version=target.policy_version, scope=target.scope
+        )
+        metrics = self._metrics
+        tracing = self._tracing
+        try:
+            client = await self._ensure_client()
+            with self._span(
+                "cerbos.plan_resources",
+                {"cerbos.action": target.action, "cerbos.resource_kind": target.kind},
+                client=True,
+            ):
+                started = time.perf_counter() if metrics is not None else 0.0
+                metadata = tracing.metadata() if tracing is not None else ()
+                response = await self._call_pdp(
+                    lambda: _plan_resources(
+                        client, target.action, principal.proto, resource_pb, metadata
+                    )
+                )
+            if metrics is not None:
+                metrics.observe_rpc("tools/call", action, time.perf_counter() - started)
+            plan = QueryPlan.from_response(response)
+        except Exception as exc:
+            raise self._cerbos_failure(exc, "tools/call", action) from exc
+        logger.debug(
+            "Cerbos query plan for principal '%s' on resource kind '%s': %s",
+            principal.id,
+            target.kind,
+            plan.kind,
+        )
+        return plan
+
+    async def _call_pdp(self, call: Callable[[], Awaitable[_T]]) -> _T:
+        if self._resilience is None:
+            return await call()
+        return await self._resilience.run(call)
+
+    def _cerbos_failure(self, exc: Exception, method: str, action: str) -> McpError:
+        if isinstance(exc, CircuitOpenError):
+            # Expected while the PDP is down; a traceback per request would flood the logs
+            reason = "cerbos_unavailable"
+            logger.warning("Cerbos PDP circuit breaker is open", extra={"action": action})
+        else:
+            reason = "cerbos_error"
             logger.exception("Cerbos authorization failed", exc_info=exc)
-            raise McpError(
-                ErrorData(
-                    code=-32010,
-                    message="Unauthorized",
-                    data="cerbos_error",
+        if self._metrics is not None:
+            self._metrics.record_error(method, action, reason)
+        return McpError(ErrorData(code=-32010, message="Unauthorized", data=reason))
+
+    async def _audit(
+        self,
+        principal: _ResolvedPrincipal,
+        action: str,
+        resource: Resource,
+        granted: bool,
+        source: str,
+        started: float,
+        outputs: _Outputs = (),
+    ) -> None:
+        sink = self._audit_sink
+        if sink is None:
+            return
+        await sink.submit(
+            AuditRecord(
+                timestamp=time.time(),
+                principal_id=principal.id,
+                action=action,
+                resource_kind=resource.kind,
+                resource_id=resource.id,
+                effect="EFFECT_ALLOW" if granted else "EFFECT_DENY",
+                source=source,
+                latency_ms=round((time.perf_counter() - started) * 1000, 3),
+                outputs=outputs,
+            )
+        )
+
+    def _span(
+        self, name: str, attributes: Optional[Mapping[str, Any]] = None, *, client: bool = False
+    ) -> ContextManager[Any]:
+        if self._tracing is None:
+            return contextlib.nullcontext()
+        return self._tracing.span(name, attributes, client=client)
+
+    @contextlib.contextmanager
+    def _authorizing(self, method: str, action: Optional[str] = None) -> Iterator[None]:
+        """Track the authorization of one MCP request and log a summary when it ends."""
+        attributes = {"mcp.method": method}
+        if action is not None:
+            attributes["cerbos.action"] = action
+        request = _RequestLog(method)
+        token = _current_request.set(request)
+        try:
+            with self._span("cerbos.authorize", attributes):
+                yield
+        except McpError as exc:
+            request.error = exc.error.data
+            raise
+        finally:
+            _current_request.reset(token)
+            logger.info(
+                "Cerbos authorization summary",
+                extra={
+                    "method": method,
+                    "principal": request.principal,
+                    "allowed": request.allowed,
+                    "denied": request.denied,
+                    "error": request.error,
+                    "duration_ms": round((time.perf_counter() - request.started) * 1000, 3),
+                },
+            )
+
+    def _record_decision(
+        self, principal: _ResolvedPrincipal, action: str, resource: Resource, granted: bool
+    ) -> None:
+        request = _current_request.get()
+        if granted:
+            if request is not None:
+                request.allowed += 1
+            rate = self._log_sample_rate
+            if rate >= 1.0 or (rate > 0.0 and random.random() < rate):
+                logger.info(
+                    "Cerbos allowed action",
+                    extra={
+                        "principal": principal.id,
+                        "action": action,
+                        "resource": resource.id,
+                    },
                 )
-            ) from exc
+            return
+
+        if request is not None:
+            request.denied += 1
+        logger.info(
+            "Cerbos denied action",
+            extra={
+                "principal": principal.id,
+                "action": action,
+                "resource": resource.id,
+            },
+        )
+        if self._tracing is not None:
+            self._tracing.add_event(
+                "cerbos.denied",
+                {
+                    "cerbos.principal.id": principal.id,
+                    "cerbos.action": action,
+                    "cerbos.resource.id": resource.id,
+                },
+            )
+
+    def _serialize_resource(
+        self, resource: Resource, method: str, action: str
+    ) -> engine_pb2.Resource:
+        metrics = self._metrics
+        if metrics is None:
+            return _resource_to_proto(resource)
+        started = time.perf_counter()
+        resource_pb = _resource_to_proto(resource)
+        metrics.observe_serialization("resource", time.perf_counter() - started, method, action)
+        return resource_pb
 
     async def close(self) -> None:
+        for task in (self._health_task, self._warm_up_task):
+            if task is not None and not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        self._health_task = None
+        if self._batcher is not None:
+            await self._batcher.aclose()
+        for task in list(self._background):
+            task.cancel()
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        if self._principal_enricher is not None:
+            await self._principal_enricher.aclose()
+        if self._audit_sink is not None:
+            await self._audit_sink.aclose()
+        if self._owns_principal_executor and self._principal_executor is not None:
+            self._principal_executor.close()
         if self._owns_client and self._client is not None:
             await self._client.close()
             self._client = None
@@ -276,13 +1540,40 @@ class CerbosAuthorizationMiddleware(Middleware):
             if self._client is None:
                 if not self._cerbos_host:
                     raise RuntimeError("Cerbos host is not configured")
-                self._client = AsyncCerbosClient(
-                    self._cerbos_host,
-                    tls_verify=self._tls_verify,
-                )
+                options = self._channel_options.grpc_options()
+                if isinstance(self._cerbos_host, str):
+                    # Only pass channel_options when set, keeping the SDK's defaults otherwise
+                    extra = {"channel_options": options} if options else {}
+                    self._client = AsyncCerbosClient(
+                        self._cerbos_host,
+                        tls_verify=self._tls_verify,
+                        **extra,
+                    )
+                else:
+                    self._client = CerbosClientPool(
+                        self._cerbos_host,
+                        tls_verify=self._tls_verify,
+                        channel_options=options,
+                    )
             return self._client
 
-    async def _resolve_principal(self) -> Optional[Principal]:
+    async def _require_principal(self) -> _ResolvedPrincipal:
+        with self._span("cerbos.resolve_principal"):
+            principal = await self._resolve_principal()
+        request = _current_request.get()
+        if request is not None and principal is not None:
+            request.principal = principal.id
+        if principal is None:
+            raise McpError(
+                ErrorData(
+                    code=-32010,
+                    message="Unauthorized",
+                    data="missing_principal",
+                )
+            )
+        return principal
+
+    async def _resolve_principal(self) -> Optional[_ResolvedPrincipal]:
         token: AccessToken | None = get_access_token()
 
         if token is None:
@@ -294,78 +1585,305 @@ class CerbosAuthorizationMiddleware(Middleware):
                 )
             )
 
+        cache = self._principal_cache
+        if cache is not None:
+            resolved = cache.get(token)
+            if self._metrics is not None:
+                self._metrics.record_cache("principal", resolved is not None)
+            if resolved is not None:
+                return resolved
+
+        return await self._inflight_principals.run(
+            _token_key(token), lambda: self._build_principal(token)
+        )
+
+    async def _enrich_principal(self, principal: Principal) -> Principal:
+        enricher = self._principal_enricher
+        assert enricher is not None
+        attributes = enricher.get(principal.id)
+        if self._metrics is not None:
+            self._metrics.record_cache("principal_attributes", attributes is not None)
+        if attributes is None:
+            try:
+                attributes = await enricher.fetch(principal)
+            except Exception as exc:
+                logger.exception("Principal enricher failed", exc_info=exc)
+                if self._metrics is not None:
+                    self._metrics.record_error("", "", "principal_enricher_error")
+                raise McpError(
+                    ErrorData(
+                        code=-32010,
+                        message="Unauthorized",
+                        data="principal_enricher_error",
+                    )
+                ) from exc
+        return _with_attributes(principal, attributes)
+
+    async def _build_principal(self, token: AccessToken) -> Optional[_ResolvedPrincipal]:
+        metrics = self._metrics
+        started = time.perf_counter() if metrics is not None else 0.0
+        executor = self._principal_executor
         try:
-            principal = self._principal_builder(token)
+            if executor is None:
+                principal = self._principal_builder(token)
+            else:
+                if metrics is not None:
+                    metrics.observe_principal_queue(executor.pending)
+                principal = await executor.run(self._principal_builder, token)
             if inspect.isawaitable(principal):
                 principal = await principal
-        except Exception as exc:  # pragma: no cover - defensive logging
-            logger.exception("Principal builder failed", exc_info=exc)
+        except Exception as exc:
+            if isinstance(exc, TimeoutError):
+                reason = "principal_builder_timeout"
+                logger.warning("Principal builder timed out")
+            elif isinstance(exc, ExecutorSaturatedError):
+                reason = "principal_builder_busy"
+                logger.warning("Principal builder queue is full")
+            else:
+                reason = "principal_builder_error"
+                logger.exception("Principal builder failed", exc_info=exc)
+            if metrics is not None:
+                metrics.record_error("", "", reason)
             raise McpError(
                 ErrorData(
                     code=-32010,
                     message="Unauthorized",
-                    data="principal_builder_error",
+                    data=reason,
                 )
             ) from exc
 
-        if principal is not None and not isinstance(principal, Principal):
+        if principal is None:
+            return None
+        if not isinstance(principal, Principal):
             raise TypeError(
                 "principal_builder must return a cerbos.sdk.model.Principal"
             )
-        return principal
+        if self._principal_enricher is not None:
+            principal = await self._enrich_principal(principal)
+
+        if metrics is None:
+            principal_pb = _principal_to_proto(principal)
+        else:
+            built = time.perf_counter()
+            metrics.observe_principal_build(built - started)
+            principal_pb = _principal_to_proto(principal)
+            metrics.observe_serialization("principal", time.perf_counter() - built)
+
+        resolved = _ResolvedPrincipal(principal, principal_pb)
+        if self._principal_cache is not None:
+            self._principal_cache.set(token, resolved)
+        return resolved
+
+
+async def _check_resources(
+    client: AsyncCerbosClient,
+    principal_pb: engine_pb2.Principal,
+    entries: list[request_pb2.CheckResourcesRequest.ResourceEntry],
+    metadata: Sequence[tuple[str, str]],
+) -> response_pb2.CheckResourcesResponse:
+    """Send a CheckResources request, attaching gRPC ``metadata`` when there is any.
+
+    ``AsyncCerbosClient.check_resources`` has no metadata argument, so requests that carry
+    metadata go through the client's service stub. Other clients are called as usual.
+    """
+    if isinstance(client, CerbosClientPool):
+        return await client.check_resources(principal_pb, entries, metadata=metadata)
+    stub = getattr(client, "_client", None)
+    if metadata and isinstance(client, AsyncCerbosClient) and stub is not None:
+        request = request_pb2.CheckResourcesRequest(
+            request_id=str(uuid.uuid4()), principal=principal_pb, resources=entries
+        )
+        return await stub.CheckResources(request, metadata=tuple(metadata))
+    return await client.check_resources(principal=principal_pb, resources=entries)
+
+
+async def _plan_resources(
+    client: AsyncCerbosClient,
+    action: str,
+    principal_pb: engine_pb2.Principal,
+    resource_pb: engine_pb2.PlanResourcesInput.Resource,
+    metadata: Sequence[tuple[str, str]],
+) -> response_pb2.PlanResourcesResponse:
+    """Send a PlanResources request, attaching gRPC ``metadata`` like ``_check_resources``."""
+    if isinstance(client, CerbosClientPool):
+        return await client.plan_resources(action, principal_pb, resource_pb, metadata=metadata)
+    stub = getattr(client, "_client", None)
+    if metadata and isinstance(client, AsyncCerbosClient) and stub is not None:
+        request = request_pb2.PlanResourcesRequest(
+            request_id=str(uuid.uuid4()),
+            action=action,
+            principal=principal_pb,
+            resource=resource_pb,
+        )
+        return await stub.PlanResources(request, metadata=tuple(metadata))
+    return await client.plan_resources(action=action, principal=principal_pb, resource=resource_pb)
+
+
+def _rule_outputs(entry: response_pb2.CheckResourcesResponse.ResultEntry) -> _Outputs:
+    return tuple(
+        {"src": output.src, "val": json_format.MessageToDict(output.val)}
+        for output in entry.outputs
+    )
+
+
+def _method(action: str) -> str:
+    """Return the MCP method an action belongs to, e.g. ``tools/call`` for ``tools/call::greet``."""
+    return action.partition("::")[0]
+
+
+def _batch_labels(actions: Iterable[str]) -> tuple[str, str]:
+    """Return ``(method, action)`` metric labels for a request covering ``actions``."""
+    distinct = set(actions)
+    if len(distinct) == 1:
+        action = distinct.pop()
+        return _method(action), action
+    methods = {_method(action) for action in distinct}
+    method = methods.pop() if len(methods) == 1 else "batch"
+    return method, method
+
+
+def _project_attributes(
+    attr: Mapping[str, Any], paths: Iterable[AttributePath]
+) -> dict[str, Any]:
+    """Copy only the values at ``paths`` (and everything below them) out of ``attr``."""
+    projected: dict[str, Any] = {}
+    included: set[AttributePath] = set()
+    for path in sorted(paths, key=len):
+        if any(path[:depth] in included for depth in range(1, len(path))):
+            continue
+        source: Any = attr
+        target = projected
+        for depth, segment in enumerate(path, start=1):
+            if segment not in source:
+                break
+            value = source[segment]
+            # Values that cannot be narrowed further are copied whole
+            if depth == len(path) or not isinstance(value, Mapping):
+                target[segment] = value
+                included.add(path[:depth])
+                break
+            source = value
+            target = target.setdefault(segment, {})
+    return projected
 
 
 def _python_to_protobuf_value(value: Any) -> struct_pb2.Value:
-    """Recursively convert Python values to protobuf Value."""
+    """Convert a Python value to a protobuf Value."""
+    target = struct_pb2.Value()
+    _set_protobuf_value(target, value)
+    return target
+
+
+def _set_protobuf_value(target: struct_pb2.Value, value: Any) -> None:
+    """Write ``value`` into ``target`` in place, recursing into containers.
+
+    Nested dicts and lists are filled directly inside the parent message instead of being
+    built separately and copied in.
+    """
     if value is None:
-        return struct_pb2.Value(null_value=struct_pb2.NullValue.NULL_VALUE)
+        target.null_value = struct_pb2.NullValue.NULL_VALUE
     elif isinstance(value, str):
-        return struct_pb2.Value(string_value=value)
+        target.string_value = value
     elif isinstance(value, bool):
-        return struct_pb2.Value(bool_value=value)
+        target.bool_value = value
     elif isinstance(value, (int, float)):
-        return struct_pb2.Value(number_value=float(value))
-    elif isinstance(value, dict):
-        struct_value = struct_pb2.Struct()
-        for k, v in value.items():
-            struct_value.fields[k].CopyFrom(_python_to_protobuf_value(v))
-        return struct_pb2.Value(struct_value=struct_value)
+        target.number_value = float(value)
+    elif isinstance(value, Mapping):
+        struct_value = target.struct_value
+        struct_value.SetInParent()
+        fields = struct_value.fields
+        for key, item in value.items():
+            _set_protobuf_value(fields[str(key)], item)
     elif isinstance(value, (list, tuple)):
-        list_value = struct_pb2.ListValue()
+        list_value = target.list_value
+        list_value.SetInParent()
+        values = list_value.values
         for item in value:
-            list_value.values.append(_python_to_protobuf_value(item))
-        return struct_pb2.Value(list_value=list_value)
+            _set_protobuf_value(values.add(), item)
+    elif isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        target.string_value = value.isoformat()
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        # Same encoding protobuf JSON uses for bytes fields
+        target.string_value = base64.b64encode(value).decode("ascii")
+    elif type(value).__module__ == "numpy" and hasattr(value, "tolist"):
+        # numpy scalars and arrays convert to the equivalent Python values
+        _set_protobuf_value(target, value.tolist())
+    elif hasattr(value, "model_dump"):
+        # pydantic models
+        _set_protobuf_value(target, value.model_dump(mode="json"))
     else:
         # Fallback to string representation for other types
-        return struct_pb2.Value(string_value=str(value))
+        target.string_value = str(value)
 
 
 def _principal_to_proto(principal: Principal) -> engine_pb2.Principal:
-    # Convert attributes to struct_pb2.Value format recursively
-    attr = {}
-    for key, value in principal.attr.items():
-        attr[key] = _python_to_protobuf_value(value)
-
-    return engine_pb2.Principal(
+    principal_pb = engine_pb2.Principal(
         id=principal.id,
         policy_version=principal.policy_version,
         roles=principal.roles,
-        attr=attr,
     )
+    attr = principal_pb.attr
+    for key, value in principal.attr.items():
+        _set_protobuf_value(attr[key], value)
+    return principal_pb
 
 
 def _resource_to_proto(resource: Resource) -> engine_pb2.Resource:
-    # Convert attributes to struct_pb2.Value format recursively
-    attr = {}
-    for key, value in resource.attr.items():
-        attr[key] = _python_to_protobuf_value(value)
-
-    return engine_pb2.Resource(
+    resource_pb = engine_pb2.Resource(
         id=resource.id,
         kind=resource.kind,
         policy_version=resource.policy_version,
-        attr=attr,
     )
+    attr = resource_pb.attr
+    for key, value in resource.attr.items():
+        _set_protobuf_value(attr[key], value)
+    return resource_pb
+
+
+def _decision_key(
+    principal_pb: engine_pb2.Principal, action: str, resource_pb: engine_pb2.Resource
+) -> bytes:
+    digest = hashlib.blake2b(digest_size=20)
+    for part in (
+        principal_pb.SerializeToString(deterministic=True),
+        action.encode(),
+        resource_pb.SerializeToString(deterministic=True),
+    ):
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.digest()
+
+
+def _session(context: MiddlewareContext[Any]) -> Any:
+    """The MCP session a request belongs to, or ``None`` outside a live request."""
+    if context.fastmcp_context is None:
+        return None
+    try:
+        return context.fastmcp_context.session
+    except (RuntimeError, ValueError):
+        return None
+
+
+def _is_async_callable(func: Any) -> bool:
+    return inspect.iscoroutinefunction(func) or (
+        callable(func) and inspect.iscoroutinefunction(type(func).__call__)
+    )
+
+
+def _token_key(token: AccessToken) -> bytes:
+    return hashlib.sha256(token.token.encode()).digest()
+
+
+def _parse_hosts(hosts: Optional[str | Sequence[str]]) -> Optional[str | tuple[str, ...]]:
+    """Split comma-separated hosts; several hosts are balanced by a ``CerbosClientPool``."""
+    if hosts is None:
+        return None
+    if isinstance(hosts, str):
+        hosts = hosts.split(",")
+    parsed = tuple(host.strip() for host in hosts if host.strip())
+    if len(parsed) == 1:
+        return parsed[0]
+    return parsed or None
 
 
 def _env_tls(name: str, default: bool | str) -> bool | str:
@@ -0,0 +1,365 @@
+"""Client-side load balancing across several Cerbos PDP endpoints."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import socket
+import uuid
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterable, Literal, Optional, Sequence, TypeVar
+
+import grpc
+from cerbos.engine.v1 import engine_pb2
+from cerbos.request.v1 import request_pb2
+from cerbos.response.v1 import response_pb2
+from cerbos.sdk.grpc.client import AsyncCerbosClient
+from cerbos.sdk.model import Principal, Resource
+from fastmcp.utilities import logging
+
+logger = logging.get_logger("cerbos_middleware.pool")
+
+_T = TypeVar("_T")
+
+DEFAULT_PORT = 3593
+
+
+@dataclass(frozen=True)
+class EndpointStatus:
+    """A snapshot of one endpoint in a ``CerbosClientPool``."""
+
+    host: str
+    healthy: bool
+    outstanding: int
+    requests: int
+
+
+@dataclass
+class PoolStats:
+    """Counters describing how requests were spread across endpoints."""
+
+    hedged: int = 0
+    ejections: int = 0
+
+
+class _Endpoint:
+    __slots__ = ("host", "client", "healthy", "outstanding", "requests")
+
+    def __init__(self, host: str, client: Any) -> None:
+        self.host = host
+        self.client = client
+        self.healthy = True
+        self.outstanding = 0
+        self.requests = 0
+
+
+class CerbosClientPool:
+    """Send PDP requests to several Cerbos replicas with client-side load balancing.
+
+    One gRPC channel is kept per endpoint. Each request goes to the healthy endpoint with
+    the fewest requests in flight: ``balancing="least_outstanding"`` compares every
+    endpoint, ``"power_of_two"`` compares two picked at random, which scales to large
+    pools. An endpoint that fails a ``server_info`` health check, or a request with
+    ``UNAVAILABLE``, is ejected until a later health check succeeds. Health checks run in
+    the background every ``health_check_interval`` seconds.
+
+    With ``resolve_dns=True`` each host is a DNS name whose addresses are all used as
+    endpoints and re-resolved at every health check, for example a Kubernetes headless
+    service. With ``hedge_after`` set, a request still running after that many seconds
+    is also sent to a second endpoint and the first response wins.
+
+    The pool can be passed as ``cerbos_client``; channels are created on first use, in
+    the running event loop. Call ``close()`` when done.
+    """
+
+    def __init__(
+        self,
+        hosts: Iterable[str],
+        *,
+        tls_verify: bool | str = False,
+        balancing: Literal["least_outstanding", "power_of_two"] = "power_of_two",
+        health_check_interval: float = 5.0,
+        health_check_timeout: float = 1.0,
+        hedge_after: Optional[float] = None,
+        resolve_dns: bool = False,
+        channel_options: Optional[dict[str, Any]] = None,
+        client_factory: Optional[Callable[[str], Any]] = None,
+    ) -> None:
+        self.hosts = tuple(_with_default_port(host) for host in hosts)
+        if not self.hosts:
+            raise ValueError("hosts must not be empty")
+        if balancing not in ("least_outstanding", "power_of_two"):
+            raise ValueError("balancing must be 'least_outstanding' or 'power_of_two'")
+        if health_check_interval <= 0 or health_check_timeout <= 0:
+            raise ValueError("health check interval and timeout must be greater than zero")
+        if hedge_after is not None and hedge_after <= 0:
+            raise ValueError("hedge_after must be greater than zero")
+
+        self._tls_verify = tls_verify
+        self._balancing = balancing
+        self._health_check_interval = health_check_interval
+        self._health_check_timeout = health_check_timeout
+        self._hedge_after = hedge_after
+        self._resolve_dns = resolve_dns
+        self._channel_options = dict(channel_options or {})
+        self._client_factory = client_factory
+        self._endpoints: dict[str, _Endpoint] = {}
+        # Endpoints dropped from DNS, closed once their requests finish
+        self._retired: list[_Endpoint] = []
+        self._start_lock = asyncio.Lock()
+        self._health_task: Optional[asyncio.Task[None]] = None
+        self.stats = PoolStats()
+
+    @property
+    def endpoints(self) -> tuple[EndpointStatus, ...]:
+        return tuple(
+            EndpointStatus(e.host, e.healthy, e.outstanding, e.requests)
+            for e in self._endpoints.values()
+        )
+
+    async def is_allowed(self, action: str, principal: Principal, resource: Resource) -> bool:
+        return await self._dispatch(lambda client: client.is_allowed(action, principal, resource))
+
+    async def check_resources(
+        self,
+        principal: engine_pb2.Principal,
+        resources: list[request_pb2.CheckResourcesRequest.ResourceEntry],
+        request_id: Optional[str] = None,
+        aux_data: Optional[request_pb2.AuxData] = None,
+        *,
+        metadata: Sequence[tuple[str, str]] = (),
+    ) -> response_pb2.CheckResourcesResponse:
+        if not metadata:
+            return await self._dispatch(
+                lambda client: client.check_resources(
+                    principal=principal,
+                    resources=resources,
+                    request_id=request_id,
+                    aux_data=aux_data,
+                )
+            )
+        request = request_pb2.CheckResourcesRequest(
+            request_id=request_id or str(uuid.uuid4()),
+            principal=principal,
+            resources=resources,
+            aux_data=aux_data,
+        )
+        return await self._dispatch(
+            lambda client: client._client.CheckResources(request, metadata=tuple(metadata))
+        )
+
+    async def plan_resources(
+        self,
+        action: str | list[str],
+        principal: engine_pb2.Principal,
+        resource: engine_pb2.PlanResourcesInput.Resource,
+        request_id: Optional[str] = None,
+        aux_data: Optional[request_pb2.AuxData] = None,
+        *,
+        metadata: Sequence[tuple[str, str]] = (),
+    ) -> response_pb2.PlanResourcesResponse:
+        if not metadata:
+            return await self._dispatch(
+                lambda client: client.plan_resources(
+                    action=action,
+                    principal=principal,
+                    resource=resource,
+                    request_id=request_id,
+                    aux_data=aux_data,
+                )
+            )
+        actions = {"action": action} if isinstance(action, str) else {"actions": action}
+        request = request_pb2.PlanResourcesRequest(
+            request_id=request_id or str(uuid.uuid4()),
+            principal=principal,
+            resource=resource,
+            aux_data=aux_data,
+            **actions,
+        )
+        return await self._dispatch(
+            lambda client: client._client.PlanResources(request, metadata=tuple(metadata))
+        )
+
+    async def server_info(self) -> response_pb2.ServerInfoResponse:
+        return await self._dispatch(lambda client: client.server_info())
+
+    async def check_health(self) -> None:
+        """Re-resolve DNS names and probe every endpoint once."""
+        await self._start()
+        if self._resolve_dns:
+            await self._refresh_endpoints()
+        await asyncio.gather(*(self._probe(endpoint) for endpoint in self._endpoints.values()))
+        retired, self._retired = self._retired, []
+        for endpoint in retired:
+            if endpoint.outstanding:
+                self._retired.append(endpoint)
+            else:
+                await endpoint.client.close()
+
+    async def close(self) -> None:
+        task, self._health_task = self._health_task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        endpoints = [*self._endpoints.values(), *self._retired]
+        self._endpoints.clear()
+        self._retired.clear()
+        for endpoint in endpoints:
+            await endpoint.client.close()
+
+    async def _start(self) -> None:
+        if self._endpoints:
+            return
+        async with self._start_lock:
+            if self._endpoints:
+                return
+            if self._resolve_dns:
+                await self._refresh_endpoints()
+            else:
+                for host in self.hosts:
+                    self._endpoints[host] = _Endpoint(host, self._new_client(host, host))
+            self._health_task = asyncio.ensure_future(self._health_loop())
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._health_check_interval)
+            try:
+                await self.check_health()
+            except Exception as exc:  # pragma: no cover - defensive logging
+                logger.exception("Cerbos endpoint health check failed", exc_info=exc)
+
+    async def _probe(self, endpoint: _Endpoint) -> None:
+        try:
+            async with asyncio.timeout(self._health_check_timeout):
+                await endpoint.client.server_info()
+        except Exception as exc:
+            if endpoint.healthy:
+                logger.warning(
+                    "Ejecting unhealthy Cerbos endpoint",
+                    extra={"host": endpoint.host, "reason": repr(exc)},
+                )
+                self.stats.ejections += 1
+            endpoint.healthy = False
+        else:
+            if not endpoint.healthy:
+                logger.info("Cerbos endpoint is healthy again", extra={"host": endpoint.host})
+            endpoint.healthy = True
+
+    async def _refresh_endpoints(self) -> None:
+        resolved: dict[str, str] = {}
+        for name in self.hosts:
+            host, port = _split_host_port(name)
+            try:
+                infos = await asyncio.get_running_loop().getaddrinfo(
+                    host, port, type=socket.SOCK_STREAM
+                )
+            except OSError as exc:
+                logger.warning(
+                    "Resolving Cerbos endpoints failed", extra={"host": name, "reason": repr(exc)}
+                )
+                continue
+            for family, _, _, _, sockaddr in infos:
+                address = sockaddr[0]
+                if family == socket.AF_INET6:
+                    address = f"[{address}]"
+                resolved[f"{address}:{port}"] = host
+        if not resolved:
+            # Keep the current endpoints, or fall back to letting gRPC resolve the names
+            if not self._endpoints:
+                resolved = {name: _split_host_port(name)[0] for name in self.hosts}
+            else:
+                return
+
+        for address in self._endpoints.keys() - resolved.keys():
+            self._retired.append(self._endpoints.pop(address))
+        for address, host in resolved.items():
+            if address not in self._endpoints:
+                self._endpoints[address] = _Endpoint(address, self._new_client(address, host))
+
+    def _new_client(self, address: str, host: str) -> Any:
+        if self._client_factory is not None:
+            return self._client_factory(address)
+        options = dict(self._channel_options)
+        if self._tls_verify and address != host:
+            # Verify the certificate against the DNS name, not the resolved address
+            options.setdefault("grpc.ssl_target_name_override", host)
+        return AsyncCerbosClient(
+            address, tls_verify=self._tls_verify, channel_options=options or None
+        )
+
+    def _pick(self, exclude: Optional[_Endpoint] = None) -> Optional[_Endpoint]:
+        candidates = [e for e in self._endpoints.values() if e.healthy and e is not exclude]
+        if not candidates:
+            if exclude is not None:
+                return None
+            # Every endpoint is ejected; trying one beats failing without asking
+            candidates = list(self._endpoints.values())
+        if self._balancing == "power_of_two" and len(candidates) > 2:
+            candidates = random.sample(candidates, 2)
+        fewest = min(endpoint.outstanding for endpoint in candidates)
+        return random.choice([e for e in candidates if e.outstanding == fewest])
+
+    async def _dispatch(self, call: Callable[[Any], Awaitable[_T]]) -> _T:
+        await self._start()
+        primary = self._pick()
+        assert primary is not None
+        if self._hedge_after is None:
+            return await self._send(primary, call)
+
+        tasks = [asyncio.ensure_future(self._send(primary, call))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self._hedge_after)
+            if not done:
+                secondary = self._pick(exclude=primary)
+                if secondary is not None:
+                    self.stats.hedged += 1
+                    tasks.append(asyncio.ensure_future(self._send(secondary, call)))
+            pending = set(tasks)
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                if not pending:
+                    # Every attempt failed; report the first request's error
+                    return tasks[0].result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _send(self, endpoint: _Endpoint, call: Callable[[Any], Awaitable[_T]]) -> _T:
+        endpoint.outstanding += 1
+        endpoint.requests += 1
+        try:
+            return await call(endpoint.client)
+        except grpc.RpcError as exc:
+            code = getattr(exc, "code", None)
+            if callable(code) and code() == grpc.StatusCode.UNAVAILABLE and endpoint.healthy:
+                logger.warning(
+                    "Ejecting unavailable Cerbos endpoint", extra={"host": endpoint.host}
+                )
+                endpoint.healthy = False
+                self.stats.ejections += 1
+            raise
+        finally:
+            endpoint.outstanding -= 1
+
+
+def _with_default_port(name: str) -> str:
+    """Return ``name`` with ``DEFAULT_PORT`` added when it names a host without a port."""
+    if name.startswith("unix:"):
+        return name
+    if name.startswith("["):
+        return name if "]:" in name else f"{name}:{DEFAULT_PORT}"
+    if ":" not in name:
+        return f"{name}:{DEFAULT_PORT}"
+    if name.count(":") > 1:
+        # A bare IPv6 address
+        return f"[{name}]:{DEFAULT_PORT}"
+    return name
+
+
+def _split_host_port(name: str) -> tuple[str, str]:
+    host, _, port = name.rpartition(":")
+    return host.strip("[]"), port
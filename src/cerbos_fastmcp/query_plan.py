@@ -0,0 +1,400 @@
+"""Cerbos query plans, compiled into record filters for data-returning tools."""
+
+from __future__ import annotations
+
+import operator
+import re
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Literal, Mapping, Optional, TypeVar
+
+from cerbos.engine.v1 import engine_pb2
+from cerbos.response.v1 import response_pb2
+from google.protobuf import json_format
+
+_R = TypeVar("_R")
+
+_Operand = engine_pb2.PlanResourcesFilter.Expression.Operand
+_Getter = Callable[[Any], Any]
+
+# Variable prefixes the PDP uses for resource attributes in plan conditions
+_ATTRIBUTE_PREFIXES = ("request.resource.attr.", "R.attr.")
+_ID_VARIABLES = frozenset({"request.resource.id", "R.id"})
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*\Z")
+
+_COMPARISONS: dict[str, tuple[Callable[[Any, Any], bool], str]] = {
+    "eq": (operator.eq, "="),
+    "ne": (operator.ne, "<>"),
+    "lt": (operator.lt, "<"),
+    "le": (operator.le, "<="),
+    "gt": (operator.gt, ">"),
+    "ge": (operator.ge, ">="),
+}
+_STRING_TESTS: dict[str, tuple[Callable[[str, str], bool], str, str]] = {
+    "contains": (operator.contains, "%", "%"),
+    "startsWith": (str.startswith, "", "%"),
+    "endsWith": (str.endswith, "%", ""),
+}
+
+_KINDS = {
+    engine_pb2.PlanResourcesFilter.KIND_ALWAYS_ALLOWED: "always_allowed",
+    engine_pb2.PlanResourcesFilter.KIND_ALWAYS_DENIED: "always_denied",
+    engine_pb2.PlanResourcesFilter.KIND_CONDITIONAL: "conditional",
+}
+
+
+class UnsupportedPlanError(ValueError):
+    """Raised when a plan condition uses an operator or variable a compiler cannot express."""
+
+
+@dataclass(frozen=True)
+class PlannedResource:
+    """The resource kind of the records a tool returns, and the action to plan for."""
+
+    kind: str
+    action: str = "read"
+    policy_version: str = ""
+    scope: str = ""
+
+    def __post_init__(self) -> None:
+        if not self.kind:
+            raise ValueError("kind must not be empty")
+        if not self.action:
+            raise ValueError("action must not be empty")
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    """A Cerbos query plan: which records of ``resource_kind`` a principal may access.
+
+    ``kind`` is ``"always_allowed"``, ``"always_denied"``, or ``"conditional"``; a
+    conditional plan holds the condition the PDP left after substituting everything
+    it knows about the principal. Conditions refer to resource attributes as fields:
+    ``R.attr.region`` becomes ``region`` and ``R.attr.owner.team`` becomes
+    ``owner.team``, while ``R.id`` becomes ``id``.
+
+    ``predicate()`` compiles the plan into a Python function for filtering records in
+    memory, and ``to_sql()`` into a parameterized SQL ``WHERE`` fragment.
+    """
+
+    action: str
+    resource_kind: str
+    kind: Literal["always_allowed", "always_denied", "conditional"]
+    condition: Optional[_Operand] = None
+
+    @classmethod
+    def from_response(cls, response: response_pb2.PlanResourcesResponse) -> QueryPlan:
+        kind = _KINDS.get(response.filter.kind)
+        if kind is None:
+            raise UnsupportedPlanError(f"unknown plan kind {response.filter.kind}")
+        return cls(
+            action=response.action or ",".join(response.actions),
+            resource_kind=response.resource_kind,
+            kind=kind,
+            condition=response.filter.condition if kind == "conditional" else None,
+        )
+
+    @property
+    def always_allowed(self) -> bool:
+        return self.kind == "always_allowed"
+
+    @property
+    def always_denied(self) -> bool:
+        return self.kind == "always_denied"
+
+    def predicate(self, fields: Optional[Mapping[str, str]] = None) -> Callable[[Any], bool]:
+        """Compile the plan into a function that tells whether a record is accessible.
+
+        Records may be mappings or objects; a dotted field such as ``owner.team`` is
+        looked up one level at a time. ``fields`` renames plan fields to the record's
+        own keys or attribute paths. Missing fields read as ``None``, which compares
+        like SQL ``NULL``: a comparison with it is unknown, ``not`` of unknown is still
+        unknown, and only records for which the condition is true are accessible. The
+        predicate therefore never selects a record that ``to_sql()`` would exclude.
+        """
+        if self.kind != "conditional":
+            allowed = self.always_allowed
+            return lambda record: allowed
+        assert self.condition is not None
+        compiled = _PredicateCompiler(fields or {}).compile(self.condition)
+        return lambda record: _truth(compiled(record)) is True
+
+    def filter(self, records: Iterable[_R], fields: Optional[Mapping[str, str]] = None) -> list[_R]:
+        """Return the accessible ``records``, in order."""
+        if self.always_denied:
+            return []
+        predicate = self.predicate(fields)
+        return [record for record in records if predicate(record)]
+
+    def to_sql(
+        self,
+        columns: Optional[Mapping[str, str]] = None,
+        *,
+        paramstyle: Literal["qmark", "format", "numeric"] = "qmark",
+    ) -> tuple[str, list[Any]]:
+        """Compile the plan into a SQL ``WHERE`` fragment and its parameters.
+
+        Values are always passed as parameters, using the DB-API ``paramstyle``:
+        ``?`` (``qmark``, sqlite3), ``%s`` (``format``, psycopg), or ``$1``
+        (``numeric``, asyncpg). ``columns`` maps plan fields to column expressions,
+        which are inserted as written; unmapped fields must be plain identifiers.
+        """
+        if self.kind != "conditional":
+            return ("1 = 1" if self.always_allowed else "1 = 0"), []
+        assert self.condition is not None
+        compiler = _SQLCompiler(columns or {}, paramstyle)
+        return compiler.compile(self.condition), compiler.params
+
+
+_current_plan: ContextVar[Optional[QueryPlan]] = ContextVar(
+    "cerbos_fastmcp_query_plan", default=None
+)
+
+
+def get_query_plan() -> QueryPlan:
+    """Return the query plan computed for the tool call being handled.
+
+    Raises ``RuntimeError`` outside a tool listed in the middleware's
+    ``tool_query_plans``.
+    """
+    plan = _current_plan.get()
+    if plan is None:
+        raise RuntimeError("No Cerbos query plan for this call; add the tool to tool_query_plans")
+    return plan
+
+
+def _field(variable: str) -> str:
+    if variable in _ID_VARIABLES:
+        return "id"
+    for prefix in _ATTRIBUTE_PREFIXES:
+        if variable.startswith(prefix):
+            return variable[len(prefix) :]
+    raise UnsupportedPlanError(f"unsupported plan variable {variable!r}")
+
+
+def _value(operand: _Operand) -> Any:
+    return _integral(json_format.MessageToDict(operand.value))
+
+
+def _integral(value: Any) -> Any:
+    # protobuf numbers are doubles; whole numbers are turned back into ints for drivers
+    # that type parameters strictly
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, list):
+        return [_integral(item) for item in value]
+    return value
+
+
+def _expression(operand: _Operand) -> tuple[str, list[_Operand]]:
+    expression = operand.expression
+    return expression.operator, list(expression.operands)
+
+
+class _PredicateCompiler:
+    def __init__(self, fields: Mapping[str, str]) -> None:
+        self._fields = fields
+
+    def compile(self, operand: _Operand) -> _Getter:
+        which = operand.WhichOneof("node")
+        if which == "value":
+            value = _value(operand)
+            return lambda record: value
+        if which == "variable":
+            return self._getter(operand.variable)
+        if which != "expression":
+            raise UnsupportedPlanError("empty plan operand")
+
+        name, operands = _expression(operand)
+        args = [self.compile(child) for child in operands]
+        if name == "and":
+            return lambda record: _all(arg(record) for arg in args)
+        if name == "or":
+            return lambda record: _any(arg(record) for arg in args)
+        if name == "not" and len(args) == 1:
+            (inner,) = args
+            return lambda record: _negate(inner(record))
+        if len(args) != 2:
+            raise UnsupportedPlanError(f"unsupported plan operator {name!r}")
+
+        left, right = args
+        if name in ("eq", "ne"):
+            null = self._null_test(*operands, negate=name == "ne")
+            if null is not None:
+                return null
+        if name in _COMPARISONS:
+            compare = _COMPARISONS[name][0]
+            return lambda record: _compare(compare, left(record), right(record))
+        if name == "in":
+            return lambda record: _compare(operator.contains, right(record), left(record))
+        if name in _STRING_TESTS:
+            test = _STRING_TESTS[name][0]
+            return lambda record: _strings(test, left(record), right(record))
+        if name == "isSet":
+            return lambda record: (left(record) is not None) == bool(right(record))
+        if name == "hasIntersection":
+            return lambda record: _intersects(left(record), right(record))
+        raise UnsupportedPlanError(f"unsupported plan operator {name!r}")
+
+    def _null_test(self, left: _Operand, right: _Operand, *, negate: bool) -> Optional[_Getter]:
+        # Comparing with a null literal is the SQL compiler's IS NULL test, not unknown
+        for column, value in ((left, right), (right, left)):
+            if value.WhichOneof("node") == "value" and _value(value) is None:
+                get = self.compile(column)
+                return lambda record: (get(record) is None) != negate
+        return None
+
+    def _getter(self, variable: str) -> _Getter:
+        path = tuple(self._fields.get(_field(variable), _field(variable)).split("."))
+
+        def get(record: Any) -> Any:
+            for part in path:
+                if record is None:
+                    return None
+                if isinstance(record, Mapping):
+                    record = record.get(part)
+                else:
+                    record = getattr(record, part, None)
+            return record
+
+        return get
+
+
+# Conditions use SQL's three-valued logic: None is unknown, and stays unknown under
+# ``not``, so a missing value can never make a negated comparison true
+def _truth(value: Any) -> Optional[bool]:
+    return None if value is None else bool(value)
+
+
+def _negate(value: Any) -> Optional[bool]:
+    truth = _truth(value)
+    return None if truth is None else not truth
+
+
+def _all(values: Iterable[Any]) -> Optional[bool]:
+    result: Optional[bool] = True
+    for value in values:
+        truth = _truth(value)
+        if truth is False:
+            return False
+        if truth is None:
+            result = None
+    return result
+
+
+def _any(values: Iterable[Any]) -> Optional[bool]:
+    result: Optional[bool] = False
+    for value in values:
+        truth = _truth(value)
+        if truth is True:
+            return True
+        if truth is None:
+            result = None
+    return result
+
+
+def _compare(compare: Callable[[Any, Any], bool], left: Any, right: Any) -> Optional[bool]:
+    # Comparing missing or incompatible values is unknown
+    if left is None or right is None:
+        return None
+    try:
+        return compare(left, right)
+    except TypeError:
+        return None
+
+
+def _strings(test: Callable[[str, str], bool], left: Any, right: Any) -> Optional[bool]:
+    if not isinstance(left, str) or not isinstance(right, str):
+        return None
+    return test(left, right)
+
+
+def _intersects(left: Any, right: Any) -> Optional[bool]:
+    if left is None or right is None:
+        return None
+    try:
+        return not set(left).isdisjoint(right)
+    except TypeError:
+        return None
+
+
+class _SQLCompiler:
+    def __init__(self, columns: Mapping[str, str], paramstyle: str) -> None:
+        if paramstyle not in ("qmark", "format", "numeric"):
+            raise ValueError("paramstyle must be 'qmark', 'format', or 'numeric'")
+        self._columns = columns
+        self._paramstyle = paramstyle
+        self.params: list[Any] = []
+
+    def compile(self, operand: _Operand) -> str:
+        which = operand.WhichOneof("node")
+        if which == "value":
+            return self._param(_value(operand))
+        if which == "variable":
+            return self._column(operand.variable)
+        if which != "expression":
+            raise UnsupportedPlanError("empty plan operand")
+
+        name, operands = _expression(operand)
+        if name in ("and", "or") and operands:
+            joined = f" {name.upper()} ".join(self.compile(child) for child in operands)
+            return f"({joined})"
+        if name == "not" and len(operands) == 1:
+            return f"NOT ({self.compile(operands[0])})"
+        if len(operands) != 2:
+            raise UnsupportedPlanError(f"unsupported plan operator {name!r} for SQL")
+
+        left, right = operands
+        if name in ("eq", "ne"):
+            null = self._null_test(left, right, negate=name == "ne")
+            if null is not None:
+                return null
+        if name in _COMPARISONS:
+            symbol = _COMPARISONS[name][1]
+            return f"{self.compile(left)} {symbol} {self.compile(right)}"
+        if name == "in" and right.WhichOneof("node") == "value":
+            values = _value(right)
+            if not isinstance(values, list):
+                raise UnsupportedPlanError("'in' needs a list of values for SQL")
+            if not values:
+                return "1 = 0"
+            column = self.compile(left)
+            return f"{column} IN ({', '.join(self._param(value) for value in values)})"
+        if name in _STRING_TESTS and right.WhichOneof("node") == "value":
+            _, before, after = _STRING_TESTS[name]
+            pattern = before + _escape_like(str(_value(right))) + after
+            return f"{self.compile(left)} LIKE {self._param(pattern)} ESCAPE '!'"
+        if name == "isSet" and right.WhichOneof("node") == "value":
+            test = "IS NOT NULL" if _value(right) else "IS NULL"
+            return f"{self.compile(left)} {test}"
+        raise UnsupportedPlanError(f"unsupported plan operator {name!r} for SQL")
+
+    def _null_test(self, left: _Operand, right: _Operand, *, negate: bool) -> Optional[str]:
+        for column, value in ((left, right), (right, left)):
+            if value.WhichOneof("node") == "value" and _value(value) is None:
+                return f"{self.compile(column)} {'IS NOT NULL' if negate else 'IS NULL'}"
+        return None
+
+    def _column(self, variable: str) -> str:
+        field = _field(variable)
+        column = self._columns.get(field)
+        if column is not None:
+            return column
+        if not _IDENTIFIER.match(field):
+            raise UnsupportedPlanError(f"map the plan field {field!r} to a column")
+        return field
+
+    def _param(self, value: Any) -> str:
+        if isinstance(value, (list, dict)):
+            raise UnsupportedPlanError("lists and maps cannot be SQL parameters")
+        self.params.append(value)
+        if self._paramstyle == "qmark":
+            return "?"
+        if self._paramstyle == "format":
+            return "%s"
+        return f"${len(self.params)}"
+
+
+def _escape_like(value: str) -> str:
+    # "!" rather than a backslash, which MySQL and MariaDB also treat as a string escape
+    return value.replace("!", "!!").replace("%", "!%").replace("_", "!_")
@@ -0,0 +1,192 @@
+"""Deadlines, retries, and a circuit breaker around requests to the Cerbos PDP."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Literal, Optional, TypeVar
+
+import grpc
+
+_T = TypeVar("_T")
+
+# gRPC status codes that indicate a PDP or network problem rather than a bad request
+DEFAULT_RETRY_CODES = frozenset({"UNAVAILABLE", "DEADLINE_EXCEEDED", "ABORTED"})
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the PDP while the circuit breaker is open."""
+
+
+@dataclass
+class CircuitBreakerStats:
+    """Counters describing circuit breaker transitions."""
+
+    opened: int = 0
+    rejected: int = 0
+
+
+class CircuitBreaker:
+    """Stop calling the PDP after repeated failures, then probe it before resuming.
+
+    After ``failure_threshold`` consecutive failures (timeouts or retryable gRPC errors)
+    the breaker opens and every request fails immediately with ``CircuitOpenError``.
+    Once ``recovery_time`` seconds have passed it lets ``half_open_max_calls`` trial
+    requests through: a success closes the breaker, a failure opens it again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_time: float = 30.0,
+        half_open_max_calls: int = 1,
+    ) -> None:
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be a positive integer")
+        if recovery_time <= 0:
+            raise ValueError("recovery_time must be greater than zero")
+        if half_open_max_calls < 1:
+            raise ValueError("half_open_max_calls must be a positive integer")
+
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.half_open_max_calls = half_open_max_calls
+        self.stats = CircuitBreakerStats()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trials = 0
+
+    @property
+    def state(self) -> Literal["closed", "open", "half_open"]:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.recovery_time:
+            return "open"
+        return "half_open"
+
+    def acquire(self) -> None:
+        """Admit one request, or raise ``CircuitOpenError``."""
+        state = self.state
+        if state == "closed":
+            return
+        if state == "half_open" and self._trials < self.half_open_max_calls:
+            self._trials += 1
+            return
+        self.stats.rejected += 1
+        raise CircuitOpenError("Cerbos PDP circuit breaker is open")
+
+    def release(self) -> None:
+        """Give back a trial slot taken by a request that was cancelled."""
+        self._trials = max(self._trials - 1, 0)
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._trials = 0
+
+    def record_failure(self) -> None:
+        if self._opened_at is not None:
+            # A failed trial request restarts the recovery period
+            self._trials = max(self._trials - 1, 0)
+            self._opened_at = time.monotonic()
+            return
+        self._failures += 1
+        if self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+            self.stats.opened += 1
+
+    def reset(self) -> None:
+        """Close the breaker and forget recorded failures."""
+        self.record_success()
+
+
+@dataclass
+class ResilienceStats:
+    """Counters describing retried and timed out PDP requests."""
+
+    retries: int = 0
+    timeouts: int = 0
+
+
+@dataclass
+class ResiliencePolicy:
+    """How the middleware calls the PDP: deadline, retries, and circuit breaker.
+
+    - ``timeout``: seconds allowed for one check, including its retries; ``None``
+      waits for the transport;
+    - ``max_retries``: further attempts after a failure with a status in
+      ``retry_codes``;
+    - ``backoff`` and ``max_backoff``: retry ``n`` sleeps for a random time between 0
+      and ``min(max_backoff, backoff * 2**n)`` seconds ("full jitter");
+    - ``circuit_breaker``: an optional ``CircuitBreaker`` shared by all requests.
+    """
+
+    timeout: Optional[float] = None
+    max_retries: int = 2
+    backoff: float = 0.05
+    max_backoff: float = 1.0
+    retry_codes: frozenset[str] = DEFAULT_RETRY_CODES
+    circuit_breaker: Optional[CircuitBreaker] = None
+    stats: ResilienceStats = field(default_factory=ResilienceStats, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.timeout is not None and self.timeout <= 0:
+            raise ValueError("timeout must be greater than zero")
+        if self.max_retries < 0:
+            raise ValueError("max_retries must not be negative")
+        if self.backoff < 0 or self.max_backoff < 0:
+            raise ValueError("backoff must not be negative")
+        self.retry_codes = frozenset(self.retry_codes)
+
+    async def run(self, call: Callable[[], Awaitable[_T]]) -> _T:
+        """Await ``call()`` under this policy, calling it again for each retry."""
+        try:
+            async with asyncio.timeout(self.timeout):
+                return await self._attempts(call)
+        except TimeoutError:
+            self.stats.timeouts += 1
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record_failure()
+            raise
+
+    async def _attempts(self, call: Callable[[], Awaitable[_T]]) -> _T:
+        breaker = self.circuit_breaker
+        attempt = 0
+        while True:
+            if breaker is not None:
+                breaker.acquire()
+            try:
+                result = await call()
+            except asyncio.CancelledError:
+                # An expired deadline is recorded as a failure by run()
+                if breaker is not None:
+                    breaker.release()
+                raise
+            except Exception as exc:
+                transient = self._is_transient(exc)
+                if breaker is not None:
+                    # Other errors mean the PDP answered, so it is healthy
+                    if transient:
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
+                if not transient or attempt >= self.max_retries:
+                    raise
+            else:
+                if breaker is not None:
+                    breaker.record_success()
+                return result
+
+            delay = random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+            attempt += 1
+            self.stats.retries += 1
+            await asyncio.sleep(delay)
+
+    def _is_transient(self, exc: Exception) -> bool:
+        if not isinstance(exc, grpc.RpcError):
+            return False
+        code = getattr(exc, "code", None)
+        status = code() if callable(code) else None
+        return isinstance(status, grpc.StatusCode) and status.name in self.retry_codes
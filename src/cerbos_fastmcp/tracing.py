@@ -0,0 +1,54 @@
+"""OpenTelemetry tracing for the authorization middleware."""
+
+from __future__ import annotations
+
+from typing import Any, ContextManager, Mapping, Optional
+
+
+class AuthorizationTracing:
+    """Emit OpenTelemetry spans for authorization and propagate trace context to the PDP.
+
+    Requires ``opentelemetry-api`` (``pip install 'cerbos-fastmcp[otel]'``). Spans are
+    created on ``tracer``, or on the global tracer provider's ``cerbos_fastmcp`` tracer
+    when omitted. With ``propagate=True`` the current context is injected into the gRPC
+    metadata of each ``CheckResources`` request using the globally configured
+    propagator, so the PDP's spans join the caller's trace.
+    """
+
+    def __init__(self, tracer: Optional[Any] = None, *, propagate: bool = True) -> None:
+        try:
+            from opentelemetry import propagate as otel_propagate
+            from opentelemetry import trace
+        except ImportError as exc:  # pragma: no cover - depends on installed extras
+            raise ImportError(
+                "AuthorizationTracing requires opentelemetry-api. Install with "
+                "`pip install 'cerbos-fastmcp[otel]'`."
+            ) from exc
+
+        self._trace = trace
+        self._tracer = tracer if tracer is not None else trace.get_tracer("cerbos_fastmcp")
+        self._inject = otel_propagate.inject if propagate else None
+        self._client_kind = trace.SpanKind.CLIENT
+
+    def span(
+        self, name: str, attributes: Optional[Mapping[str, Any]] = None, *, client: bool = False
+    ) -> ContextManager[Any]:
+        """Start a span as the current span; ``client=True`` marks an outgoing request."""
+        if client:
+            return self._tracer.start_as_current_span(
+                name, kind=self._client_kind, attributes=attributes
+            )
+        return self._tracer.start_as_current_span(name, attributes=attributes)
+
+    def add_event(self, name: str, attributes: Mapping[str, Any]) -> None:
+        """Add an event to the current span."""
+        self._trace.get_current_span().add_event(name, attributes=attributes)
+
+    def metadata(self) -> tuple[tuple[str, str], ...]:
+        """Return gRPC metadata carrying the current trace context."""
+        if self._inject is None:
+            return ()
+        carrier: dict[str, str] = {}
+        self._inject(carrier)
+        # gRPC requires lowercase metadata keys
+        return tuple((key.lower(), value) for key, value in carrier.items())
@@ -0,0 +1,289 @@
+"""Tests for the asynchronous decision audit sink."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+from typing import Sequence
+
+import pytest
+
+from cerbos.effect.v1 import effect_pb2
+from cerbos.response.v1 import response_pb2
+from cerbos.sdk.model import Principal
+from fastmcp.server.dependencies import AccessToken
+from fastmcp.server.middleware import MiddlewareContext
+from google.protobuf import struct_pb2
+from mcp.types import CallToolRequestParams, ListToolsRequest, Tool
+
+from cerbos_fastmcp import (
+    AuditRecord,
+    AuditSink,
+    CerbosAuthorizationMiddleware,
+    DecisionCache,
+    JsonlAuditWriter,
+    ToolListCache,
+)
+
+
+def _record(index: int = 0, effect: str = "EFFECT_ALLOW") -> AuditRecord:
+    return AuditRecord(
+        timestamp=1_700_000_000.0 + index,
+        principal_id="alice",
+        action="tools/call::greet",
+        resource_kind="mcp_server",
+        resource_id="server",
+        effect=effect,
+        source="pdp",
+        latency_ms=1.5,
+    )
+
+
+class CollectingWriter:
+    def __init__(self) -> None:
+        self.batches: list[list[AuditRecord]] = []
+
+    async def __call__(self, records: Sequence[AuditRecord]) -> None:
+        self.batches.append(list(records))
+
+
+@pytest.mark.asyncio
+async def test_sink_writes_records_in_batches() -> None:
+    writer = CollectingWriter()
+    sink = AuditSink(writer, batch_size=3, flush_interval=0.01)
+
+    for index in range(7):
+        await sink.submit(_record(index))
+    await asyncio.sleep(0.05)
+
+    assert [len(batch) for batch in writer.batches] == [3, 3, 1]
+    await sink.aclose()
+    assert sink.stats.submitted == sink.stats.written == 7
+    assert sink.stats.dropped == 0
+
+
+@pytest.mark.asyncio
+async def test_sink_drops_records_when_full() -> None:
+    release = asyncio.Event()
+    written: list[int] = []
+
+    async def writer(records: Sequence[AuditRecord]) -> None:
+        await release.wait()
+        written.append(len(records))
+
+    sink = AuditSink(writer, max_queue=2, batch_size=1, flush_interval=0)
+    for index in range(6):
+        await sink.submit(_record(index))
+        await asyncio.sleep(0)
+
+    # One record is being written and two wait in the queue
+    assert sink.stats.dropped == 3
+    release.set()
+    await sink.aclose()
+    assert sink.stats.written == 3
+    assert sum(written) == 3
+
+    await sink.submit(_record())
+    assert sink.stats.dropped == 4
+
+
+@pytest.mark.asyncio
+async def test_sink_blocks_when_full() -> None:
+    release = asyncio.Event()
+
+    async def writer(records: Sequence[AuditRecord]) -> None:
+        await release.wait()
+
+    sink = AuditSink(writer, max_queue=1, batch_size=1, flush_interval=0, on_full="block")
+    await sink.submit(_record(0))
+    await asyncio.sleep(0)
+    await sink.submit(_record(1))
+
+    blocked = asyncio.ensure_future(sink.submit(_record(2)))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+
+    release.set()
+    await asyncio.wait_for(blocked, 1)
+    await sink.aclose()
+    assert sink.stats.written == 3
+    assert sink.stats.dropped == 0
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_written_before_flush_interval() -> None:
+    writer = CollectingWriter()
+    sink = AuditSink(writer, max_queue=10, batch_size=10, flush_interval=5.0, on_full="block")
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    for index in range(25):
+        await sink.submit(_record(index))
+        await asyncio.sleep(0)
+
+    # Blocked submissions wait for full batches, not for the flush interval
+    assert loop.time() - started < 1.0
+    assert [len(batch) for batch in writer.batches] == [10, 10]
+    await sink.aclose()
+    assert sink.stats.written == 25
+
+
+@pytest.mark.asyncio
+async def test_sink_counts_writer_failures() -> None:
+    def writer(records: Sequence[AuditRecord]) -> None:
+        raise OSError("disk full")
+
+    sink = AuditSink(writer, flush_interval=0)
+    await sink.submit(_record())
+    await sink.aclose()
+
+    assert sink.stats.failed == 1
+    assert sink.stats.written == 0
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{"max_queue": 0}, {"batch_size": 0}, {"flush_interval": -1}, {"on_full": "wait"}],
+)
+def test_invalid_sink_settings_raise_error(kwargs: dict) -> None:
+    with pytest.raises(ValueError):
+        AuditSink(CollectingWriter(), **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_jsonl_writer_rotates_by_size(tmp_path: Path) -> None:
+    path = tmp_path / "audit.jsonl"
+    writer = JsonlAuditWriter(path, max_bytes=400, backup_count=2)
+
+    for index in range(8):
+        await writer([_record(index), _record(index, "EFFECT_DENY")])
+
+    assert path.exists()
+    assert (tmp_path / "audit.jsonl.1").exists()
+    assert (tmp_path / "audit.jsonl.2").exists()
+    assert not (tmp_path / "audit.jsonl.3").exists()
+    lines = path.read_text().splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[1]) == {
+        "timestamp": 1_700_000_007.0,
+        "principal_id": "alice",
+        "action": "tools/call::greet",
+        "resource_kind": "mcp_server",
+        "resource_id": "server",
+        "effect": "EFFECT_DENY",
+        "source": "pdp",
+        "latency_ms": 1.5,
+        "outputs": [],
+    }
+
+
+class OutputClient:
+    async def check_resources(self, principal, resources):  # type: ignore[no-untyped-def]
+        results = []
+        for entry in resources:
+            result = response_pb2.CheckResourcesResponse.ResultEntry(
+                resource=response_pb2.CheckResourcesResponse.ResultEntry.Resource(
+                    id=entry.resource.id, kind=entry.resource.kind
+                ),
+                actions={action: effect_pb2.EFFECT_ALLOW for action in entry.actions},
+            )
+            result.outputs.add(
+                src="resource.mcp_server.vdefault#greet",
+                val=struct_pb2.Value(string_value="allowed by role"),
+            )
+            results.append(result)
+        return response_pb2.CheckResourcesResponse(results=results)
+
+    async def close(self) -> None:
+        return None
+
+
+@pytest.mark.asyncio
+async def test_middleware_audits_decisions_with_outputs(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    token = AccessToken(token="token", client_id="tester", scopes=[], claims={"sub": "alice"})
+    monkeypatch.setattr("cerbos_fastmcp.middleware.get_access_token", lambda: token)
+
+    async def principal_builder(token: AccessToken) -> Principal:
+        return Principal(id=token.claims["sub"], roles=["USER"])
+
+    writer = CollectingWriter()
+    sink = AuditSink(writer, flush_interval=0)
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=principal_builder,
+        cerbos_client=OutputClient(),
+        decision_cache=DecisionCache(),
+        audit_sink=sink,
+    )
+
+    async def call_next(_: MiddlewareContext[CallToolRequestParams]) -> str:
+        return "OK"
+
+    context = MiddlewareContext(message=CallToolRequestParams(name="greet", arguments={}))
+    await middleware.on_call_tool(context, call_next)
+    await middleware.on_call_tool(context, call_next)
+    await middleware.close()
+
+    records = [record for batch in writer.batches for record in batch]
+    assert [record.source for record in records] == ["pdp", "cache"]
+    pdp, cached = records
+    assert pdp.principal_id == "alice"
+    assert pdp.action == "tools/call::greet"
+    assert pdp.resource_kind == "mcp_server"
+    assert pdp.effect == "EFFECT_ALLOW"
+    assert pdp.latency_ms >= 0
+    assert pdp.outputs == ({"src": "resource.mcp_server.vdefault#greet", "val": "allowed by role"},)
+    assert cached.outputs == ()
+
+
+class ListingClient(OutputClient):
+    async def check_resources(self, principal, resources):  # type: ignore[no-untyped-def]
+        response = await super().check_resources(principal, resources)
+        for result in response.results:
+            if "tools/list::admin_tool" in result.actions:
+                result.actions["tools/list::admin_tool"] = effect_pb2.EFFECT_DENY
+        return response
+
+
+@pytest.mark.asyncio
+async def test_listings_served_from_snapshots_are_audited(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    token = AccessToken(token="token", client_id="tester", scopes=[], claims={"sub": "alice"})
+    monkeypatch.setattr("cerbos_fastmcp.middleware.get_access_token", lambda: token)
+
+    async def principal_builder(token: AccessToken) -> Principal:
+        return Principal(id=token.claims["sub"], roles=["USER"])
+
+    writer = CollectingWriter()
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=principal_builder,
+        cerbos_client=ListingClient(),
+        tool_list_cache=ToolListCache(),
+        audit_sink=AuditSink(writer, flush_interval=0),
+    )
+    tools = [
+        Tool(name="greet", inputSchema={"type": "object", "properties": {}}),
+        Tool(name="admin_tool", inputSchema={"type": "object", "properties": {}}),
+    ]
+
+    async def call_next(_: MiddlewareContext[ListToolsRequest]) -> list[Tool]:
+        return tools
+
+    context = MiddlewareContext(message=ListToolsRequest())
+    for _ in range(2):
+        result = await middleware.on_list_tools(context, call_next)
+        assert [tool.name for tool in result] == ["greet"]
+    await middleware.close()
+
+    records = [record for batch in writer.batches for record in batch]
+    snapshot = [record for record in records if record.source == "snapshot"]
+    assert len(records) == 6
+    assert [(record.action, record.effect) for record in snapshot] == [
+        ("tools/list", "EFFECT_ALLOW"),
+        ("tools/list::greet", "EFFECT_ALLOW"),
+        ("tools/list::admin_tool", "EFFECT_DENY"),
+    ]
+    assert {record.resource_id for record in snapshot} == {"tools/list", "greet", "admin_tool"}
@@ -2,16 +2,23 @@
 
 from __future__ import annotations
 
+import asyncio
+from pathlib import Path
 from unittest.mock import AsyncMock, Mock, patch
 
+import grpc
 import pytest
 
+from cerbos.response.v1 import response_pb2
 from cerbos.sdk.grpc.client import AsyncCerbosClient
 from cerbos.sdk.model import Principal
+from cerbos.svc.v1 import svc_pb2_grpc
+from fastmcp import Client, FastMCP
+from fastmcp.exceptions import McpError
 from fastmcp.server.dependencies import AccessToken
 from fastmcp.server.middleware import MiddlewareContext
 
-from cerbos_fastmcp import CerbosAuthorizationMiddleware
+from cerbos_fastmcp import CerbosAuthorizationMiddleware, ChannelOptions
 
 
 async def _principal_builder(token: AccessToken) -> Principal:
@@ -442,3 +449,266 @@ class TestClientInitialization:
         call_next.assert_awaited_once_with(context)
         mock_client_class.assert_called_once_with("localhost:3593", tls_verify=False)
         assert mock_client_instance.server_info.await_count == 1
+
+
+class TestChannelConfiguration:
+    """Test cases for gRPC channel tuning."""
+
+    def test_channel_options_map_to_grpc_arguments(self) -> None:
+        """Test that channel options are translated to gRPC channel arguments."""
+        options = ChannelOptions(
+            keepalive_time=30,
+            keepalive_timeout=5,
+            keepalive_without_calls=True,
+            max_message_size=8 * 1024 * 1024,
+            compression="gzip",
+            initial_window_size=1 << 20,
+            extra={"grpc.enable_retries": 0},
+        )
+
+        assert options.grpc_options() == {
+            "grpc.keepalive_time_ms": 30_000,
+            "grpc.keepalive_timeout_ms": 5_000,
+            "grpc.keepalive_permit_without_calls": 1,
+            "grpc.max_send_message_length": 8 * 1024 * 1024,
+            "grpc.max_receive_message_length": 8 * 1024 * 1024,
+            "grpc.default_compression_algorithm": 2,
+            "grpc.http2.lookahead_bytes": 1 << 20,
+            "grpc.http2.bdp_probe": 0,
+            "grpc.enable_retries": 0,
+        }
+        assert ChannelOptions().grpc_options() == {}
+
+    def test_channel_options_from_env(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test channel options configuration from environment variables."""
+        monkeypatch.setenv("CERBOS_GRPC_KEEPALIVE_TIME", "20")
+        monkeypatch.setenv("CERBOS_GRPC_KEEPALIVE_WITHOUT_CALLS", "yes")
+        monkeypatch.setenv("CERBOS_GRPC_COMPRESSION", "Deflate")
+        monkeypatch.setenv("CERBOS_GRPC_MAX_MESSAGE_SIZE", "1048576")
+
+        assert ChannelOptions.from_env() == ChannelOptions(
+            keepalive_time=20.0,
+            keepalive_without_calls=True,
+            compression="deflate",
+            max_message_size=1_048_576,
+        )
+
+    @pytest.mark.parametrize(
+        "variable,value",
+        [
+            ("CERBOS_GRPC_KEEPALIVE_TIME", "soon"),
+            ("CERBOS_GRPC_KEEPALIVE_WITHOUT_CALLS", "maybe"),
+            ("CERBOS_GRPC_COMPRESSION", "brotli"),
+            ("CERBOS_GRPC_MAX_MESSAGE_SIZE", "0"),
+        ],
+    )
+    def test_invalid_channel_env_var_raises_error(
+        self, monkeypatch: pytest.MonkeyPatch, variable: str, value: str
+    ) -> None:
+        """Test that invalid channel settings fail when the middleware is created."""
+        monkeypatch.setenv(variable, value)
+
+        with pytest.raises(ValueError):
+            CerbosAuthorizationMiddleware(
+                cerbos_host="localhost:3593",
+                principal_builder=_principal_builder,
+            )
+
+    @pytest.mark.asyncio
+    @patch("cerbos_fastmcp.middleware.AsyncCerbosClient")
+    async def test_channel_options_passed_to_client(self, mock_client_class: Mock) -> None:
+        """Test that channel options and Unix socket hosts reach the client."""
+        mock_client_class.return_value = AsyncMock(spec=AsyncCerbosClient)
+
+        middleware = CerbosAuthorizationMiddleware(
+            cerbos_host="unix:///var/run/cerbos/cerbos.sock",
+            principal_builder=_principal_builder,
+            channel_options=ChannelOptions(keepalive_time=10, max_message_size=1024),
+        )
+
+        await middleware._ensure_client()
+
+        mock_client_class.assert_called_once_with(
+            "unix:///var/run/cerbos/cerbos.sock",
+            tls_verify=False,
+            channel_options={
+                "grpc.keepalive_time_ms": 10_000,
+                "grpc.max_send_message_length": 1024,
+                "grpc.max_receive_message_length": 1024,
+            },
+        )
+
+    @pytest.mark.asyncio
+    async def test_unix_socket_transport(self, tmp_path: Path) -> None:
+        """Test that a real client reaches a PDP listening on a Unix domain socket."""
+
+        class ServerInfo(svc_pb2_grpc.CerbosServiceServicer):
+            async def ServerInfo(self, request, context):  # type: ignore[no-untyped-def]
+                return response_pb2.ServerInfoResponse(version="test")
+
+        address = f"unix://{tmp_path / 'cerbos.sock'}"
+        server = grpc.aio.server()
+        svc_pb2_grpc.add_CerbosServiceServicer_to_server(ServerInfo(), server)
+        server.add_insecure_port(address)
+        await server.start()
+        try:
+            middleware = CerbosAuthorizationMiddleware(
+                cerbos_host=address,
+                principal_builder=_principal_builder,
+                channel_options=ChannelOptions(keepalive_time=10),
+            )
+            client = await middleware._ensure_client()
+            assert (await client.server_info()).version == "test"
+            await middleware.close()
+        finally:
+            await server.stop(None)
+
+
+class TestHealthChecks:
+    """Test cases for cached PDP health checks during MCP initialize."""
+
+    @staticmethod
+    def _context() -> MiddlewareContext:
+        return MiddlewareContext(message=None, method="initialize")
+
+    @pytest.mark.asyncio
+    @patch("cerbos_fastmcp.middleware.AsyncCerbosClient")
+    async def test_health_is_probed_once_for_many_sessions(self, mock_client_class: Mock) -> None:
+        """Test that concurrent and later sessions reuse one server_info probe."""
+        mock_client_instance = AsyncMock(spec=AsyncCerbosClient)
+        mock_client_class.return_value = mock_client_instance
+
+        middleware = CerbosAuthorizationMiddleware(
+            cerbos_host="localhost:3593",
+            principal_builder=_principal_builder,
+        )
+        call_next = AsyncMock()
+
+        await asyncio.gather(
+            *(middleware.on_initialize(self._context(), call_next) for _ in range(20))
+        )
+        await middleware.on_initialize(self._context(), call_next)
+
+        assert mock_client_instance.server_info.await_count == 1
+        assert call_next.await_count == 21
+        assert middleware.pdp_healthy is True
+
+    @pytest.mark.asyncio
+    @patch("cerbos_fastmcp.middleware.AsyncCerbosClient")
+    async def test_unhealthy_pdp_rejects_sessions_and_recovers(
+        self, mock_client_class: Mock, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that sessions are rejected while the PDP is down and the probe is retried."""
+        now = [100.0]
+        monkeypatch.setattr("cerbos_fastmcp.middleware.time.monotonic", lambda: now[0])
+        mock_client_instance = AsyncMock(spec=AsyncCerbosClient)
+        mock_client_instance.server_info.side_effect = ConnectionError("PDP down")
+        mock_client_class.return_value = mock_client_instance
+
+        middleware = CerbosAuthorizationMiddleware(
+            cerbos_host="localhost:3593",
+            principal_builder=_principal_builder,
+        )
+        call_next = AsyncMock()
+
+        for _ in range(3):
+            with pytest.raises(McpError) as exc_info:
+                await middleware.on_initialize(self._context(), call_next)
+            assert exc_info.value.error.data == "cerbos_unavailable"
+        assert mock_client_instance.server_info.await_count == 1
+        call_next.assert_not_awaited()
+
+        mock_client_instance.server_info.side_effect = None
+        now[0] += 5
+        await middleware.on_initialize(self._context(), call_next)
+        assert mock_client_instance.server_info.await_count == 2
+        assert middleware.pdp_healthy is True
+
+    @pytest.mark.asyncio
+    @patch("cerbos_fastmcp.middleware.AsyncCerbosClient")
+    async def test_unhealthy_pdp_can_allow_sessions(self, mock_client_class: Mock) -> None:
+        """Test that unhealthy_sessions='allow' lets sessions start while the PDP is down."""
+        mock_client_instance = AsyncMock(spec=AsyncCerbosClient)
+        mock_client_instance.server_info.side_effect = ConnectionError("PDP down")
+        mock_client_class.return_value = mock_client_instance
+
+        middleware = CerbosAuthorizationMiddleware(
+            cerbos_host="localhost:3593",
+            principal_builder=_principal_builder,
+            unhealthy_sessions="allow",
+        )
+        call_next = AsyncMock()
+
+        await middleware.on_initialize(self._context(), call_next)
+
+        call_next.assert_awaited_once()
+        assert middleware.pdp_healthy is False
+
+    @pytest.mark.asyncio
+    @patch("cerbos_fastmcp.middleware.AsyncCerbosClient")
+    async def test_first_request_of_each_session_checks_health(
+        self, mock_client_class: Mock
+    ) -> None:
+        """Test that sessions are checked even when fastmcp skips on_initialize."""
+        mock_client_instance = AsyncMock(spec=AsyncCerbosClient)
+        mock_client_instance.server_info.side_effect = ConnectionError("PDP down")
+        mock_client_class.return_value = mock_client_instance
+
+        middleware = CerbosAuthorizationMiddleware(
+            cerbos_host="localhost:3593",
+            principal_builder=_principal_builder,
+        )
+        server = FastMCP("health", middleware=[middleware])
+
+        async with Client(server) as client:
+            with pytest.raises(McpError, match="Unauthorized"):
+                await client.list_tools()
+        assert middleware.pdp_healthy is False
+
+        middleware._health_checked_at -= 5
+        mock_client_instance.server_info.side_effect = None
+        for _ in range(2):
+            async with Client(server) as client:
+                await client.list_tools()
+                await client.list_tools()
+
+        # One failed probe, then one that recovered; later sessions reuse the result
+        assert mock_client_instance.server_info.await_count == 2
+        assert middleware.pdp_healthy is True
+
+    @pytest.mark.asyncio
+    @patch("cerbos_fastmcp.middleware.AsyncCerbosClient")
+    async def test_health_is_refreshed_in_the_background(self, mock_client_class: Mock) -> None:
+        """Test that health_check_interval re-probes without blocking sessions."""
+        mock_client_instance = AsyncMock(spec=AsyncCerbosClient)
+        mock_client_class.return_value = mock_client_instance
+
+        middleware = CerbosAuthorizationMiddleware(
+            cerbos_host="localhost:3593",
+            principal_builder=_principal_builder,
+            health_check_interval=0.01,
+        )
+        await middleware.on_initialize(self._context(), AsyncMock())
+
+        mock_client_instance.server_info.side_effect = ConnectionError("PDP down")
+        await asyncio.sleep(0.05)
+        assert middleware.pdp_healthy is False
+        assert mock_client_instance.server_info.await_count >= 2
+
+        await middleware.close()
+        assert middleware._health_task is None
+
+    def test_invalid_health_settings_raise_error(self) -> None:
+        """Test that invalid health check settings raise ValueError."""
+        with pytest.raises(ValueError):
+            CerbosAuthorizationMiddleware(
+                cerbos_host="localhost:3593",
+                principal_builder=_principal_builder,
+                health_check_interval=0,
+            )
+        with pytest.raises(ValueError):
+            CerbosAuthorizationMiddleware(
+                cerbos_host="localhost:3593",
+                principal_builder=_principal_builder,
+                unhealthy_sessions="wait",  # type: ignore[arg-type]
+            )
@@ -0,0 +1,104 @@
+"""Tests for converting Python attribute values to protobuf."""
+
+from __future__ import annotations
+
+import datetime
+
+import pytest
+from google.protobuf import json_format, struct_pb2
+from pydantic import BaseModel
+
+from cerbos.sdk.model import Principal, Resource
+
+from cerbos_fastmcp.middleware import (
+    _principal_to_proto,
+    _python_to_protobuf_value,
+    _resource_to_proto,
+)
+
+
+class Address(BaseModel):
+    city: str
+    zip_codes: list[int]
+
+
+class FakeNumpyScalar:
+    __module__ = "numpy"
+
+    def __init__(self, value: float) -> None:
+        self._value = value
+
+    def tolist(self) -> float:
+        return self._value
+
+
+def _to_python(value: struct_pb2.Value):
+    return json_format.MessageToDict(value)
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        (None, None),
+        ("text", "text"),
+        (True, True),
+        (3, 3.0),
+        (2.5, 2.5),
+        ({}, {}),
+        ([], []),
+        ({"a": [1, {"b": None}], "c": ("x", False)}, {"a": [1.0, {"b": None}], "c": ["x", False]}),
+        ({1: "numeric key"}, {"1": "numeric key"}),
+    ],
+)
+def test_builtin_values(value, expected) -> None:
+    assert _to_python(_python_to_protobuf_value(value)) == expected
+
+
+def test_empty_containers_set_their_kind() -> None:
+    assert _python_to_protobuf_value({}).WhichOneof("kind") == "struct_value"
+    assert _python_to_protobuf_value([]).WhichOneof("kind") == "list_value"
+
+
+def test_extended_types() -> None:
+    value = {
+        "when": datetime.datetime(2025, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc),
+        "day": datetime.date(2025, 1, 2),
+        "blob": b"\x00\xffcerbos",
+        "address": Address(city="Leeds", zip_codes=[1, 2]),
+        "score": FakeNumpyScalar(0.5),
+        "other": object,
+    }
+
+    assert _to_python(_python_to_protobuf_value(value)) == {
+        "when": "2025-01-02T03:04:05+00:00",
+        "day": "2025-01-02",
+        "blob": "AP9jZXJib3M=",
+        "address": {"city": "Leeds", "zip_codes": [1.0, 2.0]},
+        "score": 0.5,
+        "other": str(object),
+    }
+
+
+def test_numpy_values() -> None:
+    np = pytest.importorskip("numpy")
+
+    value = {"count": np.int64(4), "weights": np.array([0.5, 1.5])}
+
+    assert _to_python(_python_to_protobuf_value(value)) == {"count": 4.0, "weights": [0.5, 1.5]}
+
+
+def test_principal_and_resource_protos() -> None:
+    principal_pb = _principal_to_proto(
+        Principal(id="alice", roles={"ADMIN"}, attr={"region": "NA"}, policy_version="v2")
+    )
+    resource_pb = _resource_to_proto(
+        Resource(id="greet", kind="mcp_server", attr={"arguments": {"name": "Bob"}})
+    )
+
+    assert principal_pb.id == "alice"
+    assert list(principal_pb.roles) == ["ADMIN"]
+    assert principal_pb.policy_version == "v2"
+    assert principal_pb.attr["region"].string_value == "NA"
+    assert resource_pb.kind == "mcp_server"
+    assert resource_pb.policy_version == "default"
+    assert _to_python(resource_pb.attr["arguments"]) == {"name": "Bob"}
@@ -0,0 +1,99 @@
+"""Tests for batched principal attribute loading."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Sequence
+
+import pytest
+
+from cerbos.sdk.model import Principal
+
+from cerbos_fastmcp import PrincipalEnricher
+
+
+class DirectoryLoader:
+    def __init__(self, directory: dict[str, Any]) -> None:
+        self.directory = directory
+        self.batches: list[list[str]] = []
+        self.result: Any = None
+
+    async def __call__(self, principals: Sequence[Principal]) -> Any:
+        self.batches.append([principal.id for principal in principals])
+        if self.result is not None:
+            return self.result
+        return {p.id: self.directory[p.id] for p in principals if p.id in self.directory}
+
+
+@pytest.mark.asyncio
+async def test_principal_enricher_caches_found_and_missing_principals(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    now = [100.0]
+    monkeypatch.setattr("cerbos_fastmcp.cache.time.monotonic", lambda: now[0])
+    loader = DirectoryLoader({"alice": {"department": "sales"}})
+    enricher = PrincipalEnricher(loader, batch_window=0, ttl=300, negative_ttl=30)
+
+    alice = Principal(id="alice", roles=["USER"], attr={"department": "engineering"})
+    bob = Principal(id="bob", roles=["USER"])
+    assert (await enricher.enrich(alice)).attr == {"department": "sales"}
+    assert (await enricher.enrich(bob)).attr == {}
+    assert (await enricher.enrich(alice)).attr == {"department": "sales"}
+    assert await enricher.enrich(bob) is bob
+    assert loader.batches == [["alice"], ["bob"]]
+    assert alice.attr == {"department": "engineering"}
+    assert (len(enricher), enricher.stats.hits) == (2, 2)
+
+    now[0] += 31
+    await enricher.enrich(alice)
+    await enricher.enrich(bob)
+    assert loader.batches == [["alice"], ["bob"], ["bob"]]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("result", [["alice"], {"alice": "sales"}, {"alice": 42}])
+async def test_malformed_loader_result_fails_the_batch_and_is_retried(result: Any) -> None:
+    loader = DirectoryLoader({"alice": {"department": "sales"}})
+    loader.result = result
+    enricher = PrincipalEnricher(loader, batch_window=0)
+    alice = Principal(id="alice", roles=["USER"])
+
+    with pytest.raises(TypeError):
+        await asyncio.wait_for(enricher.enrich(alice), 1)
+    assert len(enricher) == 0
+
+    # The failed load leaves nothing in flight, so the next request loads again
+    loader.result = None
+    enriched = await asyncio.wait_for(enricher.enrich(alice), 1)
+    assert enriched.attr == {"department": "sales"}
+    assert loader.batches == [["alice"], ["alice"]]
+    await enricher.aclose()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_load_releases_waiters() -> None:
+    started = asyncio.Event()
+
+    async def load(principals: Sequence[Principal]) -> dict[str, Any]:
+        started.set()
+        await asyncio.sleep(10)
+        return {}
+
+    enricher = PrincipalEnricher(load, batch_window=0)
+    waiter = asyncio.ensure_future(enricher.enrich(Principal(id="alice", roles=["USER"])))
+    await started.wait()
+    for task in enricher._tasks:
+        task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(waiter, 1)
+    assert enricher._inflight == {}
+
+
+def test_invalid_principal_enricher_settings_raise_error() -> None:
+    with pytest.raises(ValueError):
+        PrincipalEnricher(DirectoryLoader({}), max_batch_size=0)
+    with pytest.raises(ValueError):
+        PrincipalEnricher(DirectoryLoader({}), negative_ttl=-1)
+    with pytest.raises(ValueError):
+        PrincipalEnricher(DirectoryLoader({}), ttl=0)
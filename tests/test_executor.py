@@ -0,0 +1,191 @@
+"""Tests for running synchronous principal builders on worker threads."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+
+from cerbos.sdk.model import Principal
+from fastmcp.exceptions import McpError
+from fastmcp.server.dependencies import AccessToken
+from fastmcp.server.middleware import MiddlewareContext
+from mcp.types import CallToolRequestParams
+
+from cerbos_fastmcp import (
+    AuthorizationMetrics,
+    CerbosAuthorizationMiddleware,
+    ExecutorSaturatedError,
+    PrincipalBuilderExecutor,
+)
+from cerbos_fastmcp.middleware import _is_async_callable
+
+
+class AllowAll:
+    async def is_allowed(self, action: str, principal: Principal, resource: object) -> bool:
+        return True
+
+    async def close(self) -> None:  # pragma: no cover - compatibility shim
+        return None
+
+
+@pytest.fixture
+def access_token(monkeypatch: pytest.MonkeyPatch) -> AccessToken:
+    token = AccessToken(token="token", client_id="tester", scopes=[], claims={"sub": "alice"})
+    monkeypatch.setattr("cerbos_fastmcp.middleware.get_access_token", lambda: token)
+    return token
+
+
+async def _call_tool(middleware: CerbosAuthorizationMiddleware) -> str:
+    async def call_next(_: MiddlewareContext[CallToolRequestParams]) -> str:
+        return "ok"
+
+    context = MiddlewareContext(message=CallToolRequestParams(name="greet", arguments={}))
+    return await middleware.on_call_tool(context, call_next)
+
+
+@pytest.mark.asyncio
+async def test_executor_runs_calls_on_worker_threads() -> None:
+    executor = PrincipalBuilderExecutor(max_workers=2)
+    gate = threading.Event()
+
+    def blocking() -> str:
+        gate.wait(5)
+        return threading.current_thread().name
+
+    tasks = [asyncio.ensure_future(executor.run(blocking)) for _ in range(3)]
+    await asyncio.sleep(0.05)
+    assert (executor.running, executor.pending) == (2, 1)
+
+    gate.set()
+    names = await asyncio.gather(*tasks)
+
+    assert all(name.startswith("cerbos-principal-builder") for name in names)
+    assert (executor.running, executor.pending, executor.stats.submitted) == (0, 0, 3)
+    executor.close()
+
+
+@pytest.mark.asyncio
+async def test_executor_rejects_when_queue_is_full() -> None:
+    executor = PrincipalBuilderExecutor(max_workers=1, max_pending=1)
+    gate = threading.Event()
+    running = asyncio.ensure_future(executor.run(gate.wait, 5))
+    queued = asyncio.ensure_future(executor.run(gate.wait, 5))
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(ExecutorSaturatedError):
+        await executor.run(gate.wait, 5)
+    assert executor.stats.rejected == 1
+
+    gate.set()
+    await asyncio.gather(running, queued)
+    executor.close()
+
+
+@pytest.mark.asyncio
+async def test_executor_timeout_drops_queued_call() -> None:
+    executor = PrincipalBuilderExecutor(max_workers=1, timeout=0.05)
+    gate = threading.Event()
+    started: list[str] = []
+    running = asyncio.ensure_future(executor.run(gate.wait, 5))
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(TimeoutError):
+        await executor.run(started.append, "queued")
+
+    # The running call timed out too but keeps its thread until the builder returns
+    with pytest.raises(TimeoutError):
+        await running
+    assert executor.stats.timeouts == 2
+    assert (executor.running, executor.pending) == (1, 0)
+    gate.set()
+    await asyncio.sleep(0.05)
+    assert started == []
+    executor.close()
+
+
+def test_invalid_executor_settings_raise_error() -> None:
+    with pytest.raises(ValueError):
+        PrincipalBuilderExecutor(max_workers=0)
+    with pytest.raises(ValueError):
+        PrincipalBuilderExecutor(timeout=0)
+
+
+def test_async_builders_are_detected() -> None:
+    class AsyncBuilder:
+        async def __call__(self, token: AccessToken) -> Principal:
+            raise NotImplementedError
+
+    async def build(token: AccessToken) -> Principal:
+        raise NotImplementedError
+
+    assert _is_async_callable(build)
+    assert _is_async_callable(AsyncBuilder())
+    assert not _is_async_callable(lambda token: None)
+
+
+@pytest.mark.asyncio
+async def test_sync_principal_builder_runs_off_the_event_loop(access_token: AccessToken) -> None:
+    threads: list[threading.Thread] = []
+
+    def build_principal(token: AccessToken) -> Principal:
+        threads.append(threading.current_thread())
+        return Principal(id=token.claims["sub"], roles=["USER"])
+
+    depths: list[int] = []
+
+    class QueueMetrics(AuthorizationMetrics):
+        def observe_principal_queue(self, depth: int) -> None:
+            depths.append(depth)
+
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=build_principal, cerbos_client=AllowAll(), metrics=QueueMetrics()
+    )
+
+    assert await _call_tool(middleware) == "ok"
+    assert threads and threads[0] is not threading.main_thread()
+    assert depths == [0]
+    await middleware.close()
+
+
+@pytest.mark.asyncio
+async def test_offloading_can_be_disabled(access_token: AccessToken) -> None:
+    threads: list[threading.Thread] = []
+
+    def build_principal(token: AccessToken) -> Principal:
+        threads.append(threading.current_thread())
+        return Principal(id=token.claims["sub"], roles=["USER"])
+
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=build_principal,
+        cerbos_client=AllowAll(),
+        offload_principal_builder=False,
+    )
+
+    assert await _call_tool(middleware) == "ok"
+    assert threads == [threading.main_thread()]
+
+
+@pytest.mark.asyncio
+async def test_slow_principal_builder_times_out(access_token: AccessToken) -> None:
+    gate = threading.Event()
+
+    def build_principal(token: AccessToken) -> Principal:
+        gate.wait(5)
+        return Principal(id=token.claims["sub"], roles=["USER"])
+
+    executor = PrincipalBuilderExecutor(max_workers=1, timeout=0.05)
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=build_principal,
+        cerbos_client=AllowAll(),
+        principal_builder_executor=executor,
+    )
+
+    with pytest.raises(McpError) as exc_info:
+        await _call_tool(middleware)
+
+    assert exc_info.value.error.data == "principal_builder_timeout"
+    gate.set()
+    await middleware.close()
+    executor.close()
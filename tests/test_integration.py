@@ -1,19 +1,21 @@
 from __future__ import annotations
 
 import os
+from pathlib import Path
 from typing import Callable
 
 import pytest
 import pytest_asyncio
 
 from cerbos.sdk.grpc.client import AsyncCerbosClient
-from cerbos.sdk.model import Principal
+from cerbos.sdk.model import Principal, Resource
 from fastmcp.exceptions import McpError
 from fastmcp.server.dependencies import AccessToken
 from fastmcp.server.middleware import MiddlewareContext
 from mcp.types import CallToolRequestParams, ListToolsRequest, Tool
 
-from cerbos_fastmcp import CerbosAuthorizationMiddleware
+from cerbos_fastmcp import CerbosAuthorizationMiddleware, LocalPolicyEngine, get_query_plan
+from cerbos_fastmcp.middleware import _principal_to_proto, _resource_to_proto
 
 
 def _make_access_token(role: str, region: str = "NA") -> AccessToken:
@@ -156,3 +158,76 @@ async def test_list_tools_filters_using_pdp(
     result = await middleware.on_list_tools(context, call_next)
 
     assert [tool.name for tool in result] == ["greet", "get_sales_data"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("role", ["ADMIN", "SALES", "HR"])
+async def test_local_engine_matches_pdp(
+    cerbos_client: AsyncCerbosClient,
+    role: str,
+) -> None:
+    engine = LocalPolicyEngine.from_directory(Path(__file__).resolve().parent.parent / "policies")
+    principal = await _principal_builder(_make_access_token(role))
+
+    actions = [
+        "resources/list",
+        "prompts/list",
+        "tools/list",
+        "resources/read::prompt://sample",
+        "prompts/get::sampleprompt",
+        *(
+            f"tools/{verb}::{tool}"
+            for tool in (
+                "greet",
+                "admin_tool",
+                "get_sales_data",
+                "get_engineering_data",
+                "get_hr_records",
+            )
+            for verb in ("list", "call")
+        ),
+    ]
+    for action in actions:
+        resource = Resource(id="tool", kind="mcp_server", attr={"arguments": {}})
+        local = engine.check(principal, action, resource)
+        if local is None:
+            continue
+        remote = await cerbos_client.is_allowed(
+            action, _principal_to_proto(principal), _resource_to_proto(resource)
+        )
+        assert local == remote, action
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("role", "expected"), [("SALES", ["S-2", "S-4"]), ("ADMIN", ["S-1", "S-2", "S-3", "S-4"])]
+)
+async def test_query_plan_filters_records_using_pdp(
+    cerbos_client: AsyncCerbosClient,
+    run_with_access_token: Callable[[AccessToken], None],
+    role: str,
+    expected: list[str],
+) -> None:
+    run_with_access_token(_make_access_token(role, region="EMEA"))
+
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_principal_builder,
+        cerbos_client=cerbos_client,
+        tool_query_plans={"get_sales_data": "sales_record"},
+    )
+    records = [
+        {"id": "S-1", "region": "NA"},
+        {"id": "S-2", "region": "EMEA"},
+        {"id": "S-3", "region": "APAC"},
+        {"id": "S-4", "region": "EMEA"},
+    ]
+
+    async def call_next(_: MiddlewareContext[CallToolRequestParams]) -> list[str]:
+        return [record["id"] for record in get_query_plan().filter(records)]
+
+    context = MiddlewareContext(
+        message=CallToolRequestParams(name="get_sales_data", arguments={"region": "EMEA"}),
+        source="client",
+    )
+
+    assert await middleware.on_call_tool(context, call_next) == expected
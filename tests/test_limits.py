@@ -0,0 +1,71 @@
+"""Tests for tool argument size limits."""
+
+from __future__ import annotations
+
+import hashlib
+
+import pytest
+
+from cerbos_fastmcp import ArgumentLimitError, ArgumentLimits
+
+
+def test_values_within_limits_are_returned_unchanged() -> None:
+    limits = ArgumentLimits(max_depth=3, max_bytes=100, max_list_length=5)
+    arguments = {"name": "Alice", "tags": ["a", "b"], "nested": {"level": {"x": 1}}}
+
+    assert limits.apply(arguments) is arguments
+    assert limits.stats.truncated_calls == 0
+
+
+def test_oversize_string_is_summarized() -> None:
+    document = "é" * 600
+    limits = ArgumentLimits(max_bytes=1_000, on_exceed="truncate")
+
+    result = limits.apply({"document": document, "title": "short"})
+
+    assert result == {
+        "document": {
+            "truncated": "max_bytes",
+            "type": "str",
+            "length": 1_200,
+            "sha256": hashlib.sha256(document.encode("utf-8")).hexdigest(),
+        },
+        "title": "short",
+    }
+
+
+def test_long_lists_and_deep_values_are_summarized() -> None:
+    limits = ArgumentLimits(max_depth=2, max_list_length=3, on_exceed="truncate")
+    arguments = {
+        "ids": [1, 2, 3, 4],
+        "ok": [1, 2],
+        "deep": {"inner": {"too": "deep"}},
+        "rows": [[1]],
+    }
+
+    result = limits.apply(arguments)
+
+    assert result["ids"]["truncated"] == "max_list_length"
+    assert result["ids"]["length"] == 4
+    assert result["ok"] is arguments["ok"]
+    assert result["deep"]["inner"]["truncated"] == "max_depth"
+    assert result["rows"][0]["truncated"] == "max_depth"
+    assert arguments["deep"] == {"inner": {"too": "deep"}}
+    assert (limits.stats.truncated_calls, limits.stats.truncated_values) == (1, 3)
+
+
+def test_reject_mode_raises() -> None:
+    limits = ArgumentLimits(max_bytes=4, on_exceed="reject")
+
+    with pytest.raises(ArgumentLimitError, match="max_bytes"):
+        limits.apply({"blob": b"12345"})
+    assert limits.stats.rejected_calls == 1
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{"max_depth": 0}, {"max_bytes": -1}, {"max_list_length": 0}, {"on_exceed": "drop"}],
+)
+def test_invalid_limits_raise(kwargs) -> None:
+    with pytest.raises(ValueError):
+        ArgumentLimits(**kwargs)
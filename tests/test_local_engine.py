@@ -0,0 +1,269 @@
+"""Conformance tests for the local policy engine against the bundled policies."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Optional
+
+import pytest
+
+from cerbos.sdk.model import Principal, Resource
+
+from cerbos_fastmcp import LocalPolicyEngine
+
+POLICY_DIR = Path(__file__).resolve().parent.parent / "policies"
+
+ADMIN_ACTIONS = {
+    "resources/list",
+    "prompts/list",
+    "tools/list",
+    "tools/list::greet",
+    "tools/call::greet",
+    "tools/list::admin_tool",
+    "tools/call::admin_tool",
+    "tools/list::get_sales_data",
+    "tools/call::get_sales_data",
+    "tools/list::get_engineering_data",
+    "tools/call::get_engineering_data",
+    "resources/read::prompt://sample",
+    "prompts/get::sampleprompt",
+}
+SALES_ACTIONS = {
+    "prompts/list",
+    "tools/list",
+    "tools/list::greet",
+    "tools/call::greet",
+    "tools/list::get_sales_data",
+    "prompts/get::sampleprompt",
+}
+HR_ACTIONS = {
+    "tools/list",
+    "tools/list::greet",
+    "tools/call::greet",
+    "tools/list::get_hr_records",
+    "tools/call::get_hr_records",
+}
+# Conditional rules the PDP has to evaluate
+PDP_ONLY = {("SALES", "tools/call::get_sales_data")}
+
+AVAILABLE_ACTIONS = sorted(ADMIN_ACTIONS | HR_ACTIONS)
+
+
+def _expected(role: str, action: str) -> Optional[bool]:
+    if (role, action) in PDP_ONLY:
+        return None
+    allowed = {"ADMIN": ADMIN_ACTIONS, "SALES": SALES_ACTIONS, "HR": HR_ACTIONS}[role]
+    return action in allowed
+
+
+def _principal(*roles: str, **kwargs) -> Principal:
+    return Principal(id="tester", roles=set(roles), attr={"region": "NA"}, **kwargs)
+
+
+def _resource(**kwargs) -> Resource:
+    return Resource(id="tool", kind=kwargs.pop("kind", "mcp_server"), **kwargs)
+
+
+@pytest.fixture(scope="module")
+def bundled_engine() -> LocalPolicyEngine:
+    return LocalPolicyEngine.from_directory(POLICY_DIR)
+
+
+@pytest.mark.parametrize("role", ["ADMIN", "SALES", "HR"])
+@pytest.mark.parametrize("action", AVAILABLE_ACTIONS)
+def test_bundled_policy_decisions(
+    bundled_engine: LocalPolicyEngine, role: str, action: str
+) -> None:
+    assert bundled_engine.check(_principal(role), action, _resource()) == _expected(role, action)
+
+
+def test_unknown_role_is_denied(bundled_engine: LocalPolicyEngine) -> None:
+    assert bundled_engine.check(_principal("GUEST"), "tools/call::greet", _resource()) is False
+
+
+@pytest.mark.parametrize(
+    "principal,resource",
+    [
+        (_principal("ADMIN"), _resource(kind="other_server")),
+        (_principal("ADMIN"), _resource(policy_version="v2")),
+        (_principal("ADMIN"), _resource(scope="acme")),
+        (_principal("ADMIN", scope="acme"), _resource()),
+    ],
+)
+def test_unsupported_requests_fall_back(
+    bundled_engine: LocalPolicyEngine, principal: Principal, resource: Resource
+) -> None:
+    assert bundled_engine.check(principal, "tools/call::greet", resource) is None
+
+
+def _write(directory: Path, name: str, content: str) -> None:
+    path = directory / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+
+
+RESOURCE_POLICY = """
+apiVersion: api.cerbos.dev/v1
+resourcePolicy:
+  resource: doc
+  version: default
+  importDerivedRoles:
+    - owners
+  rules:
+    - actions: ["*"]
+      roles: [ADMIN]
+      effect: EFFECT_ALLOW
+    - actions: [delete]
+      roles: [ADMIN]
+      effect: EFFECT_DENY
+    - actions: [view]
+      roles: ["*"]
+      effect: EFFECT_ALLOW
+    - actions: [edit]
+      derivedRoles: [EDITOR]
+      effect: EFFECT_ALLOW
+    - actions: [publish]
+      derivedRoles: [OWNER]
+      effect: EFFECT_ALLOW
+    - actions: [archive]
+      roles: [USER]
+      effect: EFFECT_DENY
+      condition:
+        match:
+          expr: R.attr.locked
+    - actions: [archive, "report:*"]
+      roles: [USER]
+      effect: EFFECT_ALLOW
+"""
+
+DERIVED_ROLES = """
+apiVersion: api.cerbos.dev/v1
+derivedRoles:
+  name: owners
+  definitions:
+    - name: EDITOR
+      parentRoles: [USER]
+    - name: OWNER
+      parentRoles: [USER]
+      condition:
+        match:
+          expr: R.attr.owner == P.id
+"""
+
+
+@pytest.fixture
+def policy_dir(tmp_path: Path) -> Path:
+    _write(tmp_path, "resources/doc.yaml", RESOURCE_POLICY)
+    _write(tmp_path, "derived_roles/owners.yml", DERIVED_ROLES)
+    _write(tmp_path, "_schemas/doc.json", "{}")
+    _write(tmp_path, "testdata/doc_test.yaml", "not: [a policy")
+    return tmp_path
+
+
+@pytest.mark.parametrize(
+    "role,action,expected",
+    [
+        ("ADMIN", "anything", True),
+        ("ADMIN", "delete", False),
+        ("GUEST", "view", True),
+        ("USER", "edit", True),
+        ("GUEST", "edit", False),
+        ("USER", "publish", None),
+        ("USER", "archive", None),
+        ("USER", "report:daily", None),
+        ("USER", "delete", False),
+    ],
+)
+def test_rule_semantics(policy_dir: Path, role: str, action: str, expected: Optional[bool]) -> None:
+    engine = LocalPolicyEngine.from_directory(policy_dir)
+
+    assert engine.check(_principal(role), action, _resource(kind="doc")) is expected
+
+
+def test_policy_versions_are_separate(policy_dir: Path) -> None:
+    _write(
+        policy_dir,
+        "resources/doc_v2.yaml",
+        RESOURCE_POLICY.replace("version: default", "version: v2").replace(
+            'roles: ["*"]', "roles: [USER]"
+        ),
+    )
+    engine = LocalPolicyEngine.from_directory(policy_dir)
+
+    assert engine.check(_principal("GUEST"), "view", _resource(kind="doc")) is True
+    assert (
+        engine.check(_principal("GUEST"), "view", _resource(kind="doc", policy_version="v2"))
+        is False
+    )
+
+
+def test_principal_and_role_policies_force_fallback(policy_dir: Path) -> None:
+    _write(
+        policy_dir,
+        "principals/tester.yaml",
+        "principalPolicy:\n  principal: tester\n  version: default\n  rules: []\n",
+    )
+    engine = LocalPolicyEngine.from_directory(policy_dir)
+    assert engine.check(_principal("ADMIN"), "view", _resource(kind="doc")) is None
+    other = Principal(id="someone", roles={"ADMIN"})
+    assert engine.check(other, "view", _resource(kind="doc")) is True
+
+    _write(policy_dir, "roles/user.yaml", "rolePolicy:\n  role: USER\n  rules: []\n")
+    engine = LocalPolicyEngine.from_directory(policy_dir)
+    assert engine.check(other, "view", _resource(kind="doc")) is None
+    assert engine.stats.fallbacks == 1
+
+
+def test_unknown_derived_roles_import_raises(tmp_path: Path) -> None:
+    _write(tmp_path, "doc.yaml", RESOURCE_POLICY)
+
+    with pytest.raises(ValueError, match="imports unknown derived roles 'owners'"):
+        LocalPolicyEngine.from_directory(tmp_path)
+
+
+def test_bundled_policy_attribute_paths(bundled_engine: LocalPolicyEngine) -> None:
+    assert bundled_engine.attribute_paths("mcp_server") == {("arguments", "region")}
+    assert bundled_engine.attribute_paths("other_server") is None
+
+
+@pytest.mark.parametrize(
+    "expr,expected",
+    [
+        ("R.attr.owner == P.id", {("owner",)}),
+        ("request.resource.attr.arguments.region == 'NA'", {("arguments", "region")}),
+        ('R.attr["arguments"][\'region\'] == "NA"', {("arguments", "region")}),
+        ("R.attr.tags.exists(t, t == 'x')", {("tags",)}),
+        ("size(R.attr.items) > 0 && has(R.attr.meta.owner)", {("items",), ("meta", "owner")}),
+        ("R.attr[P.attr.key] == true", None),
+        ("R.attr == P.attr", None),
+    ],
+)
+def test_attribute_paths_from_conditions(
+    tmp_path: Path, expr: str, expected: Optional[set[tuple[str, ...]]]
+) -> None:
+    _write(
+        tmp_path,
+        "doc.yaml",
+        f"""
+resourcePolicy:
+  resource: doc
+  version: default
+  rules:
+    - actions: [view]
+      roles: [USER]
+      effect: EFFECT_ALLOW
+      condition:
+        match:
+          expr: {json.dumps(expr)}
+""",
+    )
+    engine = LocalPolicyEngine.from_directory(tmp_path)
+
+    assert engine.attribute_paths("doc") == expected
+
+
+def test_attribute_paths_include_derived_roles(policy_dir: Path) -> None:
+    engine = LocalPolicyEngine.from_directory(policy_dir)
+
+    assert engine.attribute_paths("doc") == {("locked",), ("owner",)}
@@ -0,0 +1,126 @@
+"""Tests for the Prometheus and OpenTelemetry metrics backends."""
+
+from __future__ import annotations
+
+import pytest
+
+from cerbos_fastmcp import OpenTelemetryMetrics, PrometheusMetrics
+
+
+def test_prometheus_metrics() -> None:
+    prometheus_client = pytest.importorskip("prometheus_client")
+    registry = prometheus_client.CollectorRegistry()
+    metrics = PrometheusMetrics(registry)
+
+    metrics.observe_principal_build(0.002)
+    metrics.observe_principal_queue(4)
+    metrics.observe_rpc("tools/call", "tools/call::greet", 0.01)
+    metrics.observe_batch_size(3)
+    metrics.record_decision("tools/call", "tools/call::greet", True, "pdp")
+    metrics.record_decision("tools/call", "tools/call::greet", True, "pdp")
+    metrics.record_error("tools/list", "tools/list", "cerbos_error")
+    metrics.record_cache("decision", hit=False)
+    metrics.observe_warm_up(0.25)
+
+    def value(name: str, **labels: str) -> float:
+        sample = registry.get_sample_value(f"cerbos_fastmcp_{name}", labels)
+        assert sample is not None, name
+        return sample
+
+    assert value("principal_build_seconds_count") == 1
+    assert value("principal_build_queue_depth_sum") == 4
+    assert value("pdp_request_seconds_count", method="tools/call", action="tools/call::greet") == 1
+    assert value("pdp_batch_size_sum") == 3
+    assert (
+        value(
+            "decisions_total",
+            method="tools/call",
+            action="tools/call::greet",
+            effect="allow",
+            source="pdp",
+        )
+        == 2
+    )
+    assert (
+        value("errors_total", method="tools/list", action="tools/list", reason="cerbos_error") == 1
+    )
+    assert value("cache_lookups_total", cache="decision", result="miss") == 1
+    assert value("warm_up_seconds_sum") == 0.25
+
+
+def test_prometheus_metrics_can_drop_action_labels() -> None:
+    prometheus_client = pytest.importorskip("prometheus_client")
+    registry = prometheus_client.CollectorRegistry()
+    metrics = PrometheusMetrics(registry, action_labels=False)
+
+    metrics.record_decision("resources/read", "resources/read::data://sales/1", False, "pdp")
+
+    assert (
+        registry.get_sample_value(
+            "cerbos_fastmcp_decisions_total",
+            {
+                "method": "resources/read",
+                "action": "resources/read",
+                "effect": "deny",
+                "source": "pdp",
+            },
+        )
+        == 1
+    )
+
+
+class FakeInstrument:
+    def __init__(self) -> None:
+        self.points: list[tuple[float, dict]] = []
+
+    def record(self, value: float, attributes: dict | None = None) -> None:
+        self.points.append((value, attributes or {}))
+
+    add = record
+
+
+class FakeMeter:
+    def __init__(self) -> None:
+        self.instruments: dict[str, FakeInstrument] = {}
+
+    def _create(self, name: str, **_: str) -> FakeInstrument:
+        return self.instruments.setdefault(name, FakeInstrument())
+
+    create_histogram = create_counter = _create
+
+
+def test_opentelemetry_metrics() -> None:
+    meter = FakeMeter()
+    metrics = OpenTelemetryMetrics(meter)
+
+    metrics.observe_serialization("resource", 0.0001, "tools/call", "tools/call::greet")
+    metrics.record_decision("tools/call", "tools/call::greet", False, "cache")
+    metrics.record_cache("principal", hit=True)
+
+    instruments = meter.instruments
+    assert instruments["cerbos_fastmcp.serialization.duration"].points == [
+        (0.0001, {"target": "resource", "method": "tools/call", "action": "tools/call::greet"})
+    ]
+    assert instruments["cerbos_fastmcp.decisions"].points == [
+        (
+            1,
+            {
+                "method": "tools/call",
+                "action": "tools/call::greet",
+                "effect": "deny",
+                "source": "cache",
+            },
+        )
+    ]
+    assert instruments["cerbos_fastmcp.cache_lookups"].points == [
+        (1, {"cache": "principal", "result": "hit"})
+    ]
+
+
+def test_opentelemetry_metrics_use_global_meter() -> None:
+    pytest.importorskip("opentelemetry.metrics")
+
+    metrics = OpenTelemetryMetrics()
+
+    # Without an SDK meter provider the API instruments are no-ops
+    metrics.observe_rpc("tools/list", "tools/list", 0.01)
@@ -1,22 +1,50 @@
 from __future__ import annotations
 
-from typing import Iterable
+import asyncio
+from pathlib import Path
+from typing import Iterable, Sequence
 
 import pytest
 
+from cerbos.effect.v1 import effect_pb2
+from cerbos.request.v1 import request_pb2
+from cerbos.response.v1 import response_pb2
 from cerbos.sdk.model import Principal, Resource
+from fastmcp import Client, Context, FastMCP
 from fastmcp.exceptions import McpError
 from fastmcp.server.dependencies import AccessToken
 from fastmcp.server.middleware import MiddlewareContext
-from mcp.types import CallToolRequestParams, ListToolsRequest, Tool
+from fastmcp.prompts.prompt import FunctionPrompt
+from fastmcp.resources.types import TextResource
+from fastmcp.resources.template import ResourceTemplate
+from mcp.types import (
+    CallToolRequestParams,
+    GetPromptRequestParams,
+    ListPromptsRequest,
+    ListResourcesRequest,
+    ListResourceTemplatesRequest,
+    ListToolsRequest,
+    ReadResourceRequestParams,
+    Tool,
+)
 
-from cerbos_fastmcp import CerbosAuthorizationMiddleware
+from cerbos_fastmcp import (
+    ArgumentLimits,
+    AuthorizationMetrics,
+    CerbosAuthorizationMiddleware,
+    DecisionCache,
+    LocalPolicyEngine,
+    PrincipalCache,
+    PrincipalEnricher,
+    ToolListCache,
+)
 
 
 class DummyClient:
     def __init__(self, allowed_actions: Iterable[str]) -> None:
         self.allowed_actions = set(allowed_actions)
         self.calls: list[tuple[str, Principal, Resource]] = []
+        self.batches: list[int] = []
 
     async def is_allowed(
         self, action: str, principal: Principal, resource: Resource
@@ -24,6 +52,32 @@ class DummyClient:
         self.calls.append((action, principal, resource))
         return action in self.allowed_actions
 
+    async def check_resources(
+        self,
+        principal: Principal,
+        resources: list[request_pb2.CheckResourcesRequest.ResourceEntry],
+    ) -> response_pb2.CheckResourcesResponse:
+        self.batches.append(len(resources))
+        results = []
+        for entry in resources:
+            effects = {}
+            for action in entry.actions:
+                self.calls.append((action, principal, entry.resource))
+                effects[action] = (
+                    effect_pb2.EFFECT_ALLOW
+                    if action in self.allowed_actions
+                    else effect_pb2.EFFECT_DENY
+                )
+            results.append(
+                response_pb2.CheckResourcesResponse.ResultEntry(
+                    resource=response_pb2.CheckResourcesResponse.ResultEntry.Resource(
+                        id=entry.resource.id, kind=entry.resource.kind
+                    ),
+                    actions=effects,
+                )
+            )
+        return response_pb2.CheckResourcesResponse(results=results)
+
     async def close(self) -> None:  # pragma: no cover - compatibility shim
         return None
 
@@ -150,3 +204,1298 @@ async def test_list_tools_filters_denied_items(
         "tools/list::greet",
         "tools/list::admin_tool",
     }
+
+
+@pytest.mark.asyncio
+async def test_list_tools_batches_checks(
+    monkeypatch: pytest.MonkeyPatch, access_token: AccessToken
+) -> None:
+    monkeypatch.setattr(
+        "cerbos_fastmcp.middleware.get_access_token",
+        lambda: access_token,
+    )
+
+    tools = [
+        Tool(name=f"tool_{index}", inputSchema={"type": "object", "properties": {}})
+        for index in range(7)
+    ]
+    client = DummyClient({"tools/list"} | {f"tools/list::tool_{i}" for i in (0, 3, 6)})
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_principal_builder,
+        cerbos_client=client,
+        max_batch_size=3,
+    )
+
+    context = MiddlewareContext(message=ListToolsRequest())
+
+    async def call_next(_: MiddlewareContext[ListToolsRequest]) -> list[Tool]:
+        return tools
+
+    result = await middleware.on_list_tools(context, call_next)
+
+    assert [tool.name for tool in result] == ["tool_0", "tool_3", "tool_6"]
+    assert sorted(client.batches) == [1, 3, 3]
+    listed = [call for call in client.calls if call[0].startswith("tools/list::")]
+    assert listed[0][2].attr["tool_name"].string_value == "tool_0"
+    assert "arguments" in listed[0][2].attr
+
+
+def test_invalid_max_batch_size_raises_error() -> None:
+    with pytest.raises(ValueError, match="max_batch_size must be a positive integer"):
+        CerbosAuthorizationMiddleware(
+            principal_builder=_principal_builder,
+            cerbos_client=DummyClient(set()),
+            max_batch_size=0,
+        )
+
+
+@pytest.mark.asyncio
+async def test_decision_cache_reuses_tool_call_decisions(
+    monkeypatch: pytest.MonkeyPatch, access_token: AccessToken
+) -> None:
+    monkeypatch.setattr(
+        "cerbos_fastmcp.middleware.get_access_token",
+        lambda: access_token,
+    )
+
+    client = DummyClient({"tools/call::greet"})
+    cache = DecisionCache(ttl=60, max_entries=10)
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_principal_builder,
+        cerbos_client=client,
+        decision_cache=cache,
+    )
+
+    async def call_next(_: MiddlewareContext[CallToolRequestParams]) -> str:
+        return "OK"
+
+    for name in ("Alice", "Alice", "Bob"):
+        context = MiddlewareContext(
+            message=CallToolRequestParams(name="greet", arguments={"name": name})
+        )
+        assert await middleware.on_call_tool(context, call_next) == "OK"
+
+    assert len(client.calls) == 2
+    assert (cache.stats.hits, cache.stats.misses) == (1, 2)
+
+
+@pytest.mark.asyncio
+async def test_decision_cache_serves_list_tools_checks(
+    monkeypatch: pytest.MonkeyPatch, access_token: AccessToken
+) -> None:
+    monkeypatch.setattr(
+        "cerbos_fastmcp.middleware.get_access_token",
+        lambda: access_token,
+    )
+
+    client = DummyClient({"tools/list", "tools/list::greet"})
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_principal_builder,
+        cerbos_client=client,
+        decision_cache=DecisionCache(),
+    )
+
+    tools = [
+        Tool(name="greet", inputSchema={"type": "object", "properties": {}}),
+        Tool(name="admin_tool", inputSchema={"type": "object", "properties": {}}),
+    ]
+
+    async def call_next(_: MiddlewareContext[ListToolsRequest]) -> list[Tool]:
+        return tools
+
+    context = MiddlewareContext(message=ListToolsRequest())
+    first = await middleware.on_list_tools(context, call_next)
+    second = await middleware.on_list_tools(context, call_next)
+
+    assert [tool.name for tool in first] == [tool.name for tool in second] == ["greet"]
+    assert len(client.batches) == 1
+
+
+def test_decision_cache_expires_and_evicts(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = [100.0]
+    monkeypatch.setattr("cerbos_fastmcp.middleware.time.monotonic", lambda: now[0])
+
+    cache = DecisionCache(ttl=5, max_entries=2)
+    cache.set(b"a", True)
+    cache.set(b"b", False)
+    assert cache.get(b"a") is True
+    cache.set(b"c", True)
+
+    assert cache.get(b"b") is None
+    assert cache.stats.evictions == 1
+
+    now[0] += 10
+    assert cache.get(b"a") is None
+    assert (cache.stats.hits, cache.stats.misses) == (1, 2)
+
+
+def test_decision_cache_keeps_stale_entries_for_opted_in_actions(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    now = [100.0]
+    monkeypatch.setattr("cerbos_fastmcp.middleware.time.monotonic", lambda: now[0])
+
+    cache = DecisionCache(ttl=5, stale_ttl=10, stale_actions=["tools/call::*"])
+    assert cache.serves_stale("tools/call::greet")
+    assert not cache.serves_stale("resources/read::file:///secret")
+
+    cache.set(b"a", True)
+    assert cache.get_stale(b"a") is None
+
+    now[0] += 6
+    assert cache.get(b"a") is None
+    assert cache.get_stale(b"a") is True
+    assert cache.stats.stale_hits == 1
+
+    now[0] += 10
+    assert cache.get(b"a") is None
+    assert cache.get_stale(b"a") is None
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_stale_decisions_are_served_and_refreshed_once(
+    monkeypatch: pytest.MonkeyPatch, access_token: AccessToken
+) -> None:
+    monkeypatch.setattr("cerbos_fastmcp.middleware.get_access_token", lambda: access_token)
+    now = [100.0]
+    monkeypatch.setattr("cerbos_fastmcp.middleware.time.monotonic", lambda: now[0])
+
+    class OutageClient(DummyClient):
+        def __init__(self, allowed_actions: Iterable[str]) -> None:
+            super().__init__(allowed_actions)
+            self.release = asyncio.Event()
+            self.failing = False
+
+        async def is_allowed(self, action, principal, resource):  # type: ignore[no-untyped-def]
+            if self.failing:
+                raise ConnectionError("PDP unreachable")
+            return await super().is_allowed(action, principal, resource)
+
+        async def check_resources(self, principal, resources):  # type: ignore[no-untyped-def]
+            await self.release.wait()
+            if self.failing:
+                raise ConnectionError("PDP unreachable")
+            return await super().check_resources(principal, resources)
+
+    client = OutageClient({"tools/call::greet", "tools/call::admin"})
+    client.release.set()
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_principal_builder,
+        cerbos_client=client,
+        decision_cache=DecisionCache(ttl=5, stale_ttl=60, stale_actions=["tools/call::greet"]),
+    )
+
+    async def call_next(_: MiddlewareContext[CallToolRequestParams]) -> str:
+        return "OK"
+
+    def call(name: str) -> MiddlewareContext[CallToolRequestParams]:
+        return MiddlewareContext(message=CallToolRequestParams(name=name, arguments={}))
+
+    await middleware.on_call_tool(call("greet"), call_next)
+    await middleware.on_call_tool(call("admin"), call_next)
+    assert len(client.calls) == 2
+
+    # Expired: served immediately while a single background refresh is pending
+    now[0] += 10
+    client.release.clear()
+    for _ in range(3):
+        assert await middleware.on_call_tool(call("greet"), call_next) == "OK"
+    assert len(middleware._refreshing) == 1
+    client.release.set()
+    await asyncio.gather(*middleware._background)
+    assert len(client.calls) == 3
+    assert await middleware.on_call_tool(call("greet"), call_next) == "OK"
+    assert not middleware._background
+
+    # During an outage the stale decision is served until the grace period ends
+    client.failing = True
+    now[0] += 10
+    assert await middleware.on_call_tool(call("greet"), call_next) == "OK"
+    await asyncio.gather(*middleware._background)
+
+    # Actions without opt-in fail closed
+    with pytest.raises(McpError) as denied:
+        await middleware.on_call_tool(call("admin"), call_next)
+    assert denied.value.error.data == "cerbos_error"
+
+    now[0] += 60
+    with pytest.raises(McpError):
+        await middleware.on_call_tool(call("greet"), call_next)
+
+
+class CountingBuilder:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def __call__(self, token: AccessToken) -> Principal:
+        self.calls += 1
+        return await _principal_builder(token)
+
+
+@pytest.mark.asyncio
+async def test_list_tools_resolves_principal_once(
+    monkeypatch: pytest.MonkeyPatch, access_token: AccessToken
+) -> None:
+    monkeypatch.setattr(
+        "cerbos_fastmcp.middleware.get_access_token",
+        lambda: access_token,
+    )
+
+    builder = CountingBuilder()
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=builder,
+        cerbos_client=DummyClient({"tools/list"}),
+    )
+
+    async def call_next(_: MiddlewareContext[ListToolsRequest]) -> list[Tool]:
+        return [Tool(name="greet", inputSchema={"type": "object", "properties": {}})]
+
+    await middleware.on_list_tools(MiddlewareContext(message=ListToolsRequest()), call_next)
+
+    assert builder.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_principal_cache_reuses_principal_per_token(
+    monkeypatch: pytest.MonkeyPatch, access_token: AccessToken
+) -> None:
+    tokens = [access_token, access_token, access_token.model_copy(update={"token": "other"})]
+    monkeypatch.setattr(
+        "cerbos_fastmcp.middleware.get_access_token",
+        lambda: tokens.pop(0),
+    )
+
+    builder = CountingBuilder()
+    cache = PrincipalCache(ttl=60)
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=builder,
+        cerbos_client=DummyClient({"tools/call::greet"}),
+        principal_cache=cache,
+    )
+
+    async def call_next(_: MiddlewareContext[CallToolRequestParams]) -> str:
+        return "OK"
+
+    context = MiddlewareContext(message=CallToolRequestParams(name="greet", arguments={}))
+    for _ in range(3):
+        await middleware.on_call_tool(context, call_next)
+
+    assert builder.calls == 2
+    assert (cache.stats.hits, cache.stats.misses) == (1, 2)
+
+
+def test_principal_cache_respects_token_expiry(
+    monkeypatch: pytest.MonkeyPatch, access_token: AccessToken
+) -> None:
+    wall, mono = [1_000.0], [50.0]
+    monkeypatch.setattr("cerbos_fastmcp.middleware.time.time", lambda: wall[0])
+    monkeypatch.setattr("cerbos_fastmcp.middleware.time.monotonic", lambda: mono[0])
+
+    cache = PrincipalCache(ttl=300)
+    resolved = object()
+    cache.set(access_token.model_copy(update={"expires_at": 1_010}), resolved)  # type: ignore[arg-type]
+    assert cache.get(access_token) is resolved
+
+    mono[0] += 11
+    assert cache.get(access_token) is None
+
+    cache.set(access_token.model_copy(update={"expires_at": 900}), resolved)  # type: ignore[arg-type]
+    assert len(cache) == 0
+
+
+class DirectoryLoader:
+    def __init__(self, directory: dict[str, dict[str, str]]) -> None:
+        self.directory = directory
+        self.batches: list[list[str]] = []
+        self.error: Exception | None = None
+
+    async def __call__(self, principals: Sequence[Principal]) -> dict[str, dict[str, str]]:
+        self.batches.append([principal.id for principal in principals])
+        if self.error is not None:
+            raise self.error
+        return {p.id: self.directory[p.id] for p in principals if p.id in self.directory}
+
+
+@pytest.mark.asyncio
+async def test_principal_enricher_loads_concurrent_principals_in_one_batch(
+    monkeypatch: pytest.MonkeyPatch, access_token: AccessToken
+) -> None:
+    tokens = [
+        access_token.model_copy(
+            update={"token": name, "claims": {**access_token.claims, "sub": name}}
+        )
+        for name in ("alice", "bob", "carol")
+    ]
+    monkeypatch.setattr(
+        "cerbos_fastmcp.middleware.get_access_token",
+        lambda: tokens.pop(0),
+    )
+
+    loader = DirectoryLoader({"alice": {"department": "sales"}, "bob": {"team": "red"}})
+    client = DummyClient({"tools/call::greet"})
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_principal_builder,
+        cerbos_client=client,
+        principal_enricher=PrincipalEnricher(loader, batch_window=0.01),
+    )
+
+    async def call_next(_: MiddlewareContext[CallToolRequestParams]) -> str:
+        return "ok"
+
+    context = MiddlewareContext(message=CallToolRequestParams(name="greet", arguments={}))
+    await asyncio.gather(*(middleware.on_call_tool(context, call_next) for _ in range(3)))
+
+    assert loader.batches == [["alice", "bob", "carol"]]
+    attributes = {
+        call[1].id: {name: value.string_value for name, value in call[1].attr.items()}
+        for call in client.calls
+    }
+    assert attributes["alice"] == {"department": "sales", "region": "NA"}
+    assert attributes["bob"] == {"department": "engineering", "region": "NA", "team": "red"}
+    assert attributes["carol"] == {"department": "engineering", "region": "NA"}
+
+
+@pytest.mark.asyncio
+async def test_principal_enricher_failure_rejects_request(
+    monkeypatch: pytest.MonkeyPatch, access_token: AccessToken
+) -> None:
+    monkeypatch.setattr(
+        "cerbos_fastmcp.middleware.get_access_token",
+        lambda: access_token,
+    )
+    loader = DirectoryLoader({})
+    loader.error = RuntimeError("directory unavailable")
+    enricher = PrincipalEnricher(loader, batch_window=0)
+    client = DummyClient({"tools/call::greet"})
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_principal_builder,
+        cerbos_client=client,
+        principal_enricher=enricher,
+    )
+
+    async def call_next(_: MiddlewareContext[CallToolRequestParams]) -> str:
+        return "ok"
+
+    context = MiddlewareContext(message=CallToolRequestParams(name="greet", arguments={}))
+    with pytest.raises(McpError) as exc_info:
+        await middleware.on_call_tool(context, call_next)
+
+    assert exc_info.value.error.data == "principal_enricher_error"
+    assert client.calls == []
+    assert len(enricher) == 0
+
+
+class GatedClient(DummyClient):
+    def __init__(self, allowed_actions: Iterable[str]) -> None:
+        super().__init__(allowed_actions)
+        self.release = asyncio.Event()
+
+    async def is_allowed(
+        self, action: str, principal: Principal, resource: Resource
+    ) -> bool:
+        await self.release.wait()
+        return await super().is_allowed(action, principal, resource)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_checks_are_coalesced(
+    monkeypatch: pytest.MonkeyPatch, access_token: AccessToken
+) -> None:
+    monkeypatch.setattr(
+        "cerbos_fastmcp.middleware.get_access_token",
+        lambda: access_token,
+    )
+
+    builder = CountingBuilder()
+    client = GatedClient({"tools/call::greet"})
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=builder,
+        cerbos_client=client,
+    )
+
+    async def call_next(_: MiddlewareContext[CallToolRequestParams]) -> str:
+        return "OK"
+
+    context = MiddlewareContext(
+        message=CallToolRequestParams(name="greet", arguments={"name": "Alice"})
+    )
+    pending = [asyncio.create_task(middleware.on_call_tool(context, call_next)) for _ in range(5)]
+    await asyncio.sleep(0)
+    client.release.set()
+
+    assert await asyncio.gather(*pending) == ["OK"] * 5
+    assert len(client.calls) == 1
+    assert builder.calls == 1
+    assert len(middleware._inflight_checks) == 0
+
+
+@pytest.mark.asyncio
+async def test_coalesced_check_survives_cancelled_waiter(
+    monkeypatch: pytest.MonkeyPatch, access_token: AccessToken
+) -> None:
+    monkeypatch.setattr(
+        "cerbos_fastmcp.middleware.get_access_token",
+        lambda: access_token,
+    )
+
+    client = GatedClient({"tools/call::greet"})
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_principal_builder,
+        cerbos_client=client,
+    )
+
+    async def call_next(_: MiddlewareContext[CallToolRequestParams]) -> str:
+        return "OK"
+
+    context = MiddlewareContext(message=CallToolRequestParams(name="greet", arguments={}))
+    first = asyncio.create_task(middleware.on_call_tool(context, call_next))
+    second = asyncio.create_task(middleware.on_call_tool(context, call_next))
+    await asyncio.sleep(0)
+    first.cancel()
+    client.release.set()
+
+    assert await second == "OK"
+    assert len(client.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_window_groups_concurrent_tool_calls(
+    monkeypatch: pytest.MonkeyPatch, access_token: AccessToken
+) -> None:
+    monkeypatch.setattr(
+        "cerbos_fastmcp.middleware.get_access_token",
+        lambda: access_token,
+    )
+
+    client = DummyClient({"tools/call::greet", "tools/call::get_sales_data"})
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_principal_builder,
+        cerbos_client=client,
+        batch_window=0.01,
+    )
+
+    async def call_next(_: MiddlewareContext[CallToolRequestParams]) -> str:
+        return "OK"
+
+    names = ["greet", "get_sales_data", "admin_tool"]
+    results = await asyncio.gather(
+        *(
+            middleware.on_call_tool(
+                MiddlewareContext(message=CallToolRequestParams(name=name, arguments={})),
+                call_next,
+            )
+            for name in names
+        ),
+        return_exceptions=True,
+    )
+
+    assert results[:2] == ["OK", "OK"]
+    assert isinstance(results[2], McpError)
+    assert results[2].error.data == "cerbos_denied"
+    assert client.batches == [3]
+
+
+@pytest.mark.asyncio
+async def test_batch_window_flushes_at_size_cap(
+    monkeypatch: pytest.MonkeyPatch, access_token: AccessToken
+) -> None:
+    monkeypatch.setattr(
+        "cerbos_fastmcp.middleware.get_access_token",
+        lambda: access_token,
+    )
+
+    client = DummyClient({f"tools/call::tool_{index}" for index in range(4)})
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_principal_builder,
+        cerbos_client=client,
+        max_batch_size=2,
+        batch_window=60,
+    )
+
+    async def call_next(_: MiddlewareContext[CallToolRequestParams]) -> str:
+        return "OK"
+
+    results = await asyncio.wait_for(
+        asyncio.gather(
+            *(
+                middleware.on_call_tool(
+                    MiddlewareContext(
+                        message=CallToolRequestParams(name=f"tool_{index}", arguments={})
+                    ),
+                    call_next,
+                )
+                for index in range(4)
+            )
+        ),
+        timeout=1,
+    )
+
+    assert results == ["OK"] * 4
+    assert client.batches == [2, 2]
+
+
+@pytest.mark.asyncio
+async def test_local_engine_answers_unconditional_rules(
+    monkeypatch: pytest.MonkeyPatch, access_token: AccessToken
+) -> None:
+    sales_token = access_token.model_copy(
+        update={"claims": {**access_token.claims, "roles": ["SALES"]}}
+    )
+    monkeypatch.setattr(
+        "cerbos_fastmcp.middleware.get_access_token",
+        lambda: sales_token,
+    )
+
+    engine = LocalPolicyEngine.from_directory(Path(__file__).parent.parent / "policies")
+    client = DummyClient({"tools/call::get_sales_data"})
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_principal_builder,
+        cerbos_client=client,
+        local_engine=engine,
+    )
+
+    async def call_next(_: MiddlewareContext[CallToolRequestParams]) -> str:
+        return "OK"
+
+    greet = MiddlewareContext(message=CallToolRequestParams(name="greet", arguments={}))
+    sales = MiddlewareContext(
+        message=CallToolRequestParams(name="get_sales_data", arguments={"region": "NA"})
+    )
+    admin = MiddlewareContext(message=CallToolRequestParams(name="admin_tool", arguments={}))
+
+    assert await middleware.on_call_tool(greet, call_next) == "OK"
+    assert await middleware.on_call_tool(sales, call_next) == "OK"
+    with pytest.raises(McpError):
+        await middleware.on_call_tool(admin, call_next)
+
+    # Only the conditional get_sales_data rule reaches the PDP
+    assert [call[0] for call in client.calls] == ["tools/call::get_sales_data"]
+    assert (engine.stats.decided, engine.stats.fallbacks) == (2, 1)
+
+
+@pytest.mark.asyncio
+async def test_project_attributes_ignores_unreferenced_arguments(
+    monkeypatch: pytest.MonkeyPatch, access_token: AccessToken
+) -> None:
+    monkeypatch.setattr(
+        "cerbos_fastmcp.middleware.get_access_token",
+        lambda: access_token,
+    )
+
+    client = DummyClient({"tools/call::get_sales_data"})
+    cache = DecisionCache()
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_principal_builder,
+        cerbos_client=client,
+        decision_cache=cache,
+        local_engine=LocalPolicyEngine([]),
+        tool_attribute_paths={"get_sales_data": ["arguments.region", "tool_name"]},
+    )
+
+    async def call_next(_: MiddlewareContext[CallToolRequestParams]) -> str:
+        return "OK"
+
+    for note in ("first", "second"):
+        context = MiddlewareContext(
+            message=CallToolRequestParams(
+                name="get_sales_data",
+                arguments={"region": "NA", "note": note},
+            )
+        )
+        assert await middleware.on_call_tool(context, call_next) == "OK"
+
+    assert len(client.calls) == 1
+    assert cache.stats.hits == 1
+    sent = client.calls[0][2]
+    assert set(sent.attr) == {"arguments", "tool_name"}
+    assert set(sent.attr["arguments"].struct_value.fields) == {"region"}
+
+
+@pytest.mark.asyncio
+async def test_project_attributes_uses_policy_references(
+    monkeypatch: pytest.MonkeyPatch, access_token: AccessToken
+) -> None:
+    sales_token = access_token.model_copy(
+        update={"claims": {**access_token.claims, "roles": ["SALES"]}}
+    )
+    monkeypatch.setattr(
+        "cerbos_fastmcp.middleware.get_access_token",
+        lambda: sales_token,
+    )
+
+    client = DummyClient({"tools/call::get_sales_data"})
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_principal_builder,
+        cerbos_client=client,
+        local_engine=LocalPolicyEngine.from_directory(Path(__file__).parent.parent / "policies"),
+        project_attributes=True,
+    )
+
+    async def call_next(_: MiddlewareContext[CallToolRequestParams]) -> str:
+        return "OK"
+
+    context = MiddlewareContext(
+        message=CallToolRequestParams(
+            name="get_sales_data", arguments={"region": "NA", "document": "x" * 1024}
+        ),
+        source="client",
+    )
+    assert await middleware.on_call_tool(context, call_next) == "OK"
+
+    sent = client.calls[0][2]
+    assert list(sent.attr) == ["arguments"]
+    assert list(sent.attr["arguments"].struct_value.fields) == ["region"]
+
+
+def test_project_attributes_requires_local_engine() -> None:
+    with pytest.raises(ValueError, match="project_attributes requires local_engine"):
+        CerbosAuthorizationMiddleware(
+            principal_builder=_principal_builder,
+            cerbos_client=DummyClient(set()),
+            project_attributes=True,
+        )
+
+
+def test_project_attribute_paths() -> None:
+    from cerbos_fastmcp.middleware import _project_attributes
+
+    attr = {
+        "tool_name": "t",
+        "arguments": {"region": "NA", "filters": {"a": 1, "b": 2}, "items": [1, 2]},
+    }
+
+    assert _project_attributes(
+        attr,
+        {("arguments", "filters"), ("arguments", "filters", "a"), ("arguments", "missing")},
+    ) == {"arguments": {"filters": {"a": 1, "b": 2}}}
+    assert _project_attributes(attr, {("arguments", "items", "first")}) == {
+        "arguments": {"items": [1, 2]}
+    }
+    assert _project_attributes(attr, set()) == {}
+
+
+@pytest.mark.asyncio
+async def test_tool_list_cache_serves_repeated_listings(
+    monkeypatch: pytest.MonkeyPatch, access_token: AccessToken
+) -> None:
+    monkeypatch.setattr(
+        "cerbos_fastmcp.middleware.get_access_token",
+        lambda: access_token,
+    )
+
+    client = DummyClient({"tools/list", "tools/list::greet", "tools/list::search"})
+    snapshots = ToolListCache()
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_principal_builder,
+        cerbos_client=client,
+        tool_list_cache=snapshots,
+    )
+
+    tools = [
+        Tool(name="greet", inputSchema={"type": "object", "properties": {}}),
+        Tool(name="admin_tool", inputSchema={"type": "object", "properties": {}}),
+    ]
+
+    async def call_next(_: MiddlewareContext[ListToolsRequest]) -> list[Tool]:
+        return list(tools)
+
+    context = MiddlewareContext(message=ListToolsRequest())
+    for _ in range(3):
+        result = await middleware.on_list_tools(context, call_next)
+        assert [tool.name for tool in result] == ["greet"]
+
+    assert len(client.calls) == 3
+    assert snapshots.stats.hits == 2
+
+    # Registering a tool changes the snapshot key
+    tools.append(Tool(name="search", inputSchema={"type": "object", "properties": {}}))
+    result = await middleware.on_list_tools(context, call_next)
+
+    assert [tool.name for tool in result] == ["greet", "search"]
+    assert len(client.calls) == 7
+
+
+@pytest.mark.asyncio
+async def test_tool_list_cache_shares_snapshots_between_principals(
+    monkeypatch: pytest.MonkeyPatch, access_token: AccessToken
+) -> None:
+    tokens = [
+        access_token,
+        access_token.model_copy(
+            update={"token": "other", "claims": {**access_token.claims, "sub": "someone"}}
+        ),
+    ]
+    monkeypatch.setattr(
+        "cerbos_fastmcp.middleware.get_access_token",
+        lambda: tokens.pop(0),
+    )
+
+    client = DummyClient(set())
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_principal_builder,
+        cerbos_client=client,
+        tool_list_cache=ToolListCache(share_between_principals=True),
+    )
+
+    async def call_next(_: MiddlewareContext[ListToolsRequest]) -> list[Tool]:
+        return [Tool(name="greet", inputSchema={"type": "object", "properties": {}})]
+
+    context = MiddlewareContext(message=ListToolsRequest())
+    assert await middleware.on_list_tools(context, call_next) == []
+    assert await middleware.on_list_tools(context, call_next) == []
+
+    # The denied tools/list gate is part of the snapshot
+    assert [call[0] for call in client.calls] == ["tools/list"]
+
+
+@pytest.mark.asyncio
+async def test_warm_up_prefills_tool_list_decisions(
+    monkeypatch: pytest.MonkeyPatch, access_token: AccessToken
+) -> None:
+    monkeypatch.setattr(
+        "cerbos_fastmcp.middleware.get_access_token",
+        lambda: access_token,
+    )
+
+    client = DummyClient({"tools/list", "tools/list::greet"})
+    decisions = DecisionCache()
+    snapshots = ToolListCache()
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_principal_builder,
+        cerbos_client=client,
+        decision_cache=decisions,
+        tool_list_cache=snapshots,
+    )
+    tools = [
+        Tool(name="greet", inputSchema={"type": "object", "properties": {}}),
+        Tool(name="admin_tool", inputSchema={"type": "object", "properties": {}}),
+    ]
+
+    report = await middleware.warm_up(tools, [await _principal_builder(access_token)])
+
+    assert (report.principals, report.tools, report.checks, report.failed) == (1, 2, 3, 0)
+    assert middleware.warm_up_report == report
+    assert client.batches == [3]
+
+    async def call_next(_: MiddlewareContext[ListToolsRequest]) -> list[Tool]:
+        return list(tools)
+
+    context = MiddlewareContext(message=ListToolsRequest())
+    result = await middleware.on_list_tools(context, call_next)
+
+    assert [tool.name for tool in result] == ["greet"]
+    assert len(client.calls) == 3
+    assert snapshots.stats.hits == 1
+
+
+class FailingClient(DummyClient):
+    async def check_resources(self, principal, resources):  # type: ignore[override]
+        raise RuntimeError("PDP unreachable")
+
+
+@pytest.mark.asyncio
+async def test_warm_up_counts_failed_principals() -> None:
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_principal_builder,
+        cerbos_client=FailingClient(set()),
+        decision_cache=DecisionCache(),
+    )
+
+    report = await middleware.warm_up(
+        ["greet"], [Principal(id="alice", roles=["USER"]), Principal(id="bob", roles=["USER"])]
+    )
+
+    assert (report.principals, report.checks, report.failed) == (2, 0, 2)
+
+
+@pytest.mark.asyncio
+async def test_initialize_starts_warm_up_for_server_tools() -> None:
+    server = FastMCP("warm")
+
+    @server.tool
+    def greet() -> str:
+        return "hello"
+
+    @server.tool(enabled=False)
+    def hidden() -> str:
+        return "hidden"
+
+    client = DummyClient({"tools/list", "tools/list::greet"})
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_principal_builder,
+        cerbos_client=client,
+        decision_cache=DecisionCache(),
+        warm_up_principals=[Principal(id="alice", roles=["USER"])],
+    )
+
+    async def call_next(_: MiddlewareContext) -> None:
+        return None
+
+    context = MiddlewareContext(message=None, fastmcp_context=Context(fastmcp=server))
+    await middleware.on_initialize(context, call_next)
+    await middleware.on_initialize(context, call_next)
+    assert middleware._warm_up_task is not None
+    await middleware._warm_up_task
+
+    assert middleware.warm_up_report is not None
+    assert middleware.warm_up_report.tools == 1
+    assert sorted(call[0] for call in client.calls) == ["tools/list", "tools/list::greet"]
+
+
+@pytest.mark.asyncio
+async def test_first_session_request_starts_warm_up() -> None:
+    client = DummyClient({"tools/list", "tools/list::greet"})
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_principal_builder,
+        cerbos_client=client,
+        warm_up_principals=[Principal(id="alice", roles=["USER"])],
+    )
+    server = FastMCP("warm", middleware=[middleware])
+
+    @server.tool
+    def greet() -> str:
+        return "hello"
+
+    # Runs through FastMCP's own middleware dispatch, which may skip on_initialize
+    async with Client(server) as session:
+        await session.list_tools()
+    assert middleware._warm_up_task is not None
+    await middleware._warm_up_task
+
+    assert middleware.warm_up_report is not None
+    assert (middleware.warm_up_report.principals, middleware.warm_up_report.tools) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_argument_limits_truncate_before_authorization(
+    monkeypatch: pytest.MonkeyPatch, access_token: AccessToken
+) -> None:
+    monkeypatch.setattr(
+        "cerbos_fastmcp.middleware.get_access_token",
+        lambda: access_token,
+    )
+
+    client = DummyClient({"tools/call::summarize"})
+    limits = ArgumentLimits(max_bytes=64, on_exceed="truncate")
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_principal_builder,
+        cerbos_client=client,
+        argument_limits=limits,
+    )
+
+    received: list[CallToolRequestParams] = []
+
+    async def call_next(context: MiddlewareContext[CallToolRequestParams]) -> str:
+        received.append(context.message)
+        return "OK"
+
+    document = "x" * 10_000
+    context = MiddlewareContext(
+        message=CallToolRequestParams(name="summarize", arguments={"document": document})
+    )
+
+    assert await middleware.on_call_tool(context, call_next) == "OK"
+
+    sent = client.calls[0][2].attr["arguments"].struct_value.fields["document"]
+    assert sent.struct_value.fields["truncated"].string_value == "max_bytes"
+    assert received[0].arguments == {"document": document}
+    assert limits.stats.truncated_calls == 1
+
+
+@pytest.mark.asyncio
+async def test_tool_argument_limits_can_reject(
+    monkeypatch: pytest.MonkeyPatch, access_token: AccessToken
+) -> None:
+    monkeypatch.setattr(
+        "cerbos_fastmcp.middleware.get_access_token",
+        lambda: access_token,
+    )
+
+    client = DummyClient({"tools/call::upload"})
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_principal_builder,
+        cerbos_client=client,
+        argument_limits=ArgumentLimits(max_bytes=1_000_000),
+        tool_argument_limits={"upload": ArgumentLimits(max_list_length=2)},
+    )
+
+    async def call_next(_: MiddlewareContext[CallToolRequestParams]) -> str:
+        return "OK"
+
+    context = MiddlewareContext(
+        message=CallToolRequestParams(name="upload", arguments={"files": [1, 2, 3]})
+    )
+
+    with pytest.raises(McpError) as exc:
+        await middleware.on_call_tool(context, call_next)
+
+    assert exc.value.error.data == "arguments_too_large"
+    assert client.calls == []
+
+
+@pytest.mark.asyncio
+async def test_list_resources_and_prompts_filter_items(
+    monkeypatch: pytest.MonkeyPatch, access_token: AccessToken
+) -> None:
+    monkeypatch.setattr(
+        "cerbos_fastmcp.middleware.get_access_token",
+        lambda: access_token,
+    )
+
+    client = DummyClient(
+        {
+            "resources/list",
+            "resources/list::data://sales",
+            "resources/templates/list",
+            "resources/templates/list::data://{region}/sales",
+            "prompts/list",
+            "prompts/list::summarize",
+        }
+    )
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_principal_builder,
+        cerbos_client=client,
+        filter_list_items=True,
+    )
+
+    resources = [
+        TextResource(uri="data://sales", name="sales", text=""),
+        TextResource(uri="data://payroll", name="payroll", text=""),
+    ]
+    templates = [
+        ResourceTemplate(
+            uri_template="data://{region}/sales", name="regional_sales", parameters={}
+        ),
+        ResourceTemplate(uri_template="data://{user}/hr", name="hr_records", parameters={}),
+    ]
+    prompts = [
+        FunctionPrompt.from_function(lambda: "Summarize", name="summarize"),
+        FunctionPrompt.from_function(lambda: "Escalate", name="escalate"),
+    ]
+
+    async def list_resources(_: MiddlewareContext[ListResourcesRequest]):
+        return resources
+
+    async def list_templates(_: MiddlewareContext[ListResourceTemplatesRequest]):
+        return templates
+
+    async def list_prompts(_: MiddlewareContext[ListPromptsRequest]):
+        return prompts
+
+    listed_resources = await middleware.on_list_resources(
+        MiddlewareContext(message=ListResourcesRequest()), list_resources
+    )
+    listed_templates = await middleware.on_list_resource_templates(
+        MiddlewareContext(message=ListResourceTemplatesRequest()), list_templates
+    )
+    listed_prompts = await middleware.on_list_prompts(
+        MiddlewareContext(message=ListPromptsRequest()), list_prompts
+    )
+
+    assert [resource.name for resource in listed_resources] == ["sales"]
+    assert [template.name for template in listed_templates] == ["regional_sales"]
+    assert [prompt.name for prompt in listed_prompts] == ["summarize"]
+    # One batch of item checks per listing
+    assert client.batches == [2, 2, 2]
+    payroll = next(call for call in client.calls if call[0] == "resources/list::data://payroll")
+    assert payroll[2].id == "data://payroll"
+    assert payroll[2].attr["name"].string_value == "payroll"
+
+
+@pytest.mark.asyncio
+async def test_list_resources_without_item_filtering(
+    monkeypatch: pytest.MonkeyPatch, access_token: AccessToken
+) -> None:
+    monkeypatch.setattr(
+        "cerbos_fastmcp.middleware.get_access_token",
+        lambda: access_token,
+    )
+
+    client = DummyClient({"resources/list"})
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_principal_builder,
+        cerbos_client=client,
+    )
+    resources = [TextResource(uri="data://sales", name="sales", text="")]
+
+    async def list_resources(_: MiddlewareContext[ListResourcesRequest]):
+        return resources
+
+    async def list_prompts(_: MiddlewareContext[ListPromptsRequest]):
+        raise AssertionError("prompts/list should be denied before listing")
+
+    assert (
+        await middleware.on_list_resources(
+            MiddlewareContext(message=ListResourcesRequest()), list_resources
+        )
+        == resources
+    )
+    assert (
+        await middleware.on_list_prompts(
+            MiddlewareContext(message=ListPromptsRequest()), list_prompts
+        )
+        == []
+    )
+    assert [call[0] for call in client.calls] == ["resources/list", "prompts/list"]
+
+
+@pytest.mark.asyncio
+async def test_read_resource_and_get_prompt_are_authorized(
+    monkeypatch: pytest.MonkeyPatch, access_token: AccessToken
+) -> None:
+    monkeypatch.setattr(
+        "cerbos_fastmcp.middleware.get_access_token",
+        lambda: access_token,
+    )
+
+    client = DummyClient({"resources/read::data://sales", "prompts/get::summarize"})
+    builder = CountingBuilder()
+    cache = DecisionCache()
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=builder,
+        cerbos_client=client,
+        decision_cache=cache,
+        principal_cache=PrincipalCache(),
+        authorize_reads=True,
+    )
+
+    async def call_next(_: MiddlewareContext) -> str:
+        return "OK"
+
+    sales = MiddlewareContext(message=ReadResourceRequestParams(uri="data://sales"))
+    payroll = MiddlewareContext(message=ReadResourceRequestParams(uri="data://payroll"))
+    prompt = MiddlewareContext(
+        message=GetPromptRequestParams(name="summarize", arguments={"topic": "Q3"})
+    )
+
+    assert await middleware.on_read_resource(sales, call_next) == "OK"
+    assert await middleware.on_read_resource(sales, call_next) == "OK"
+    assert await middleware.on_get_prompt(prompt, call_next) == "OK"
+    with pytest.raises(McpError) as exc:
+        await middleware.on_read_resource(payroll, call_next)
+
+    assert exc.value.error.data == "cerbos_denied"
+    assert builder.calls == 1
+    assert [call[0] for call in client.calls] == [
+        "resources/read::data://sales",
+        "prompts/get::summarize",
+        "resources/read::data://payroll",
+    ]
+    read, get = client.calls[0][2], client.calls[1][2]
+    assert read.id == "data://sales"
+    assert read.attr["uri"].string_value == "data://sales"
+    assert get.attr["arguments"].struct_value.fields["topic"].string_value == "Q3"
+    assert cache.stats.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_reads_and_prompts_are_not_checked_by_default() -> None:
+    client = DummyClient(set())
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_principal_builder,
+        cerbos_client=client,
+    )
+
+    async def call_next(_: MiddlewareContext) -> str:
+        return "OK"
+
+    read = MiddlewareContext(message=ReadResourceRequestParams(uri="data://sales"))
+    prompt = MiddlewareContext(message=GetPromptRequestParams(name="summarize"))
+    assert await middleware.on_read_resource(read, call_next) == "OK"
+    assert await middleware.on_get_prompt(prompt, call_next) == "OK"
+    assert client.calls == []
+
+
+class RecordingMetrics(AuthorizationMetrics):
+    def __init__(self) -> None:
+        self.events: list[tuple] = []
+
+    def observe_principal_build(self, seconds: float) -> None:
+        self.events.append(("principal_build",))
+
+    def observe_serialization(
+        self, target: str, seconds: float, method: str = "", action: str = ""
+    ) -> None:
+        self.events.append(("serialization", target, method, action))
+
+    def observe_rpc(self, method: str, action: str, seconds: float) -> None:
+        self.events.append(("rpc", method, action))
+
+    def observe_batch_size(self, size: int) -> None:
+        self.events.append(("batch_size", size))
+
+    def record_decision(self, method: str, action: str, allowed: bool, source: str) -> None:
+        self.events.append(("decision", method, action, allowed, source))
+
+    def record_error(self, method: str, action: str, reason: str) -> None:
+        self.events.append(("error", method, action, reason))
+
+    def record_cache(self, cache: str, hit: bool) -> None:
+        self.events.append(("cache", cache, hit))
+
+
+@pytest.mark.asyncio
+async def test_metrics_record_each_authorization_phase(
+    monkeypatch: pytest.MonkeyPatch, access_token: AccessToken
+) -> None:
+    monkeypatch.setattr(
+        "cerbos_fastmcp.middleware.get_access_token",
+        lambda: access_token,
+    )
+
+    metrics = RecordingMetrics()
+    client = DummyClient({"tools/call::greet", "tools/list", "tools/list::greet"})
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_principal_builder,
+        cerbos_client=client,
+        decision_cache=DecisionCache(),
+        principal_cache=PrincipalCache(),
+        metrics=metrics,
+    )
+
+    async def call_tool(_: MiddlewareContext[CallToolRequestParams]) -> str:
+        return "OK"
+
+    async def list_tools(_: MiddlewareContext[ListToolsRequest]) -> list[Tool]:
+        return [
+            Tool(name=name, inputSchema={"type": "object", "properties": {}})
+            for name in ("greet", "admin_tool")
+        ]
+
+    context = MiddlewareContext(message=CallToolRequestParams(name="greet", arguments={}))
+    await middleware.on_call_tool(context, call_tool)
+    await middleware.on_call_tool(context, call_tool)
+    await middleware.on_list_tools(MiddlewareContext(message=ListToolsRequest()), list_tools)
+
+    assert metrics.events[:7] == [
+        ("cache", "principal", False),
+        ("principal_build",),
+        ("serialization", "principal", "", ""),
+        ("serialization", "resource", "tools/call", "tools/call::greet"),
+        ("cache", "decision", False),
+        ("rpc", "tools/call", "tools/call::greet"),
+        ("batch_size", 1),
+    ]
+    assert ("decision", "tools/call", "tools/call::greet", True, "pdp") in metrics.events
+    assert ("decision", "tools/call", "tools/call::greet", True, "cache") in metrics.events
+    assert ("rpc", "tools/list", "tools/list") in metrics.events
+    assert ("batch_size", 2) in metrics.events
+    assert ("decision", "tools/list", "tools/list::admin_tool", False, "pdp") in metrics.events
+    assert metrics.events.count(("principal_build",)) == 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_record_errors(
+    monkeypatch: pytest.MonkeyPatch, access_token: AccessToken
+) -> None:
+    monkeypatch.setattr(
+        "cerbos_fastmcp.middleware.get_access_token",
+        lambda: access_token,
+    )
+
+    class FailingClient(DummyClient):
+        async def is_allowed(self, action, principal, resource) -> bool:
+            raise RuntimeError("PDP unavailable")
+
+    metrics = RecordingMetrics()
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_principal_builder,
+        cerbos_client=FailingClient(()),
+        metrics=metrics,
+    )
+
+    async def call_next(_: MiddlewareContext[CallToolRequestParams]) -> str:
+        return "OK"
+
+    context = MiddlewareContext(message=CallToolRequestParams(name="greet", arguments={}))
+    with pytest.raises(McpError):
+        await middleware.on_call_tool(context, call_next)
+
+    assert metrics.events[-1] == ("error", "tools/call", "tools/call::greet", "cerbos_error")
+
+
+@pytest.mark.asyncio
+async def test_list_tools_logs_one_summary_and_samples_allows(
+    monkeypatch: pytest.MonkeyPatch,
+    access_token: AccessToken,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    monkeypatch.setattr(
+        "cerbos_fastmcp.middleware.get_access_token",
+        lambda: access_token,
+    )
+
+    tools = [
+        Tool(name=f"tool_{index}", inputSchema={"type": "object", "properties": {}})
+        for index in range(200)
+    ]
+    client = DummyClient({"tools/list"} | {f"tools/list::tool_{i}" for i in range(198)})
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_principal_builder,
+        cerbos_client=client,
+        log_sample_rate=0.0,
+    )
+
+    async def call_next(_: MiddlewareContext[ListToolsRequest]) -> list[Tool]:
+        return tools
+
+    with caplog.at_level("INFO", logger="FastMCP.cerbos_middleware"):
+        result = await middleware.on_list_tools(
+            MiddlewareContext(message=ListToolsRequest()), call_next
+        )
+
+    assert len(result) == 198
+    messages = [record.getMessage() for record in caplog.records]
+    assert messages == [
+        "Cerbos denied action",
+        "Cerbos denied action",
+        "Cerbos authorization summary",
+    ]
+    summary = caplog.records[-1]
+    assert (summary.method, summary.principal, summary.allowed, summary.denied) == (
+        "tools/list",
+        "tester",
+        199,
+        2,
+    )
+    assert summary.duration_ms >= 0
+
+
+@pytest.mark.asyncio
+async def test_denied_tool_call_summary_records_error(
+    monkeypatch: pytest.MonkeyPatch,
+    access_token: AccessToken,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    monkeypatch.setattr(
+        "cerbos_fastmcp.middleware.get_access_token",
+        lambda: access_token,
+    )
+
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_principal_builder,
+        cerbos_client=DummyClient(set()),
+    )
+
+    async def call_next(_: MiddlewareContext[CallToolRequestParams]) -> str:
+        return "OK"
+
+    context = MiddlewareContext(message=CallToolRequestParams(name="greet", arguments={}))
+    with caplog.at_level("INFO", logger="FastMCP.cerbos_middleware"):
+        with pytest.raises(McpError):
+            await middleware.on_call_tool(context, call_next)
+
+    summary = caplog.records[-1]
+    assert summary.getMessage() == "Cerbos authorization summary"
+    assert (summary.allowed, summary.denied, summary.error) == (0, 1, "cerbos_denied")
+
+
+@pytest.mark.parametrize("rate", [-0.1, 1.5])
+def test_invalid_log_sample_rate_raises_error(rate: float) -> None:
+    with pytest.raises(ValueError, match="log_sample_rate must be between 0 and 1"):
+        CerbosAuthorizationMiddleware(
+            principal_builder=_principal_builder,
+            cerbos_client=DummyClient(()),
+            log_sample_rate=rate,
+        )
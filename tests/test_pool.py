@@ -0,0 +1,209 @@
+"""Tests for load balancing across several Cerbos endpoints."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Optional
+from unittest.mock import AsyncMock, patch
+
+import grpc
+import pytest
+
+from cerbos.sdk.model import Principal, Resource
+from fastmcp.server.dependencies import AccessToken
+from fastmcp.server.middleware import MiddlewareContext
+
+from cerbos_fastmcp import CerbosAuthorizationMiddleware, CerbosClientPool
+
+
+class FakeEndpoint:
+    def __init__(self, host: str) -> None:
+        self.host = host
+        self.calls = 0
+        self.delay = 0.0
+        self.error: Optional[BaseException] = None
+        self.healthy = True
+        self.closed = False
+
+    async def is_allowed(self, action: str, principal: Principal, resource: Resource) -> str:
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.host  # type: ignore[return-value]
+
+    async def server_info(self) -> None:
+        if not self.healthy:
+            raise ConnectionError("down")
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+def _unavailable() -> grpc.aio.AioRpcError:
+    return grpc.aio.AioRpcError(
+        grpc.StatusCode.UNAVAILABLE, grpc.aio.Metadata(), grpc.aio.Metadata(), details="down"
+    )
+
+
+def _pool(hosts: list[str], **kwargs) -> tuple[CerbosClientPool, dict[str, FakeEndpoint]]:
+    endpoints: dict[str, FakeEndpoint] = {}
+
+    def factory(host: str) -> FakeEndpoint:
+        endpoints[host] = FakeEndpoint(host)
+        return endpoints[host]
+
+    return CerbosClientPool(hosts, client_factory=factory, **kwargs), endpoints
+
+
+PRINCIPAL = Principal(id="alice", roles=["USER"])
+RESOURCE = Resource(id="greet", kind="mcp_server")
+
+
+@pytest.mark.asyncio
+async def test_requests_go_to_the_least_loaded_endpoint() -> None:
+    pool, endpoints = _pool(["a:3593", "b:3593", "c:3593"], balancing="least_outstanding")
+    await pool._start()
+    for endpoint in endpoints.values():
+        endpoint.delay = 0.05
+
+    slow = [asyncio.ensure_future(pool.is_allowed("x", PRINCIPAL, RESOURCE)) for _ in range(2)]
+    await asyncio.sleep(0)
+    outstanding = {status.host: status.outstanding for status in pool.endpoints}
+    assert sorted(outstanding.values()) == [0, 1, 1]
+
+    idle = min(outstanding, key=outstanding.__getitem__)
+    assert await pool.is_allowed("x", PRINCIPAL, RESOURCE) == idle
+    await asyncio.gather(*slow)
+    await pool.close()
+    assert all(endpoint.closed for endpoint in endpoints.values())
+
+
+@pytest.mark.asyncio
+async def test_power_of_two_spreads_requests() -> None:
+    pool, endpoints = _pool([f"pdp-{index}:3593" for index in range(4)])
+
+    await asyncio.gather(*(pool.is_allowed("x", PRINCIPAL, RESOURCE) for _ in range(200)))
+
+    assert all(endpoint.calls > 0 for endpoint in endpoints.values())
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_unavailable_endpoints_are_ejected_and_restored(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr("cerbos_fastmcp.pool.random.choice", lambda items: items[0])
+    pool, endpoints = _pool(["a:3593", "b:3593"])
+    await pool._start()
+    endpoints["a:3593"].error = _unavailable()
+    endpoints["a:3593"].healthy = False
+
+    with pytest.raises(grpc.aio.AioRpcError):
+        await pool.is_allowed("x", PRINCIPAL, RESOURCE)
+    for _ in range(5):
+        assert await pool.is_allowed("x", PRINCIPAL, RESOURCE) == "b:3593"
+    assert endpoints["a:3593"].calls == 1
+    assert [status.healthy for status in pool.endpoints] == [False, True]
+    assert pool.stats.ejections == 1
+
+    endpoints["a:3593"].error = None
+    endpoints["a:3593"].healthy = True
+    await pool.check_health()
+    assert [status.healthy for status in pool.endpoints] == [True, True]
+
+    endpoints["b:3593"].healthy = False
+    await pool.check_health()
+    assert [status.healthy for status in pool.endpoints] == [True, False]
+    assert pool.stats.ejections == 2
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_returns_the_faster_response(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr("cerbos_fastmcp.pool.random.choice", lambda items: items[0])
+    pool, endpoints = _pool(["slow:3593", "fast:3593"], hedge_after=0.01)
+    await pool._start()
+    endpoints["slow:3593"].delay = 1.0
+
+    result = await asyncio.wait_for(pool.is_allowed("x", PRINCIPAL, RESOURCE), 0.5)
+
+    assert result == "fast:3593"
+    assert pool.stats.hedged == 1
+    await asyncio.sleep(0)
+    assert all(status.outstanding == 0 for status in pool.endpoints)
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_dns_names_expand_to_every_address(monkeypatch: pytest.MonkeyPatch) -> None:
+    addresses = [["10.0.0.1", "10.0.0.2"]]
+
+    async def getaddrinfo(host, port, type):  # type: ignore[no-untyped-def]
+        assert host == "cerbos.internal"
+        return [(2, type, 6, "", (address, int(port))) for address in addresses[0]]
+
+    monkeypatch.setattr(asyncio.get_running_loop(), "getaddrinfo", getaddrinfo)
+    pool, endpoints = _pool(["cerbos.internal:3593"], resolve_dns=True)
+
+    await pool._start()
+    assert [status.host for status in pool.endpoints] == ["10.0.0.1:3593", "10.0.0.2:3593"]
+
+    addresses[0] = ["10.0.0.2", "10.0.0.3"]
+    await pool.check_health()
+    assert [status.host for status in pool.endpoints] == ["10.0.0.2:3593", "10.0.0.3:3593"]
+    assert endpoints["10.0.0.1:3593"].closed
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_hosts_without_a_port_use_the_default_port(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def getaddrinfo(host, port, type):  # type: ignore[no-untyped-def]
+        assert (host, port) == ("cerbos", "3593")
+        return [(2, type, 6, "", ("10.0.0.1", 3593))]
+
+    monkeypatch.setattr(asyncio.get_running_loop(), "getaddrinfo", getaddrinfo)
+    pool, _ = _pool(["cerbos"], resolve_dns=True)
+    assert pool.hosts == ("cerbos:3593",)
+    assert _pool(["[::1]", "::1", "unix:/tmp/cerbos.sock"])[0].hosts == (
+        "[::1]:3593",
+        "[::1]:3593",
+        "unix:/tmp/cerbos.sock",
+    )
+
+    await pool._start()
+    assert [status.host for status in pool.endpoints] == ["10.0.0.1:3593"]
+    await pool.close()
+
+
+def test_invalid_pool_settings_raise_error() -> None:
+    with pytest.raises(ValueError):
+        CerbosClientPool([])
+    with pytest.raises(ValueError):
+        CerbosClientPool(["a:3593"], balancing="round_robin")  # type: ignore[arg-type]
+    with pytest.raises(ValueError):
+        CerbosClientPool(["a:3593"], hedge_after=0)
+
+
+@pytest.mark.asyncio
+async def test_middleware_builds_a_pool_for_several_hosts(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("CERBOS_HOST", "a:3593, b:3593")
+
+    async def principal_builder(token: AccessToken) -> Principal:
+        return PRINCIPAL
+
+    middleware = CerbosAuthorizationMiddleware(principal_builder=principal_builder)
+    with patch("cerbos_fastmcp.pool.AsyncCerbosClient", return_value=AsyncMock()) as factory:
+        client = await middleware._ensure_client()
+        assert isinstance(client, CerbosClientPool)
+        assert client.hosts == ("a:3593", "b:3593")
+
+        await middleware.on_initialize(MiddlewareContext(message=None), AsyncMock())
+        assert [call.args[0] for call in factory.call_args_list] == ["a:3593", "b:3593"]
+        await middleware.close()
+        assert factory.return_value.close.await_count == 2
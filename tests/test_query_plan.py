@@ -0,0 +1,310 @@
+"""Tests for PlanResources query plans and their predicate and SQL compilers."""
+
+from __future__ import annotations
+
+import sqlite3
+from typing import Any
+
+import pytest
+
+from cerbos.engine.v1 import engine_pb2
+from cerbos.response.v1 import response_pb2
+from cerbos.sdk.model import Principal, Resource
+from fastmcp.exceptions import McpError
+from fastmcp.server.dependencies import AccessToken
+from fastmcp.server.middleware import MiddlewareContext
+from google.protobuf import json_format
+from mcp.types import CallToolRequestParams, ErrorData
+
+from cerbos_fastmcp import (
+    CerbosAuthorizationMiddleware,
+    PlannedResource,
+    QueryPlan,
+    UnsupportedPlanError,
+    get_query_plan,
+)
+
+RECORDS = [
+    {"id": "S-1", "region": "NA", "amount": 100, "owner": {"team": "red"}, "tags": ["vip"]},
+    {"id": "S-2", "region": "EMEA", "amount": 250, "owner": {"team": "blue"}, "tags": []},
+    {"id": "S-3", "region": "EMEA", "amount": 50, "owner": {"team": "red"}, "tags": ["new"]},
+    {"id": "S-4", "region": "APAC", "amount": None, "owner": None, "tags": []},
+]
+
+
+def _var(name: str) -> dict[str, Any]:
+    return {"variable": f"request.resource.attr.{name}"}
+
+
+def _expr(operator: str, *operands: dict[str, Any]) -> dict[str, Any]:
+    return {"expression": {"operator": operator, "operands": list(operands)}}
+
+
+def _plan(condition: dict[str, Any] | None = None, kind: str = "KIND_CONDITIONAL") -> QueryPlan:
+    response = json_format.ParseDict(
+        {
+            "action": "read",
+            "resourceKind": "sales_record",
+            "filter": {"kind": kind, **({"condition": condition} if condition else {})},
+        },
+        response_pb2.PlanResourcesResponse(),
+    )
+    return QueryPlan.from_response(response)
+
+
+def _sql_ids(plan: QueryPlan) -> list[str]:
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE sales (id TEXT, region TEXT, amount INTEGER, team TEXT)")
+    connection.executemany(
+        "INSERT INTO sales VALUES (?, ?, ?, ?)",
+        [(r["id"], r["region"], r["amount"], (r["owner"] or {}).get("team")) for r in RECORDS],
+    )
+    where, params = plan.to_sql({"owner.team": "team"})
+    rows = connection.execute(f"SELECT id FROM sales WHERE {where} ORDER BY id", params)
+    return [row[0] for row in rows]
+
+
+@pytest.mark.parametrize(
+    ("condition", "expected"),
+    [
+        (_expr("eq", _var("region"), {"value": "EMEA"}), ["S-2", "S-3"]),
+        (_expr("ne", {"value": "EMEA"}, _var("region")), ["S-1", "S-4"]),
+        (_expr("ge", _var("amount"), {"value": 100}), ["S-1", "S-2"]),
+        (_expr("in", _var("region"), {"value": ["NA", "APAC"]}), ["S-1", "S-4"]),
+        (
+            _expr(
+                "and",
+                _expr("eq", _var("owner.team"), {"value": "red"}),
+                _expr("not", _expr("lt", _var("amount"), {"value": 60})),
+            ),
+            ["S-1"],
+        ),
+        (
+            _expr(
+                "or",
+                _expr("startsWith", _var("region"), {"value": "AP"}),
+                _expr("eq", {"variable": "request.resource.id"}, {"value": "S-2"}),
+            ),
+            ["S-2", "S-4"],
+        ),
+        (_expr("isSet", _var("amount"), {"value": False}), ["S-4"]),
+        (_expr("eq", _var("amount"), {"value": None}), ["S-4"]),
+        (_expr("ne", _var("amount"), {"value": None}), ["S-1", "S-2", "S-3"]),
+        # Comparisons with NULL are unknown, and negating unknown does not select the record
+        (_expr("ne", _var("amount"), {"value": 50}), ["S-1", "S-2"]),
+        (_expr("not", _expr("eq", _var("amount"), {"value": 100})), ["S-2", "S-3"]),
+        (_expr("not", _expr("eq", _var("owner.team"), {"value": "red"})), ["S-2"]),
+        (_expr("not", _expr("startsWith", _var("owner.team"), {"value": "b"})), ["S-1", "S-3"]),
+        (
+            _expr(
+                "not",
+                _expr(
+                    "and",
+                    _expr("eq", _var("owner.team"), {"value": "red"}),
+                    _expr("gt", _var("amount"), {"value": 60}),
+                ),
+            ),
+            ["S-2", "S-3"],
+        ),
+        (
+            _expr(
+                "or",
+                _expr("ne", _var("amount"), {"value": 100}),
+                _expr("eq", _var("region"), {"value": "APAC"}),
+            ),
+            ["S-2", "S-3", "S-4"],
+        ),
+    ],
+)
+def test_predicate_and_sql_select_the_same_records(
+    condition: dict[str, Any], expected: list[str]
+) -> None:
+    plan = _plan(condition)
+
+    assert [record["id"] for record in plan.filter(RECORDS)] == expected
+    assert _sql_ids(plan) == expected
+
+
+def test_unconditional_plans() -> None:
+    allowed = _plan(kind="KIND_ALWAYS_ALLOWED")
+    denied = _plan(kind="KIND_ALWAYS_DENIED")
+
+    assert allowed.always_allowed and allowed.filter(RECORDS) == RECORDS
+    assert denied.always_denied and denied.filter(RECORDS) == []
+    assert allowed.to_sql() == ("1 = 1", [])
+    assert denied.to_sql() == ("1 = 0", [])
+
+
+def test_predicate_reads_objects_and_renamed_fields() -> None:
+    class Row:
+        def __init__(self, area: str) -> None:
+            self.area = area
+
+    predicate = _plan(_expr("eq", _var("region"), {"value": "NA"})).predicate({"region": "area"})
+
+    assert predicate(Row("NA"))
+    assert not predicate(Row("EMEA"))
+
+
+def test_sql_parameter_styles_and_like_escaping() -> None:
+    plan = _plan(
+        _expr(
+            "and",
+            _expr("contains", _var("region"), {"value": "50%_off!"}),
+            _expr("gt", _var("amount"), {"value": 10}),
+        )
+    )
+
+    where, params = plan.to_sql(paramstyle="numeric")
+    assert where == "(region LIKE $1 ESCAPE '!' AND amount > $2)"
+    assert params == ["%50!%!_off!!%", 10]
+    assert plan.to_sql(paramstyle="format")[0] == "(region LIKE %s ESCAPE '!' AND amount > %s)"
+
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE sales (region TEXT, amount INTEGER)")
+    connection.executemany(
+        "INSERT INTO sales VALUES (?, 20)", [("EU 50%_off! sale",), ("EU 50 xoff! sale",)]
+    )
+    where, params = plan.to_sql()
+    rows = connection.execute(f"SELECT region FROM sales WHERE {where}", params)
+    assert [row[0] for row in rows] == ["EU 50%_off! sale"]
+
+
+def test_unsupported_conditions_raise() -> None:
+    lambda_plan = _plan(_expr("exists", _var("tags"), {"value": "vip"}))
+    with pytest.raises(UnsupportedPlanError):
+        lambda_plan.predicate()
+
+    intersection = _plan(_expr("hasIntersection", _var("tags"), {"value": ["vip", "gold"]}))
+    assert [record["id"] for record in intersection.filter(RECORDS)] == ["S-1"]
+    with pytest.raises(UnsupportedPlanError):
+        intersection.to_sql()
+
+    with pytest.raises(UnsupportedPlanError):
+        _plan(_expr("eq", _var("owner.team"), {"value": "red"})).to_sql()
+
+
+class PlanningClient:
+    def __init__(self, condition: dict[str, Any]) -> None:
+        self.condition = condition
+        self.plans: list[
+            tuple[str, engine_pb2.Principal, engine_pb2.PlanResourcesInput.Resource]
+        ] = []
+
+    async def is_allowed(self, action: str, principal: Principal, resource: Resource) -> bool:
+        return True
+
+    async def plan_resources(
+        self,
+        action: str,
+        principal: engine_pb2.Principal,
+        resource: engine_pb2.PlanResourcesInput.Resource,
+    ) -> response_pb2.PlanResourcesResponse:
+        self.plans.append((action, principal, resource))
+        return json_format.ParseDict(
+            {
+                "action": action,
+                "resourceKind": resource.kind,
+                "filter": {"kind": "KIND_CONDITIONAL", "condition": self.condition},
+            },
+            response_pb2.PlanResourcesResponse(),
+        )
+
+    async def close(self) -> None:  # pragma: no cover - compatibility shim
+        return None
+
+
+async def _build_principal(token: AccessToken) -> Principal:
+    return Principal(id="sally", roles=["SALES"], attr={"region": "EMEA"})
+
+
+@pytest.fixture(autouse=True)
+def access_token(monkeypatch: pytest.MonkeyPatch) -> None:
+    token = AccessToken(token="token", client_id="tester", scopes=[], claims={"sub": "sally"})
+    monkeypatch.setattr("cerbos_fastmcp.middleware.get_access_token", lambda: token)
+
+
+@pytest.mark.asyncio
+async def test_tool_receives_query_plan_for_its_records() -> None:
+    client = PlanningClient(_expr("eq", _var("region"), {"value": "EMEA"}))
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_build_principal,
+        cerbos_client=client,
+        tool_query_plans={
+            "get_sales_data": "sales_record",
+            "get_hr_records": PlannedResource("hr_record", action="list"),
+        },
+    )
+
+    async def call_next(_: MiddlewareContext[CallToolRequestParams]) -> list[str]:
+        return [record["id"] for record in get_query_plan().filter(RECORDS)]
+
+    context = MiddlewareContext(message=CallToolRequestParams(name="get_sales_data", arguments={}))
+    assert await middleware.on_call_tool(context, call_next) == ["S-2", "S-3"]
+
+    action, principal_pb, resource_pb = client.plans[0]
+    assert (action, principal_pb.id, resource_pb.kind) == ("read", "sally", "sales_record")
+    with pytest.raises(RuntimeError):
+        get_query_plan()
+
+    context = MiddlewareContext(message=CallToolRequestParams(name="get_hr_records", arguments={}))
+    await middleware.on_call_tool(context, call_next)
+    assert client.plans[1][0] == "list"
+
+    # Tools without a planned resource make no PlanResources call
+    context = MiddlewareContext(message=CallToolRequestParams(name="greet", arguments={}))
+    with pytest.raises(RuntimeError):
+        await middleware.on_call_tool(context, call_next)
+    assert len(client.plans) == 2
+
+
+@pytest.mark.asyncio
+async def test_plan_failure_rejects_tool_call() -> None:
+    class BrokenPlanner(PlanningClient):
+        async def plan_resources(self, *args: Any, **kwargs: Any) -> Any:
+            raise ConnectionError("PDP unreachable")
+
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_build_principal,
+        cerbos_client=BrokenPlanner({}),
+        tool_query_plans={"get_sales_data": "sales_record"},
+    )
+    called = []
+
+    async def call_next(_: MiddlewareContext[CallToolRequestParams]) -> None:
+        called.append(True)
+
+    context = MiddlewareContext(message=CallToolRequestParams(name="get_sales_data", arguments={}))
+    with pytest.raises(McpError) as exc_info:
+        await middleware.on_call_tool(context, call_next)
+
+    assert exc_info.value.error.data == "cerbos_error"
+    assert called == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("tool_name", ["get_sales_data", "greet"])
+async def test_tool_runs_after_authorization_summary(
+    tool_name: str, caplog: pytest.LogCaptureFixture
+) -> None:
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_build_principal,
+        cerbos_client=PlanningClient(_expr("eq", _var("region"), {"value": "EMEA"})),
+        tool_query_plans={"get_sales_data": "sales_record"},
+    )
+    logged_before_tool: list[str] = []
+
+    async def call_next(_: MiddlewareContext[CallToolRequestParams]) -> None:
+        logged_before_tool.extend(record.getMessage() for record in caplog.records)
+        raise McpError(ErrorData(code=-32000, message="Tool failed", data="tool_failed"))
+
+    context = MiddlewareContext(message=CallToolRequestParams(name=tool_name, arguments={}))
+    with caplog.at_level("INFO", logger="FastMCP.cerbos_middleware"):
+        with pytest.raises(McpError):
+            await middleware.on_call_tool(context, call_next)
+
+    # The tool's runtime and errors are not part of the authorization summary
+    assert logged_before_tool[-1] == "Cerbos authorization summary"
+    summary = caplog.records[-1]
+    assert summary.getMessage() == "Cerbos authorization summary"
+    assert (summary.allowed, summary.error) == (1, None)
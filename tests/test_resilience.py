@@ -0,0 +1,207 @@
+"""Tests for PDP deadlines, retries, and the circuit breaker."""
+
+from __future__ import annotations
+
+import asyncio
+
+import grpc
+import pytest
+
+from cerbos.sdk.model import Principal
+from fastmcp.exceptions import McpError
+from fastmcp.server.dependencies import AccessToken
+from fastmcp.server.middleware import MiddlewareContext
+from mcp.types import CallToolRequestParams
+
+from cerbos_fastmcp import (
+    CerbosAuthorizationMiddleware,
+    CircuitBreaker,
+    CircuitOpenError,
+    DecisionCache,
+    ResiliencePolicy,
+)
+
+
+def _rpc_error(code: grpc.StatusCode) -> grpc.aio.AioRpcError:
+    return grpc.aio.AioRpcError(code, grpc.aio.Metadata(), grpc.aio.Metadata(), details="test")
+
+
+class FlakyCall:
+    def __init__(self, *errors: BaseException, result: str = "ok") -> None:
+        self.errors = list(errors)
+        self.result = result
+        self.calls = 0
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.result
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried() -> None:
+    policy = ResiliencePolicy(max_retries=2, backoff=0)
+    call = FlakyCall(
+        _rpc_error(grpc.StatusCode.UNAVAILABLE), _rpc_error(grpc.StatusCode.DEADLINE_EXCEEDED)
+    )
+
+    assert await policy.run(call) == "ok"
+    assert call.calls == 3
+    assert policy.stats.retries == 2
+
+
+@pytest.mark.asyncio
+async def test_retries_are_bounded_and_skip_permanent_errors() -> None:
+    policy = ResiliencePolicy(max_retries=1, backoff=0)
+    call = FlakyCall(*[_rpc_error(grpc.StatusCode.UNAVAILABLE)] * 3)
+    with pytest.raises(grpc.aio.AioRpcError):
+        await policy.run(call)
+    assert call.calls == 2
+
+    call = FlakyCall(_rpc_error(grpc.StatusCode.INVALID_ARGUMENT))
+    with pytest.raises(grpc.aio.AioRpcError):
+        await policy.run(call)
+    assert call.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_backoff_uses_full_jitter(monkeypatch: pytest.MonkeyPatch) -> None:
+    bounds: list[tuple[float, float]] = []
+    monkeypatch.setattr(
+        "cerbos_fastmcp.resilience.random.uniform", lambda a, b: bounds.append((a, b)) or 0
+    )
+    policy = ResiliencePolicy(max_retries=3, backoff=0.1, max_backoff=0.3)
+
+    await policy.run(FlakyCall(*[_rpc_error(grpc.StatusCode.UNAVAILABLE)] * 3))
+
+    assert bounds == [(0, 0.1), (0, 0.2), (0, 0.3)]
+
+
+@pytest.mark.asyncio
+async def test_deadline_covers_all_attempts() -> None:
+    async def hang() -> None:
+        await asyncio.sleep(10)
+
+    policy = ResiliencePolicy(timeout=0.01)
+    with pytest.raises(TimeoutError):
+        await policy.run(hang)
+    assert policy.stats.timeouts == 1
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_opens_and_recovers(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = [1_000.0]
+    monkeypatch.setattr("cerbos_fastmcp.resilience.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=2, recovery_time=5.0)
+    policy = ResiliencePolicy(max_retries=0, circuit_breaker=breaker)
+
+    for _ in range(2):
+        with pytest.raises(grpc.aio.AioRpcError):
+            await policy.run(FlakyCall(_rpc_error(grpc.StatusCode.UNAVAILABLE)))
+    assert breaker.state == "open"
+
+    call = FlakyCall()
+    with pytest.raises(CircuitOpenError):
+        await policy.run(call)
+    assert call.calls == 0
+    assert breaker.stats.opened == 1
+    assert breaker.stats.rejected == 1
+
+    # A failed trial request reopens the breaker for another recovery period
+    now[0] += 5.0
+    assert breaker.state == "half_open"
+    with pytest.raises(grpc.aio.AioRpcError):
+        await policy.run(FlakyCall(_rpc_error(grpc.StatusCode.UNAVAILABLE)))
+    assert breaker.state == "open"
+
+    now[0] += 5.0
+    assert await policy.run(FlakyCall()) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_half_open_admits_limited_trials(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = [1_000.0]
+    monkeypatch.setattr("cerbos_fastmcp.resilience.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=1, recovery_time=1.0, half_open_max_calls=1)
+    breaker.record_failure()
+    now[0] += 1.0
+
+    breaker.acquire()
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+    breaker.release()
+    breaker.acquire()
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{"timeout": 0}, {"max_retries": -1}, {"backoff": -0.1}],
+)
+def test_invalid_policy_settings_raise_error(kwargs: dict) -> None:
+    with pytest.raises(ValueError):
+        ResiliencePolicy(**kwargs)
+
+
+def test_invalid_breaker_settings_raise_error() -> None:
+    with pytest.raises(ValueError):
+        CircuitBreaker(failure_threshold=0)
+
+
+class UnavailableClient:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.available = False
+
+    async def is_allowed(self, action: str, principal, resource) -> bool:  # type: ignore[no-untyped-def]
+        self.calls += 1
+        if not self.available:
+            raise _rpc_error(grpc.StatusCode.UNAVAILABLE)
+        return True
+
+    async def close(self) -> None:
+        return None
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_fails_fast_and_serves_cached_decisions(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    token = AccessToken(token="token", client_id="tester", scopes=[], claims={"sub": "alice"})
+    monkeypatch.setattr("cerbos_fastmcp.middleware.get_access_token", lambda: token)
+
+    async def principal_builder(token: AccessToken) -> Principal:
+        return Principal(id=token.claims["sub"], roles=["USER"])
+
+    client = UnavailableClient()
+    client.available = True
+    breaker = CircuitBreaker(failure_threshold=1)
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=principal_builder,
+        cerbos_client=client,
+        decision_cache=DecisionCache(),
+        resilience=ResiliencePolicy(max_retries=0, circuit_breaker=breaker),
+    )
+
+    async def call_next(_: MiddlewareContext[CallToolRequestParams]) -> str:
+        return "OK"
+
+    def call(name: str) -> MiddlewareContext[CallToolRequestParams]:
+        return MiddlewareContext(message=CallToolRequestParams(name=name, arguments={}))
+
+    assert await middleware.on_call_tool(call("greet"), call_next) == "OK"
+
+    client.available = False
+    with pytest.raises(McpError) as first:
+        await middleware.on_call_tool(call("search"), call_next)
+    assert first.value.error.data == "cerbos_error"
+    assert breaker.state == "open"
+
+    calls = client.calls
+    with pytest.raises(McpError) as rejected:
+        await middleware.on_call_tool(call("search"), call_next)
+    assert rejected.value.error.data == "cerbos_unavailable"
+    assert client.calls == calls
+
+    # Decisions still in the cache are served without touching the PDP
+    assert await middleware.on_call_tool(call("greet"), call_next) == "OK"
@@ -0,0 +1,210 @@
+"""Tests for OpenTelemetry tracing and trace context propagation."""
+
+from __future__ import annotations
+
+import contextlib
+from typing import Any, Iterator, Optional
+
+import pytest
+
+pytest.importorskip("opentelemetry.trace")
+
+from cerbos.effect.v1 import effect_pb2
+from cerbos.request.v1 import request_pb2
+from cerbos.response.v1 import response_pb2
+from cerbos.sdk.grpc.client import AsyncCerbosClient
+from cerbos.sdk.model import Principal
+from fastmcp.exceptions import McpError
+from fastmcp.server.dependencies import AccessToken
+from fastmcp.server.middleware import MiddlewareContext
+from mcp.types import CallToolRequestParams, ListToolsRequest, Tool
+from opentelemetry import trace
+
+from cerbos_fastmcp import AuthorizationTracing, CerbosAuthorizationMiddleware
+
+TRACE_ID = 0x0AF7651916CD43DD8448EB211C80319C
+
+
+class FakeSpan(trace.NonRecordingSpan):
+    def __init__(self, name: str, span_id: int, attributes: Optional[dict]) -> None:
+        super().__init__(
+            trace.SpanContext(
+                trace_id=TRACE_ID,
+                span_id=span_id,
+                is_remote=False,
+                trace_flags=trace.TraceFlags(trace.TraceFlags.SAMPLED),
+            )
+        )
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.events: list[tuple[str, dict]] = []
+
+    def add_event(self, name: str, attributes: Any = None, timestamp: Any = None) -> None:
+        self.events.append((name, dict(attributes or {})))
+
+
+class FakeTracer:
+    def __init__(self) -> None:
+        self.spans: list[FakeSpan] = []
+
+    @contextlib.contextmanager
+    def start_as_current_span(
+        self, name: str, kind: Any = None, attributes: Optional[dict] = None
+    ) -> Iterator[FakeSpan]:
+        span = FakeSpan(name, len(self.spans) + 1, attributes)
+        self.spans.append(span)
+        with trace.use_span(span):
+            yield span
+
+
+class FakeStub:
+    def __init__(self, allowed_actions: set[str]) -> None:
+        self.allowed_actions = allowed_actions
+        self.metadata: list[tuple] = []
+
+    async def CheckResources(
+        self, request: request_pb2.CheckResourcesRequest, metadata: tuple
+    ) -> response_pb2.CheckResourcesResponse:
+        self.metadata.append(metadata)
+        return response_pb2.CheckResourcesResponse(
+            results=[
+                response_pb2.CheckResourcesResponse.ResultEntry(
+                    resource=response_pb2.CheckResourcesResponse.ResultEntry.Resource(
+                        id=entry.resource.id, kind=entry.resource.kind
+                    ),
+                    actions={
+                        action: (
+                            effect_pb2.EFFECT_ALLOW
+                            if action in self.allowed_actions
+                            else effect_pb2.EFFECT_DENY
+                        )
+                        for action in entry.actions
+                    },
+                )
+                for entry in request.resources
+            ]
+        )
+
+
+async def _principal_builder(token: AccessToken) -> Principal:
+    return Principal(id=token.claims["sub"], roles=token.claims["roles"])
+
+
+@pytest.fixture
+def access_token(monkeypatch: pytest.MonkeyPatch) -> AccessToken:
+    token = AccessToken(
+        token="token",
+        client_id="tester",
+        scopes=["mcp:connect"],
+        claims={"sub": "tester", "roles": ["ADMIN"]},
+    )
+    monkeypatch.setattr("cerbos_fastmcp.middleware.get_access_token", lambda: token)
+    return token
+
+
+@pytest.fixture
+async def cerbos_client() -> AsyncCerbosClient:
+    # The channel is never used: requests go to the fake stub
+    client = AsyncCerbosClient("localhost:3593")
+    try:
+        yield client
+    finally:
+        await client.close()
+
+
+async def test_spans_and_trace_context_reach_the_pdp(
+    access_token: AccessToken, cerbos_client: AsyncCerbosClient
+) -> None:
+    stub = FakeStub({"tools/call::greet"})
+    cerbos_client._client = stub
+    tracer = FakeTracer()
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_principal_builder,
+        cerbos_client=cerbos_client,
+        tracing=AuthorizationTracing(tracer),
+    )
+
+    async def call_next(_: MiddlewareContext[CallToolRequestParams]) -> str:
+        return "OK"
+
+    context = MiddlewareContext(message=CallToolRequestParams(name="greet", arguments={}))
+    assert await middleware.on_call_tool(context, call_next) == "OK"
+
+    assert [span.name for span in tracer.spans] == [
+        "cerbos.authorize",
+        "cerbos.resolve_principal",
+        "cerbos.check_resources",
+    ]
+    rpc = tracer.spans[2]
+    assert rpc.attributes == {
+        "mcp.method": "tools/call",
+        "cerbos.action": "tools/call::greet",
+        "cerbos.batch_size": 1,
+    }
+    [metadata] = stub.metadata
+    assert (
+        dict(metadata)["traceparent"]
+        == f"00-{TRACE_ID:032x}-{rpc.get_span_context().span_id:016x}-01"
+    )
+
+
+async def test_denials_are_recorded_as_span_events(
+    access_token: AccessToken, cerbos_client: AsyncCerbosClient
+) -> None:
+    stub = FakeStub({"tools/list", "tools/list::greet"})
+    cerbos_client._client = stub
+    tracer = FakeTracer()
+    middleware = CerbosAuthorizationMiddleware(
+        principal_builder=_principal_builder,
+        cerbos_client=cerbos_client,
+        tracing=AuthorizationTracing(tracer),
+    )
+
+    async def list_tools(_: MiddlewareContext[ListToolsRequest]) -> list[Tool]:
+        return [
+            Tool(name=name, inputSchema={"type": "object", "properties": {}})
+            for name in ("greet", "admin_tool")
+        ]
+
+    async def call_tool(_: MiddlewareContext[CallToolRequestParams]) -> str:
+        return "OK"
+
+    result = await middleware.on_list_tools(
+        MiddlewareContext(message=ListToolsRequest()), list_tools
+    )
+    with pytest.raises(McpError):
+        await middleware.on_call_tool(
+            MiddlewareContext(message=CallToolRequestParams(name="admin_tool", arguments={})),
+            call_tool,
+        )
+
+    assert [tool.name for tool in result] == ["greet"]
+    assert [span.name for span in tracer.spans if span.name == "cerbos.authorize_command"] == [
+        "cerbos.authorize_command"
+    ]
+    denied = [event for span in tracer.spans for event in span.events]
+    assert denied == [
+        (
+            "cerbos.denied",
+            {
+                "cerbos.principal.id": "tester",
+                "cerbos.action": "tools/list::admin_tool",
+                "cerbos.resource.id": "admin_tool",
+            },
+        ),
+        (
+            "cerbos.denied",
+            {
+                "cerbos.principal.id": "tester",
+                "cerbos.action": "tools/call::admin_tool",
+                "cerbos.resource.id": "admin_tool",
+            },
+        ),
+    ]
+
+
+def test_propagation_can_be_disabled() -> None:
+    tracing = AuthorizationTracing(FakeTracer(), propagate=False)
+
+    with tracing.span("cerbos.check_resources", client=True):
+        assert tracing.metadata() == ()